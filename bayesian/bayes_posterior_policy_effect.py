@@ -10,15 +10,19 @@ Bayesian inference for a simple policy effect using a normal-normal model.
 - Save dataset for use in visualizations
 
 Output:
-    data/processed/bayes_policy_effect.csv
+    data/processed/bayes_policy_effect.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
-def main():
+
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running bayes_posterior_policy_effect.py ...")
 
     rng = np.random.default_rng(2025)
@@ -67,40 +71,38 @@ def main():
     print(f"Posterior sd (tau): {post_sd:.2f}")
 
     # Save data for visualization / analysis
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "bayes_policy_effect.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved Bayesian policy dataset to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "bayes_policy_effect")
+    if out_path is not None:
+        print(f"Saved Bayesian policy dataset to: {out_path.resolve()}")
+    return ModuleResult(
+        df,
+        meta={
+            "tau_true": tau_true,
+            "tau_hat": tau_hat,
+            "prior_mean": mu0,
+            "prior_sd": s0,
+            "post_mean": post_mean,
+            "post_sd": post_sd,
+        },
+        path=out_path,
+    )
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import numpy as np
     import os
 
-    main()
+    result = main()
 
     os.makedirs("bayesian/figures", exist_ok=True)
 
-    # Reconstruct posterior for plotting
-    rng = np.random.default_rng(42)
-    n_control, n_treated = 50, 50
-    mu_control = rng.normal(5.0, 1.5, n_control)
-    mu_treated = rng.normal(7.5, 1.5, n_treated)
-    prior_mean, prior_var = 0.0, 10.0
-    obs_var = 1.5 ** 2
-    n = n_treated
-    obs_mean = mu_treated.mean() - mu_control.mean()
-    post_var  = 1.0 / (1.0 / prior_var + n / obs_var)
-    post_mean = post_var * (prior_mean / prior_var + n * obs_mean / obs_var)
-    post_sd   = np.sqrt(post_var)
+    post_mean, post_sd = result.meta["post_mean"], result.meta["post_sd"]
+    prior_mean, prior_sd = result.meta["prior_mean"], result.meta["prior_sd"]
 
     x = np.linspace(post_mean - 5*post_sd, post_mean + 5*post_sd, 400)
     from scipy.stats import norm
-    prior_pdf    = norm.pdf(x, prior_mean, np.sqrt(prior_var))
+    prior_pdf    = norm.pdf(x, prior_mean, prior_sd)
     posterior_pdf = norm.pdf(x, post_mean, post_sd)
 
     fig, ax = plt.subplots(figsize=(9, 5))
@@ -5,7 +5,7 @@ Simulate a difference-in-differences setup and produce diagnostic plots:
   1. Pre/post outcome trends by treatment group (parallel trends visual)
   2. DiD coefficient plot with confidence interval
 Output:
-    data/processed/did_policy_sim.csv
+    data/processed/did_policy_sim.parquet (and .csv for Tableau)
     causal_inference/figures/did_figure_1.png
     causal_inference/figures/did_figure_2.png
 """
@@ -15,11 +15,16 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import os
+import sys
 from pathlib import Path
 import statsmodels.formula.api as smf
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
+from portfolio.schemas import apply_schema
 
-def main():
+
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running diff_in_diff_policy_evaluation.py ...")
 
     rng = np.random.default_rng(2025)
@@ -42,15 +47,25 @@ def main():
             y     = 20 + alpha_u + trend + tau_true * treat * post + eps
             rows.append({"unit": u, "t": t, "treat": treat, "post": post, "y": y})
 
-    df = pd.DataFrame(rows)
+    df = apply_schema(pd.DataFrame(rows), "did_policy_sim")
 
     model = smf.ols("y ~ treat + post + treat:post", data=df).fit()
     print(model.summary())
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_dir / "did_policy_sim.csv", index=False)
-    print(f"Saved DiD dataset to: {(out_dir / 'did_policy_sim.csv').resolve()}")
+    out_path = sink(df, out_dir, "did_policy_sim")
+    if out_path is not None:
+        print(f"Saved DiD dataset to: {out_path.resolve()}")
+    return ModuleResult(
+        df,
+        models={"ols": model},
+        meta={"tau_true": tau_true, "policy_start": policy_start},
+        path=out_path,
+    )
+
+
+def plot(result: ModuleResult) -> None:
+    df, model = result.data, result.models["ols"]
+    tau_true, policy_start = result.meta["tau_true"], result.meta["policy_start"]
 
     os.makedirs("causal_inference/figures", exist_ok=True)
 
@@ -115,4 +130,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    plot(main())
\ No newline at end of file
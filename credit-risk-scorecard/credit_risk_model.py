@@ -9,51 +9,69 @@ from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val
 from sklearn.metrics import roc_auc_score, roc_curve, confusion_matrix
 from sklearn.preprocessing import StandardScaler
 from sklearn.calibration import calibration_curve
+import sys
 import warnings
+from pathlib import Path
 warnings.filterwarnings('ignore')
 
-np.random.seed(7)
-N = 15000
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.scale import parse_size, stream_dataset
+from portfolio.schemas import apply_schema
+
+SEED = 7
+SIZE = parse_size(15000, "Credit risk scorecard on simulated bureau data")
+N = SIZE.n
 
 # ── 1. SIMULATE CREDIT BUREAU DATA ──────────────────────────────────────────
-age              = np.random.normal(42, 12, N).clip(18, 80).astype(int)
-income_k         = np.random.lognormal(4.0, 0.55, N).clip(15, 500)
-loan_amount_k    = np.random.lognormal(3.2, 0.7, N).clip(1, 100)
-dti              = (loan_amount_k * 12 / (income_k * 1000) * 100).clip(1, 60)
-fico             = np.random.normal(690, 75, N).clip(300, 850).astype(int)
-revolving_util   = np.random.beta(2.5, 5, N) * 100
-num_open_accts   = np.random.poisson(5.5, N).clip(1, 20)
-num_derog        = np.random.poisson(0.4, N).clip(0, 8)
-months_employed  = np.random.exponential(48, N).clip(0, 360).astype(int)
-num_inq_6mo      = np.random.poisson(1.0, N).clip(0, 10)
-home_owner       = np.random.binomial(1, 0.58, N)
-loan_purpose     = np.random.choice(
-    ["debt_consolidation","home_improvement","auto","medical","other"],
-    N, p=[0.38, 0.22, 0.18, 0.10, 0.12])
+def simulate(rng, n, start=0):
+    """n applicants from `rng` (the legacy RandomState, or a block Generator)."""
+    age              = rng.normal(42, 12, n).clip(18, 80).astype(int)
+    income_k         = rng.lognormal(4.0, 0.55, n).clip(15, 500)
+    loan_amount_k    = rng.lognormal(3.2, 0.7, n).clip(1, 100)
+    dti              = (loan_amount_k * 12 / (income_k * 1000) * 100).clip(1, 60)
+    fico             = rng.normal(690, 75, n).clip(300, 850).astype(int)
+    revolving_util   = rng.beta(2.5, 5, n) * 100
+    num_open_accts   = rng.poisson(5.5, n).clip(1, 20)
+    num_derog        = rng.poisson(0.4, n).clip(0, 8)
+    months_employed  = rng.exponential(48, n).clip(0, 360).astype(int)
+    num_inq_6mo      = rng.poisson(1.0, n).clip(0, 10)
+    home_owner       = rng.binomial(1, 0.58, n)
+    loan_purpose     = rng.choice(
+        ["debt_consolidation","home_improvement","auto","medical","other"],
+        n, p=[0.38, 0.22, 0.18, 0.10, 0.12])
+
+    log_odds = (
+        -2.0
+        - 0.80 * (fico - 650) / 100
+        + 0.25 * (dti - 25) / 10
+        + 0.20 * (revolving_util - 30) / 20
+        + 0.60 * num_derog
+        + 0.25 * num_inq_6mo
+        - 0.15 * (income_k - 60) / 30
+        - 0.10 * np.log1p(months_employed)
+        + 0.20 * (loan_amount_k - 15) / 15
+    )
+    default_prob = 1 / (1 + np.exp(-log_odds))
+    default      = rng.binomial(1, default_prob)
+
+    df = pd.DataFrame({
+        "age": age, "income_k": income_k.round(1), "loan_amount_k": loan_amount_k.round(1),
+        "dti": dti.round(1), "fico": fico, "revolving_util": revolving_util.round(1),
+        "num_open_accts": num_open_accts, "num_derog": num_derog,
+        "months_employed": months_employed, "num_inq_6mo": num_inq_6mo,
+        "home_owner": home_owner, "loan_purpose": loan_purpose,
+        "default_prob_true": default_prob.round(4), "default": default,
+    })
+    return apply_schema(df, "credit_applicants")
 
-log_odds = (
-    -2.0
-    - 0.80 * (fico - 650) / 100
-    + 0.25 * (dti - 25) / 10
-    + 0.20 * (revolving_util - 30) / 20
-    + 0.60 * num_derog
-    + 0.25 * num_inq_6mo
-    - 0.15 * (income_k - 60) / 30
-    - 0.10 * np.log1p(months_employed)
-    + 0.20 * (loan_amount_k - 15) / 15
-)
-default_prob = 1 / (1 + np.exp(-log_odds))
-default      = np.random.binomial(1, default_prob)
-print(f"Dataset: {N:,} applicants | Default rate: {default.mean():.1%}")
+if SIZE.chunked:
+    # Load-test mode: stream independent blocks to disk and skip the model.
+    path = stream_dataset(simulate, SIZE, SEED, "credit_applicants")
+    print(f"Streamed {N:,} applicants to {path}")
+    raise SystemExit(0)
 
-df = pd.DataFrame({
-    "age": age, "income_k": income_k.round(1), "loan_amount_k": loan_amount_k.round(1),
-    "dti": dti.round(1), "fico": fico, "revolving_util": revolving_util.round(1),
-    "num_open_accts": num_open_accts, "num_derog": num_derog,
-    "months_employed": months_employed, "num_inq_6mo": num_inq_6mo,
-    "home_owner": home_owner, "loan_purpose": loan_purpose,
-    "default_prob_true": default_prob.round(4), "default": default,
-})
+df = simulate(np.random.RandomState(SEED), N)  # same stream as np.random.seed(7)
+print(f"Dataset: {N:,} applicants | Default rate: {df['default'].mean():.1%}")
 
 # ── 2. WEIGHT OF EVIDENCE ────────────────────────────────────────────────────
 def woe_bin(feature, target, n_bins=10):
@@ -233,7 +251,7 @@ ax9.axis("off")
 summary_lines = [
     ("SCORECARD SUMMARY", True, DARK, 12),("", False, DARK, 4),
     (f"N = {N:,} applicants", False, DARK, 9.5),
-    (f"Default Rate: {default.mean():.1%}", False, DARK, 9.5),("", False, DARK, 4),
+    (f"Default Rate: {df['default'].mean():.1%}", False, DARK, 9.5),("", False, DARK, 4),
     ("Discrimination", True, BLUE, 10),
     (f"Test AUC:    {auc_test:.4f}", False, GREEN, 9.5),
     (f"CV AUC:      {cv_auc.mean():.4f}±{cv_auc.std():.4f}", False, GREEN, 9.5),
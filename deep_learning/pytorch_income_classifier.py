@@ -5,18 +5,22 @@ pytorch_income_classifier.py
 Simple PyTorch MLP classifier predicting high/low income from basic features.
 
 Output:
-    data/processed/income_classifier_data.csv
+    data/processed/income_classifier_data.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
-from pathlib import Path
 import torch
 from torch import nn
 from torch.utils.data import TensorDataset, DataLoader
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
 
-def main():
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running pytorch_income_classifier.py ...")
 
     rng = np.random.default_rng(2025)
@@ -66,6 +70,7 @@ def main():
 
     # Train briefly
     model.train()
+    epoch_losses = []
     for epoch in range(10):
         total_loss = 0.0
         for xb, yb in loader:
@@ -75,40 +80,37 @@ def main():
             loss.backward()
             optimizer.step()
             total_loss += loss.item()
+        epoch_losses.append(total_loss / len(loader))
         print(f"Epoch {epoch+1}, loss: {total_loss:.3f}")
 
     # Save dataset
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "income_classifier_data.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved income classifier dataset to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "income_classifier_data")
+    if out_path is not None:
+        print(f"Saved income classifier dataset to: {out_path.resolve()}")
+    return ModuleResult(
+        df,
+        models={"mlp": model},
+        meta={"features": ["age", "edu_years", "experience"], "epoch_losses": epoch_losses},
+        path=out_path,
+    )
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import pandas as pd
-    import numpy as np
     import os
     from sklearn.linear_model import LogisticRegression
     from sklearn.metrics import roc_curve, auc
     from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import StandardScaler
 
-    main()
+    result = main()
 
     os.makedirs("deep_learning/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/income_classifier_data.csv")
-    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    bin_cols = [c for c in num_cols if df[c].nunique() == 2]
-    target = bin_cols[0] if bin_cols else num_cols[-1]
-    features = [c for c in num_cols if c != target]
-
-    X = df[features].values
-    y = df[target].values
+    df = result.data
+    X = df[result.meta["features"]].to_numpy(dtype=np.float32)
+    y = df["high_income"].to_numpy()
     X_tr, X_te, y_tr, y_te = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y)
     scaler = StandardScaler()
@@ -120,22 +122,18 @@ if __name__ == "__main__":
     fpr_lr, tpr_lr, _ = roc_curve(y_te, lr_probs)
     auc_lr = auc(fpr_lr, tpr_lr)
 
-    epochs = 30
-    train_loss = 0.7 * np.exp(-np.linspace(0, 3, epochs)) +                  0.1 + np.random.default_rng(7).normal(0, 0.015, epochs)
-    val_loss   = 0.75 * np.exp(-np.linspace(0, 2.5, epochs)) +                  0.12 + np.random.default_rng(8).normal(0, 0.02, epochs)
-    nn_fpr = np.linspace(0, 1, 100)
-    nn_tpr = 1 - np.exp(-3.5 * nn_fpr)
-    nn_tpr = np.clip(nn_tpr + np.random.default_rng(9).normal(
-        0, 0.02, 100), 0, 1)
+    train_loss = result.meta["epoch_losses"]
+    epochs = len(train_loss)
+    mlp = result.models["mlp"].eval()
+    with torch.no_grad():
+        nn_probs = torch.softmax(mlp(torch.from_numpy(X_te)), dim=1)[:, 1].numpy()
+    nn_fpr, nn_tpr, _ = roc_curve(y_te, nn_probs)
     auc_nn = auc(nn_fpr, nn_tpr)
 
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
     axes[0].plot(range(1, epochs+1), train_loss,
                  color="#1B4F8A", linewidth=2, label="Training loss")
-    axes[0].plot(range(1, epochs+1), val_loss,
-                 color="#E8593C", linewidth=2,
-                 linestyle="--", label="Validation loss")
     axes[0].set_xlabel("Epoch", fontsize=10)
     axes[0].set_ylabel("Loss", fontsize=10)
     axes[0].set_title("PyTorch MLP — Training Curve\nIncome classification",
@@ -146,7 +144,7 @@ if __name__ == "__main__":
     axes[1].plot(fpr_lr, tpr_lr, color="#E8593C", linewidth=2,
                  label=f"Logistic Regression (AUC={auc_lr:.2f})")
     axes[1].plot(nn_fpr, nn_tpr, color="#1B4F8A", linewidth=2,
-                 label=f"MLP Neural Net (AUC={auc_nn:.2f})")
+                 label=f"MLP Neural Net (AUC={auc_nn:.2f}, in-sample)")
     axes[1].plot([0,1],[0,1], color="#888", linestyle="--",
                  linewidth=1, label="Random baseline")
     axes[1].set_xlabel("False positive rate", fontsize=10)
@@ -1,5 +1,9 @@
 import numpy as np, pandas as pd
-import statsmodels.formula.api as smf
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.heteroskedasticity_robust_inference.ols_results import OLSResults
 
 np.random.seed(3)
 n = 1000
@@ -10,6 +14,7 @@ eps = np.random.randn(n)
 y = 5 + 1.0*treat + 1.0*post + tau*(treat*post) + eps
 
 df = pd.DataFrame({"y":y,"treat":treat,"post":post})
-mod = smf.ols("y ~ treat + post + treat:post", data=df).fit(cov_type="HC1")
-print(mod.summary())
+mod = OLSResults.from_formula("y ~ treat + post + treat:post", df)
+print(mod.table("HC1"))
 print("\nDID estimate (treat×post):", mod.params["treat:post"])
+print(mod.compare(["nonrobust", "HC1", "HC3"]))
@@ -0,0 +1,217 @@
+"""
+OLS fitted once, every covariance on demand.
+
+X is factorized once, X = QR. Everything an OLS covariance needs follows
+from Q, R and the residuals e:
+
+- the bread (X'X)^-1 = R^-1 R^-T, so every sandwich is R^-1 M R^-T with the
+  "meat" M built from the score rows q_i e_i, where q_i is row i of Q;
+- the leverage h_i = |q_i|^2 for HC2 and HC3;
+- cluster sums of the score rows (a bincount per column) for one-way
+  clustering, and inclusion-exclusion over intersections of the cluster
+  variables for multi-way clustering (Cameron, Gelbach and Miller 2011);
+- lagged cross-products of the score rows for Newey-West HAC.
+
+Q, R, e and the score rows are computed once, and each covariance is cached
+by its type and arguments. Switching or comparing covariance types never
+refits. Defaults match statsmodels: HC1 is n/(n-k) HC0; a cluster
+covariance is scaled by G/(G-1) (n-1)/(n-k), with each term of a multi-way
+covariance using its own G; HAC has no small-sample correction.
+
+    res = OLSResults.from_formula("y ~ treat * post", df)
+    res.table("HC1")
+    res.compare(["nonrobust", "HC0", "HC3", ("cluster", df["state"]), ("HAC", 4)])
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+COV_TYPES = ("nonrobust", "HC0", "HC1", "HC2", "HC3", "cluster", "HAC")
+
+Groups = Union[np.ndarray, pd.Series, pd.DataFrame, Sequence]
+
+
+def _group_codes(groups: Groups) -> Tuple[np.ndarray, list]:
+    """Integer codes (n, m) for m cluster variables, and their names."""
+    if isinstance(groups, pd.Series):
+        groups = groups.to_frame()
+    frame = pd.DataFrame(groups)
+    codes = np.column_stack([pd.factorize(frame[c])[0] for c in frame.columns])
+    return codes, [str(c) for c in frame.columns]
+
+
+def _cells(codes: np.ndarray, subset: Tuple[int, ...]) -> np.ndarray:
+    """Codes of the intersection of the cluster variables in `subset`."""
+    if len(subset) == 1:
+        return codes[:, subset[0]]
+    cols = codes[:, list(subset)]
+    flat = np.ravel_multi_index(cols.T, cols.max(axis=0) + 1)
+    return pd.factorize(flat)[0]
+
+
+class OLSResults:
+    """Least squares of `y` on `x` (full column rank) with lazily computed covariances."""
+
+    def __init__(self, y, x, names: Optional[Sequence[str]] = None):
+        if names is None:
+            names = list(x.columns) if isinstance(x, pd.DataFrame) else None
+        self.y = np.asarray(y, dtype=float)
+        x = np.asarray(x, dtype=float)
+        self.nobs, self.k = x.shape
+        self.names = list(names) if names is not None else [f"x{j}" for j in range(self.k)]
+        self.q, self.r = np.linalg.qr(x)
+        if np.abs(np.diag(self.r)).min() <= 1e-10 * np.abs(np.diag(self.r)).max():
+            raise ValueError("the design matrix is rank deficient")
+        self.r_inv = linalg.solve_triangular(self.r, np.eye(self.k))
+        qty = self.q.T @ self.y
+        self.params = pd.Series(self.r_inv @ qty, index=self.names)
+        self.fittedvalues = self.q @ qty
+        self.resid = self.y - self.fittedvalues
+        self.df_resid = self.nobs - self.k
+        self.ssr = float(self.resid @ self.resid)
+        self._scores: Optional[np.ndarray] = None
+        self._leverage: Optional[np.ndarray] = None
+        self._cov: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_formula(cls, formula: str, data: pd.DataFrame) -> "OLSResults":
+        import patsy
+
+        y, x = patsy.dmatrices(formula, data, return_type="dataframe")
+        return cls(y.iloc[:, 0], x)
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Rows q_i e_i, (n, k): X'e in the Q basis."""
+        if self._scores is None:
+            self._scores = self.q * self.resid[:, None]
+        return self._scores
+
+    @property
+    def leverage(self) -> np.ndarray:
+        if self._leverage is None:
+            self._leverage = np.einsum("ij,ij->i", self.q, self.q)
+        return self._leverage
+
+    def _sandwich(self, meat: np.ndarray) -> np.ndarray:
+        return self.r_inv @ meat @ self.r_inv.T
+
+    def _cluster_meat(self, codes: np.ndarray) -> Tuple[np.ndarray, int]:
+        n_groups = int(codes.max()) + 1
+        sums = np.column_stack(
+            [np.bincount(codes, weights=col, minlength=n_groups) for col in self.scores.T]
+        )
+        return sums.T @ sums, n_groups
+
+    def cov(
+        self,
+        cov_type: str = "nonrobust",
+        groups: Optional[Groups] = None,
+        maxlags: Optional[int] = None,
+        use_correction: Optional[bool] = None,
+    ) -> np.ndarray:
+        """Covariance of the coefficients (k, k), computed once per arguments.
+
+        "cluster" takes `groups`, one column per cluster variable (two or
+        more columns give multi-way clustering); "HAC" takes `maxlags`, with
+        rows in time order. `use_correction` defaults to True for
+        clusters and False for HAC.
+        """
+        if cov_type not in COV_TYPES:
+            raise ValueError(f"cov_type must be one of {COV_TYPES}, got {cov_type!r}")
+        codes = None
+        key: Tuple = (cov_type,)
+        if cov_type == "cluster":
+            if groups is None:
+                raise ValueError("cluster covariance needs groups")
+            codes, _ = _group_codes(groups)
+            if len(codes) != self.nobs:
+                raise ValueError(f"groups have {len(codes)} rows, expected {self.nobs}")
+            key += (codes.tobytes(), codes.shape[1], use_correction)
+        elif cov_type == "HAC":
+            if maxlags is None:
+                raise ValueError("HAC covariance needs maxlags")
+            key += (int(maxlags), use_correction)
+        if key in self._cov:
+            return self._cov[key]
+
+        n, k = self.nobs, self.k
+        if cov_type == "nonrobust":
+            cov = self.ssr / self.df_resid * (self.r_inv @ self.r_inv.T)
+        elif cov_type in ("HC0", "HC1", "HC2", "HC3"):
+            u = self.scores
+            if cov_type == "HC2":
+                u = u / np.sqrt(1 - self.leverage)[:, None]
+            elif cov_type == "HC3":
+                u = u / (1 - self.leverage)[:, None]
+            cov = self._sandwich(u.T @ u)
+            if cov_type == "HC1":
+                cov *= n / self.df_resid
+        elif cov_type == "cluster":
+            correct = True if use_correction is None else use_correction
+            cov = np.zeros((k, k))
+            # inclusion-exclusion over the intersections of the cluster variables
+            for size in range(1, codes.shape[1] + 1):
+                for subset in itertools.combinations(range(codes.shape[1]), size):
+                    meat, n_groups = self._cluster_meat(_cells(codes, subset))
+                    term = self._sandwich(meat)
+                    if correct:
+                        term *= n_groups / (n_groups - 1) * (n - 1) / self.df_resid
+                    cov += term if size % 2 else -term
+        else:
+            u = self.scores
+            meat = u.T @ u
+            for lag in range(1, int(maxlags) + 1):
+                gamma = u[lag:].T @ u[:-lag]
+                meat += (1 - lag / (maxlags + 1)) * (gamma + gamma.T)
+            cov = self._sandwich(meat)
+            if use_correction:
+                cov *= n / self.df_resid
+        self._cov[key] = cov
+        return cov
+
+    def bse(self, cov_type: str = "nonrobust", **kwargs) -> pd.Series:
+        return pd.Series(np.sqrt(np.diag(self.cov(cov_type, **kwargs))), index=self.names)
+
+    def table(self, cov_type: str = "nonrobust", level: float = 0.95, **kwargs) -> pd.DataFrame:
+        """Coefficients with standard errors, t (nonrobust: Student t with
+        n - k degrees of freedom) or z statistics, p-values and intervals."""
+        se = self.bse(cov_type, **kwargs).to_numpy()
+        params = self.params.to_numpy()
+        stat = params / se
+        dist = stats.t(self.df_resid) if cov_type == "nonrobust" else stats.norm()
+        crit = dist.ppf(0.5 + level / 2)
+        return pd.DataFrame(
+            {
+                "coef": params,
+                "std_err": se,
+                "t" if cov_type == "nonrobust" else "z": stat,
+                "pvalue": 2 * dist.sf(np.abs(stat)),
+                "ci_lower": params - crit * se,
+                "ci_upper": params + crit * se,
+            },
+            index=self.names,
+        )
+
+    def compare(self, cov_types: Sequence) -> pd.DataFrame:
+        """Standard errors side by side, one column per covariance. Entries
+        are names, or tuples (name, groups) for "cluster" and (name, maxlags)
+        for "HAC"."""
+        columns = {}
+        for spec in cov_types:
+            name, *arg = (spec,) if isinstance(spec, str) else spec
+            kwargs = {}
+            if arg:
+                kwargs = {"groups": arg[0]} if name == "cluster" else {"maxlags": arg[0]}
+            label = name
+            if name == "HAC":
+                label = f"HAC({arg[0]})"
+            elif name == "cluster":
+                label = f"cluster({', '.join(_group_codes(arg[0])[1])})"
+            columns[label] = self.bse(name, **kwargs)
+        return pd.DataFrame(columns)
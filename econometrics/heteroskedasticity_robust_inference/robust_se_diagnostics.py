@@ -2,6 +2,11 @@ import numpy as np, pandas as pd
 import statsmodels.api as sm
 from statsmodels.stats.diagnostic import het_breuschpagan
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.heteroskedasticity_robust_inference.ols_results import OLSResults
 
 np.random.seed(6)
 n = 1200
@@ -12,12 +17,16 @@ eps = np.random.randn(n)*sigma
 y = 2 + 1.5*x1 + 0.2*x2 + eps
 
 X = sm.add_constant(np.c_[x1,x2])
-ols = sm.OLS(y, X).fit()
+# one QR factorization; every covariance below reuses it (ols_results.py)
+ols = OLSResults(y, X, names=["const", "x1", "x2"])
 print("=== OLS (naive) ===")
-print(ols.summary())
+print(ols.table("nonrobust"))
 
 print("\n=== OLS (HC1 robust) ===")
-print(ols.get_robustcov_results(cov_type="HC1").summary())
+print(ols.table("HC1"))
+
+print("\n=== Standard errors by covariance type ===")
+print(ols.compare(["nonrobust", "HC0", "HC1", "HC2", "HC3", ("HAC", 4)]))
 
 # BP test
 bp = het_breuschpagan(ols.resid, X)
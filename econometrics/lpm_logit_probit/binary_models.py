@@ -1,6 +1,11 @@
 import numpy as np, pandas as pd
 import statsmodels.api as sm
 from statsmodels.discrete.discrete_model import Logit, Probit
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.heteroskedasticity_robust_inference.ols_results import OLSResults
 
 np.random.seed(0)
 n = 2000
@@ -14,9 +19,9 @@ df = pd.DataFrame({"y": y, "x1": x1, "x2": x2})
 X = sm.add_constant(df[["x1","x2"]])
 
 # LPM
-lpm = sm.OLS(df["y"], X).fit(cov_type="HC1")
+lpm = OLSResults(df["y"], X)
 print("=== LPM (HC1 robust) ===")
-print(lpm.summary())
+print(lpm.table("HC1"))
 
 # Logit
 logit = Logit(df["y"], X).fit(disp=False)
@@ -0,0 +1,272 @@
+"""
+Absorb one or more fixed effects by alternating projections.
+
+Instead of adding a dummy per unit (or per patient, or per period), each
+variable is replaced by its within-transformed residual: the group means of
+every fixed-effect dimension are subtracted in turn, repeated until nothing
+more changes. Group means are `np.bincount(codes, weights=col) / counts` on
+integer group codes, so one sweep is O(rows) per column and memory stays at
+one copy of the data. A single effect takes one sweep. With several, plain
+alternating projections converge slowly when groups are poorly connected,
+so the sweeps are accelerated: by conjugate gradients (default) or by
+Irons-Tuck extrapolation (method="ap").
+
+The transformed columns feed any downstream estimator: OLS on them gives
+the fixed-effects slopes (Frisch-Waugh-Lovell), and iv_engine uses the same
+routine for absorbed IV.
+
+    out = absorb(df, ["y", "x"], fe=["unit", "time"])
+    beta = np.linalg.lstsq(out.data[["x"]], out.data["y"], rcond=None)[0]
+
+    python econometrics/panel_fixed_random/fe_absorb.py --units 300000 --periods 10
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+Columns = Union[str, Sequence[str]]
+
+
+def group_codes(data: pd.DataFrame, fe: Columns) -> List[np.ndarray]:
+    """Integer codes 0..G-1 for each fixed-effect column."""
+    fe = [fe] if isinstance(fe, str) else list(fe)
+    return [pd.factorize(data[col])[0].astype(np.intp) for col in fe]
+
+
+METHODS = ("cg", "ap")
+
+
+def _sweep(col: np.ndarray, groups: Sequence[np.ndarray], counts: Sequence[np.ndarray]) -> float:
+    """One alternating-projection sweep in place; returns the largest mean removed."""
+    largest = 0.0
+    for g, c in zip(groups, counts):
+        means = np.bincount(g, weights=col, minlength=len(c)) / c
+        col -= means[g]
+        largest = max(largest, np.abs(means).max())
+    return largest
+
+
+def _demean_ap(
+    col: np.ndarray,
+    groups: Sequence[np.ndarray],
+    counts: Sequence[np.ndarray],
+    bound: float,
+    max_iter: int,
+) -> Tuple[int, bool]:
+    """Alternating projections, extrapolated every two sweeps (Irons-Tuck)."""
+    sweeps = 0
+    while sweeps < max_iter:
+        x0 = col.copy()
+        _sweep(col, groups, counts)
+        x1 = col.copy()
+        moved = _sweep(col, groups, counts)
+        sweeps += 2
+        if moved <= bound:
+            return sweeps, True
+        d2 = col - x1
+        dd = d2 - (x1 - x0)
+        denom = dd @ dd
+        if denom > 0:
+            col -= (d2 @ dd / denom) * d2
+    return sweeps, False
+
+
+def _demean_cg(
+    col: np.ndarray,
+    groups: Sequence[np.ndarray],
+    counts: Sequence[np.ndarray],
+    bound: float,
+    max_iter: int,
+) -> Tuple[int, bool]:
+    """Conjugate gradients on the normal equations of the effects, D'D theta = D'col.
+
+    Preconditioned by the group sizes, so each step's search direction is the
+    vector of group means of the current residual: the same bincount pass as
+    a projection sweep, but combined across steps so that convergence takes
+    about the square root of the sweeps on poorly connected designs.
+    """
+
+    def group_means(v: np.ndarray) -> List[np.ndarray]:
+        return [np.bincount(g, weights=v, minlength=len(c)) / c for g, c in zip(groups, counts)]
+
+    def expand(theta: Sequence[np.ndarray]) -> np.ndarray:
+        out = theta[0][groups[0]]
+        for g, t in zip(groups[1:], theta[1:]):
+            out += t[g]
+        return out
+
+    z = group_means(col)
+    direction = [m.copy() for m in z]
+    rz = sum((m * c) @ m for m, c in zip(z, counts))
+    for step in range(1, max_iter + 1):
+        if max(np.abs(m).max() for m in z) <= bound:
+            return step, True
+        q = expand(direction)
+        alpha = rz / (q @ q)
+        col -= alpha * q  # col stays the residual y - D theta
+        z = group_means(col)
+        rz_new = sum((m * c) @ m for m, c in zip(z, counts))
+        direction = [m + (rz_new / rz) * d for m, d in zip(z, direction)]
+        rz = rz_new
+    return max_iter, False
+
+
+def demean(
+    mat: np.ndarray,
+    groups: Sequence[np.ndarray],
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+    method: str = "cg",
+) -> Tuple[int, bool]:
+    """Sweep the group means of every fixed effect out of `mat`'s columns, in place.
+
+    `mat` is float64, ideally Fortran-ordered so columns are contiguous. One
+    effect takes a single sweep. With several, method="ap" runs alternating
+    projections with Irons-Tuck extrapolation and "cg" (default) the
+    conjugate-gradient form of the same projections, several times faster
+    when groups are poorly connected (workers moving between firms). A
+    column has converged when no group mean of its residual exceeds `tol`
+    times its standard deviation. Returns (iterations for the slowest
+    column, converged).
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    counts = [np.bincount(g) for g in groups]
+    solve = _demean_cg if method == "cg" else _demean_ap
+    most, converged = 0, True
+    for j in range(mat.shape[1]):
+        col = mat[:, j]
+        bound = tol * max(col.std(), np.finfo(float).tiny)
+        if len(groups) == 1:
+            _sweep(col, groups, counts)
+            its, ok = 1, True
+        else:
+            its, ok = solve(col, groups, counts, bound, max_iter)
+        most, converged = max(most, its), converged and ok
+    if not converged:
+        warnings.warn(f"fixed effects not absorbed to tol={tol} in {max_iter} steps", stacklevel=2)
+    return most, converged
+
+
+def absorbed_df(groups: Sequence[np.ndarray]) -> int:
+    """Degrees of freedom the effects use: all levels less the redundant ones.
+
+    Exact for one or two effects (two-way redundancy is the number of
+    connected components of the bipartite group graph); for three or more
+    it assumes one redundancy per extra effect.
+    """
+    levels = [int(g.max()) + 1 for g in groups]
+    if len(groups) == 2:
+        a, b = groups
+        graph = sparse.coo_matrix((np.ones(len(a)), (a, b)), shape=tuple(levels))
+        n_components, _ = connected_components(sparse.bmat([[None, graph], [graph.T, None]]))
+        return sum(levels) - n_components
+    return sum(levels) - max(len(groups) - 1, 0)
+
+
+def singletons(groups: Sequence[np.ndarray]) -> np.ndarray:
+    """Rows alone in their group in some dimension; they are fitted exactly,
+    carry no within variation and inflate cluster counts. Repeats until none
+    are left, since dropping rows can create new singletons."""
+    keep = np.ones(len(groups[0]), dtype=bool)
+    while True:
+        drop = np.zeros_like(keep)
+        for g in groups:
+            counts = np.bincount(g[keep], minlength=int(g.max()) + 1)
+            drop |= keep & (counts[g] == 1)
+        if not drop.any():
+            return ~keep
+        keep &= ~drop
+
+
+@dataclass
+class Absorbed:
+    """Within-transformed columns and what it took to get them."""
+
+    data: pd.DataFrame
+    sweeps: int  # iterations of the slowest column
+    converged: bool
+    df_absorbed: int  # parameters the fixed effects used up
+    n_groups: Dict[str, int] = field(default_factory=dict)
+    dropped_singletons: int = 0
+
+
+def absorb(
+    data: pd.DataFrame,
+    columns: Columns,
+    fe: Columns,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+    drop_singletons: bool = False,
+    method: str = "cg",
+) -> Absorbed:
+    """Sweep the `fe` effects out of `columns` (rows with missing values dropped).
+
+    `method` is "cg" or "ap", as in `demean`.
+    The result keeps `data`'s index for the rows used, so it lines up with
+    any other column of `data`, e.g. cluster identifiers.
+    """
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    fe_cols = [fe] if isinstance(fe, str) else list(fe)
+    frame = data[list(dict.fromkeys([*columns, *fe_cols]))]
+    if frame.isna().to_numpy().any():
+        frame = frame.dropna()
+    groups = group_codes(frame, fe_cols)
+    dropped = 0
+    if drop_singletons:
+        mask = singletons(groups)
+        dropped = int(mask.sum())
+        if dropped:
+            frame = frame[~mask]
+            groups = group_codes(frame, fe_cols)
+    mat = np.array(frame[columns].to_numpy(dtype=float), order="F")  # own, writable copy
+    sweeps, converged = demean(mat, groups, tol=tol, max_iter=max_iter, method=method)
+    return Absorbed(
+        data=pd.DataFrame(mat, index=frame.index, columns=columns),
+        sweeps=sweeps,
+        converged=converged,
+        df_absorbed=absorbed_df(groups),
+        n_groups={col: int(g.max()) + 1 for col, g in zip(fe_cols, groups)},
+        dropped_singletons=dropped,
+    )
+
+
+def simulate(rng: np.random.Generator, units: int, periods: int) -> pd.DataFrame:
+    """Unbalanced two-way panel (about 10% of unit-periods missing); slope 1.5."""
+    unit = np.repeat(np.arange(units), periods)
+    time_ = np.tile(np.arange(periods), units)
+    keep = rng.random(units * periods) > 0.1
+    unit, time_ = unit[keep], time_[keep]
+    alpha = rng.normal(size=units)[unit]
+    gamma = rng.normal(size=periods)[time_]
+    x = rng.normal(size=len(unit)) + 0.5 * alpha + 0.3 * gamma
+    y = 1.0 + 1.5 * x + alpha + gamma + rng.normal(size=len(unit))
+    return pd.DataFrame({"unit": unit, "time": time_, "x": x, "y": y})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time two-way fixed-effect absorption.")
+    ap.add_argument("--units", type=int, default=300_000)
+    ap.add_argument("--periods", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args, _ = ap.parse_known_args()
+
+    df = simulate(np.random.default_rng(args.seed), args.units, args.periods)
+    t0 = time.perf_counter()
+    out = absorb(df, ["y", "x"], fe=["unit", "time"])
+    elapsed = time.perf_counter() - t0
+    slope = float(out.data["x"] @ out.data["y"] / (out.data["x"] @ out.data["x"]))
+    print(
+        f"{len(df):,} rows, {out.n_groups['unit']:,} units x {out.n_groups['time']} periods: "
+        f"absorbed in {elapsed:.2f} s ({out.sweeps} iterations, converged={out.converged})"
+    )
+    print(f"two-way FE slope on x: {slope:.4f} (true 1.5); df absorbed {out.df_absorbed:,}")
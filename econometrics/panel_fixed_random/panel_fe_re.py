@@ -1,6 +1,12 @@
 import numpy as np, pandas as pd
 from linearmodels.panel import PanelOLS, RandomEffects
 import statsmodels.api as sm
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.panel_fixed_random.fe_absorb import absorb
+from econometrics.panel_fixed_random.panel_suffstats import EntityStats
 
 np.random.seed(2)
 N, T = 200, 8
@@ -22,6 +28,10 @@ fe = PanelOLS(df["y"], exog, entity_effects=True).fit(cov_type="clustered", clus
 print("=== Fixed Effects ===")
 print(fe.summary)
 
+# Same slope by sweeping out unit effects (fe_absorb.py), no dummies or panel index
+within = absorb(df.reset_index(), ["y", "x"], fe="unit").data
+print("Within slope by absorption:", within["x"] @ within["y"] / (within["x"] @ within["x"]))
+
 # RE
 re = RandomEffects(df["y"], exog).fit()
 print("\n=== Random Effects ===")
@@ -34,3 +44,10 @@ cov_diff = fe.cov - re.cov
 diff = (b_fe - b_re).dropna()
 stat = float(diff.T @ np.linalg.pinv(cov_diff.loc[diff.index, diff.index]) @ diff)
 print("\nHausman stat (approx):", stat)
+
+# FE, BE, RE and both Hausman tests from one pass of per-unit sums (panel_suffstats.py)
+one_pass = EntityStats.from_frame(df.reset_index(), "unit", "y", "x").fit()
+print("\n=== One pass: between / within / random ===")
+print(one_pass.params.round(4))
+print("Hausman:", one_pass.hausman)
+print("Mundlak (cluster-robust):", one_pass.mundlak)
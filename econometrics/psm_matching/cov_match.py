@@ -0,0 +1,234 @@
+"""
+Mahalanobis covariate matching within exact-match blocks.
+
+Units are first split into blocks that agree exactly on the `exact`
+covariates (region, sex, cohort, ...); matches are only sought inside a
+block. The continuous covariates are whitened once with the Cholesky
+factor of their pooled covariance, so Euclidean distance on the whitened
+values is the Mahalanobis distance and every block can use an ordinary
+tree index: a KD-tree (scipy) or a ball tree (sklearn) per arm per block.
+Blocks are independent, so they are handed out in batches to worker
+processes; each batch builds its trees, finds the k nearest units of the
+other arm for every source unit and the `var_matches` nearest of its own
+arm for the variance, and sends back only indices and distances.
+
+The estimator is Abadie and Imbens': ATT, ATC or ATE with replacement, the
+bias correction of Abadie-Imbens (2011) (a linear regression of the
+outcome on the covariates in the matched arm, weighted by how often each
+unit is used, adjusts every match for its covariate gap), and the
+Abadie-Imbens (2006) standard error shared with ps_match.
+
+    res = covariate_match(df, "t", "y", ["x1", "x2"], exact=["region"], k=2, jobs=8)
+    res.estimate, res.std_error, res.weights
+
+    python econometrics/psm_matching/cov_match.py --n 2000000 --blocks 500 --jobs 8
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from sklearn.neighbors import BallTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.psm_matching.ps_match import ESTIMANDS, MatchResult, _estimate
+
+TREES = ("kd", "ball")
+
+
+def _query(tree: str, points: np.ndarray, queries: np.ndarray, k: int):
+    """Distances and indices of the k nearest `points` to each query, (len(queries), k)."""
+    if tree == "kd":
+        dist, idx = cKDTree(points).query(queries, k=k)
+        return dist.reshape(len(queries), k), idx.reshape(len(queries), k)
+    return BallTree(points).query(queries, k=k)
+
+
+def _match_batch(
+    z: np.ndarray,
+    y: np.ndarray,
+    treated: np.ndarray,
+    bounds: np.ndarray,
+    source_arms: Tuple[bool, ...],
+    k: int,
+    var_matches: int,
+    tree: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Match within each block [bounds[i], bounds[i + 1]) of a batch of rows.
+
+    Returns pairs (unit, match, distance) as row positions in the batch and
+    the conditional variance of every row (nan where its arm has a single
+    unit in the block)."""
+    a: List[np.ndarray] = []
+    b: List[np.ndarray] = []
+    dist: List[np.ndarray] = []
+    sigma2 = np.full(len(y), np.nan)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        arms = {arm: lo + np.flatnonzero(treated[lo:hi] == arm) for arm in (True, False)}
+        for arm, rows in arms.items():
+            # conditional variance: the unit against its nearest units of the same arm
+            j = min(var_matches, len(rows) - 1)
+            if j > 0:
+                _, idx = _query(tree, z[rows], z[rows], j + 1)
+                keep = idx != np.arange(len(rows))[:, None]
+                keep[keep.all(axis=1), j] = False  # self not found among duplicates
+                near = np.where(keep, y[rows][idx], 0.0).sum(axis=1) / j
+                sigma2[rows] = j / (j + 1) * (y[rows] - near) ** 2
+            targets = arms[not arm]
+            if arm not in source_arms or len(targets) == 0:
+                continue
+            kk = min(k, len(targets))
+            d, idx = _query(tree, z[targets], z[rows], kk)
+            a.append(np.repeat(rows, kk))
+            b.append(targets[idx.ravel()])
+            dist.append(d.ravel())
+    if not a:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0), sigma2
+    return np.concatenate(a), np.concatenate(b), np.concatenate(dist), sigma2
+
+
+def _batches(starts: np.ndarray, n: int, size: int) -> List[np.ndarray]:
+    """Group consecutive blocks (starting at `starts`) into batches of about
+    `size` rows; each batch is given by its block boundaries."""
+    bounds = np.append(starts, n)
+    out, first = [], 0
+    for i in range(1, len(bounds)):
+        if bounds[i] - bounds[first] >= size or i == len(bounds) - 1:
+            out.append(bounds[first : i + 1])
+            first = i
+    return out
+
+
+def covariate_match(
+    data: pd.DataFrame,
+    treatment: str,
+    outcome: str,
+    covariates: Sequence[str],
+    exact: Sequence[str] = (),
+    estimand: str = "ATT",
+    k: int = 1,
+    caliper: Optional[float] = None,
+    bias_adjust: bool = True,
+    var_matches: int = 2,
+    tree: str = "kd",
+    jobs: int = 1,
+) -> MatchResult:
+    """Match with replacement on the Mahalanobis distance over `covariates`,
+    exactly on `exact`, and average the (bias-corrected) matched differences.
+
+    `k` matches per unit, none farther than `caliper` (Mahalanobis units);
+    units with no match in their block are dropped from the estimand. Blocks
+    are matched across `jobs` processes. Where an arm has a single unit in a
+    block its conditional variance is the arm's average. Rows with missing
+    values are dropped.
+    """
+    if estimand not in ESTIMANDS:
+        raise ValueError(f"estimand must be one of {ESTIMANDS}, got {estimand!r}")
+    if tree not in TREES:
+        raise ValueError(f"tree must be one of {TREES}, got {tree!r}")
+    covariates, exact = list(covariates), list(exact)
+    frame = data[[treatment, outcome, *covariates, *exact]].dropna()
+    if exact:
+        codes = frame.groupby(exact, sort=False, observed=True).ngroup().to_numpy()
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    else:
+        order, starts = np.arange(len(frame)), np.array([0])
+    index, frame = frame.index, frame.iloc[order]
+    treated = frame[treatment].to_numpy() == 1
+    y = frame[outcome].to_numpy(dtype=float)
+    x = frame[covariates].to_numpy(dtype=float)
+    chol = np.linalg.cholesky(np.atleast_2d(np.cov(x, rowvar=False)))
+    z = np.linalg.solve(chol, (x - x.mean(axis=0)).T).T  # |z_i - z_j| is Mahalanobis
+    source_arms = {"ATT": (True,), "ATC": (False,), "ATE": (True, False)}[estimand]
+
+    n = len(y)
+    batches = _batches(starts, n, max(n // (4 * jobs), 1) if jobs > 1 else n)
+    args = [
+        (z[bd[0] : bd[-1]], y[bd[0] : bd[-1]], treated[bd[0] : bd[-1]], bd - bd[0])
+        for bd in batches
+    ]
+    work = partial(_match_batch, source_arms=source_arms, k=k, var_matches=var_matches, tree=tree)
+    if jobs > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            results = list(pool.map(work, *zip(*args)))
+    else:
+        results = [work(*arg) for arg in args]
+    a = np.concatenate([res[0] + bd[0] for res, bd in zip(results, batches)])
+    b = np.concatenate([res[1] + bd[0] for res, bd in zip(results, batches)])
+    dist = np.concatenate([res[2] for res in results])
+    sigma2 = np.concatenate([res[3] for res in results])
+    if caliper is not None:
+        ok = dist <= caliper
+        a, b, dist = a[ok], b[ok], dist[ok]
+    for arm in (treated, ~treated):
+        sigma2[arm & np.isnan(sigma2)] = np.nanmean(sigma2[arm]) if arm.sum() > 1 else 0.0
+
+    adjust = None
+    if bias_adjust and len(a):
+        # mu(x) fitted in the matched arm, weighted by how often each unit is used
+        adjust = np.empty(len(a))
+        uses = np.bincount(b, weights=1.0 / np.bincount(a, minlength=n)[a], minlength=n)
+        design = np.column_stack([np.ones(n), x])
+        for arm in (treated, ~treated):
+            fit = arm & (uses > 0)
+            root = np.sqrt(uses[fit])
+            beta = np.linalg.lstsq(design[fit] * root[:, None], y[fit] * root, rcond=None)[0]
+            in_arm = arm[b]
+            adjust[in_arm] = (x[a[in_arm]] - x[b[in_arm]]) @ beta[1:]
+
+    n_sources = int(sum((treated == arm).sum() for arm in source_arms))
+    res = _estimate(frame.index, treated, y, a, b, dist, sigma2, estimand, n_sources, adjust)
+    res.weights = res.weights.reindex(index)  # back in data order
+    return res
+
+
+def simulate_blocked(rng: np.random.Generator, n: int, blocks: int = 100) -> pd.DataFrame:
+    """psm_demo.py's covariates plus a categorical `region` that shifts both
+    the treatment probability and the outcome; the effect is 1.5 everywhere."""
+    x1, x2 = rng.normal(size=n), rng.normal(size=n)
+    region = rng.integers(0, blocks, n)
+    shift = rng.normal(size=blocks)
+    ps = 1 / (1 + np.exp(-(-1.3 + 0.5 * x1 + 0.8 * x2 + 0.5 * shift[region])))
+    t = rng.binomial(1, ps)
+    y = 3 + 1.0 * x1 + 0.5 * x2 + shift[region] + 1.5 * t + 0.5 * rng.normal(size=n)
+    return pd.DataFrame({"y": y, "t": t, "x1": x1, "x2": x2, "region": region})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time blocked Mahalanobis matching.")
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--blocks", type=int, default=200)
+    ap.add_argument("--jobs", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    args, _ = ap.parse_known_args()
+
+    df = simulate_blocked(np.random.default_rng(args.seed), args.n, args.blocks)
+    configs = [
+        ("ATT, 1:1, ignoring region", dict(bias_adjust=False), 1),
+        ("ATT, 1:1, blocked", dict(exact=["region"]), 1),
+        ("ATT, 1:1, blocked", dict(exact=["region"]), args.jobs),
+        (
+            "ATE, 4:1, blocked, ball tree",
+            dict(exact=["region"], estimand="ATE", k=4, tree="ball"),
+            args.jobs,
+        ),
+    ]
+    print(f"{args.n:,} units in {args.blocks} regions, true effect 1.5")
+    for label, kwargs, jobs in configs:
+        t0 = time.perf_counter()
+        res = covariate_match(df, "t", "y", ["x1", "x2"], jobs=jobs, **kwargs)
+        lo, hi = res.conf_int()
+        print(
+            f"{label:<30} jobs={jobs:<3} {res.estimate:.4f} [{lo:.4f}, {hi:.4f}]  "
+            f"{time.perf_counter() - t0:.2f} s"
+        )
@@ -0,0 +1,351 @@
+"""
+Double/debiased machine learning (Chernozhukov et al. 2018).
+
+Two models of a treatment d's effect on an outcome y given covariates x:
+
+- partially linear (PLR): y = theta d + g(x) + e. Nuisances l(x) = E[y | x]
+  and m(x) = E[d | x]; theta regresses y - l(x) on d - m(x)
+  ("partialling out");
+- interactive (IRM), binary d: nuisances g_0(x), g_1(x) = E[y | d, x] and
+  the propensity m(x); the doubly robust score for the ATE or the ATT
+  ("ATTE").
+
+Nuisances are cross-fitted: for each of `reps` random K-fold splits every
+nuisance is fitted on K - 1 folds and predicted on the held-out fold. The
+reps x nuisances x folds fits are independent and run across `jobs`
+processes; each worker receives the data once, when it starts. Each split
+gives its own theta_s and sigma_s, aggregated by the median rule:
+theta = median theta_s, sigma^2 = median(sigma_s^2 + (theta_s - theta)^2).
+
+Out-of-fold predictions are cached, keyed by a hash of the data, the
+nuisance, the learner's parameters and the split. Switching between PLR
+and IRM (m is shared), ATE and ATTE, or the propensity clipping only
+recomputes the final-stage score. Caching is opt-in: pass an OOFCache,
+in memory or backed by a directory to persist across sessions; without one
+every call refits.
+
+Learners are scikit-learn estimators or one of the names in LEARNERS:
+"ridge", "lasso", "forest", "boosting" (a regressor for outcomes and for a
+continuous d, the matching classifier for a binary d).
+
+    dml = DML(df, "y", "d", covariates, learner="boosting", reps=5, jobs=8, cache=OOFCache())
+    dml.plr().conf_int()
+    dml.irm("ATTE")                 # reuses m(x) from plr(), fits only g_0(x)
+
+    python econometrics/psm_matching/dml.py --n 100000 --learner forest --jobs 4
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+from sklearn.ensemble import (
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import LassoCV, LogisticRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.inference import NormalInterval
+
+FOREST = dict(n_estimators=100, min_samples_leaf=5, max_features=0.5, random_state=0)
+
+
+def _l1_logit(**params) -> LogisticRegression:
+    """L1-penalized logistic regression on any supported scikit-learn: from 1.8
+    `penalty` is deprecated and l1_ratio=1 selects L1; before, l1_ratio is
+    ignored unless penalty="elasticnet", so L1 must be asked for by name."""
+    if tuple(int(v) for v in sklearn.__version__.split(".")[:2]) >= (1, 8):
+        return LogisticRegression(l1_ratio=1.0, **params)
+    return LogisticRegression(penalty="l1", **params)
+
+
+# name: (regressor, classifier)
+LEARNERS = {
+    "ridge": (
+        make_pipeline(StandardScaler(), Ridge(alpha=1.0)),
+        make_pipeline(StandardScaler(), LogisticRegression(C=1.0)),
+    ),
+    "lasso": (
+        make_pipeline(StandardScaler(), LassoCV(cv=3)),
+        make_pipeline(StandardScaler(), _l1_logit(C=0.1, solver="liblinear")),
+    ),
+    "forest": (RandomForestRegressor(**FOREST), RandomForestClassifier(**FOREST)),
+    "boosting": (
+        HistGradientBoostingRegressor(random_state=0),
+        HistGradientBoostingClassifier(random_state=0),
+    ),
+}
+IRM_SCORES = ("ATE", "ATTE")
+
+Learner = Union[str, object]
+
+
+@dataclass
+class DMLResult(NormalInterval):
+    """A DML estimate aggregated over sample splits by the median rule."""
+
+    estimate: float
+    std_error: float
+    model: str  # "PLR" or "IRM"
+    score: str
+    splits: np.ndarray  # theta_s of every repetition
+    split_std_errors: np.ndarray
+    n: int
+
+
+class OOFCache:
+    """Out-of-fold predictions by key, in memory and optionally as .npy files."""
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        self.directory = Path(directory) if directory is not None else None
+        self.entries: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key: str) -> Optional[Path]:
+        return self.directory / f"{key}.npy" if self.directory is not None else None
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        found = self.entries.get(key)
+        path = self._file(key)
+        if found is None and path is not None and path.exists():
+            found = self.entries[key] = np.load(path)
+        if found is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return found
+
+    def put(self, key: str, values: np.ndarray) -> None:
+        self.entries[key] = values
+        path = self._file(key)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(path, values)
+
+
+def _learner_key(learner) -> str:
+    """The learner's class and parameters, stable across sessions."""
+    params = sorted(learner.get_params(deep=True).items())
+    return f"{type(learner).__name__}{[(k, v if np.isscalar(v) else repr(v)) for k, v in params]}"
+
+
+def _fold_ids(n: int, folds: int, seed: int, rep: int) -> np.ndarray:
+    """Fold of every unit in split `rep`: a random permutation dealt round-robin."""
+    ids = np.empty(n, dtype=np.int64)
+    ids[np.random.default_rng([seed, rep]).permutation(n)] = np.arange(n) % folds
+    return ids
+
+
+_WORKER: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(x: np.ndarray, y: np.ndarray, d: np.ndarray) -> None:
+    _WORKER.update(x=x, y=y, d=d)
+
+
+def _fit_fold(task: Tuple) -> np.ndarray:
+    """Fit one nuisance on the training folds of one split and predict the held-out fold."""
+    learner, target, arm, folds, seed, rep, fold = task
+    x, y, d = _WORKER["x"], _WORKER["y"], _WORKER["d"]
+    ids = _fold_ids(len(x), folds, seed, rep)
+    train = ids != fold
+    if arm is not None:  # g_0 / g_1: the outcome within one treatment arm
+        train &= d == arm
+    values = y if target == "y" else d
+    fitted = clone(learner).fit(x[train], values[train])
+    test = x[ids == fold]
+    if hasattr(fitted, "predict_proba"):
+        return fitted.predict_proba(test)[:, 1]
+    return fitted.predict(test)
+
+
+def _median_rule(thetas: np.ndarray, ses: np.ndarray) -> Tuple[float, float]:
+    theta = float(np.median(thetas))
+    return theta, float(np.sqrt(np.median(ses**2 + (thetas - theta) ** 2)))
+
+
+class DML:
+    """Cross-fitted nuisances for one outcome, treatment and covariate set.
+
+    `learner` fits the outcome nuisances, `treatment_learner` (default: the
+    same kind) fits m(x); a name from LEARNERS picks a classifier for a
+    binary treatment. `cache` keeps out-of-fold predictions for reuse across
+    calls and instances; without one every call refits. Rows with missing
+    values are dropped.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        outcome: str,
+        treatment: str,
+        covariates: Sequence[str],
+        learner: Learner = "ridge",
+        treatment_learner: Optional[Learner] = None,
+        folds: int = 5,
+        reps: int = 1,
+        seed: int = 0,
+        jobs: int = 1,
+        cache: Optional[OOFCache] = None,
+    ):
+        frame = data[[outcome, treatment, *covariates]].dropna()
+        self.y = frame[outcome].to_numpy(dtype=float)
+        self.d = frame[treatment].to_numpy(dtype=float)
+        self.x = frame[list(covariates)].to_numpy(dtype=float)
+        self.n = len(self.y)
+        self.binary = bool(np.isin(self.d, (0.0, 1.0)).all())
+        self.learner = self._resolve(learner, classifier=False)
+        self.treatment_learner = self._resolve(
+            treatment_learner if treatment_learner is not None else learner, self.binary
+        )
+        self.folds, self.reps, self.seed, self.jobs = folds, reps, seed, jobs
+        self.cache = cache
+        digest = hashlib.sha256()
+        for name, values in (("y", self.y), ("d", self.d), ("x", self.x)):
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(values).tobytes())
+        self.data_hash = digest.hexdigest()
+
+    @staticmethod
+    def _resolve(learner: Learner, classifier: bool):
+        if isinstance(learner, str):
+            if learner not in LEARNERS:
+                raise ValueError(f"learner must be one of {tuple(LEARNERS)} or an estimator")
+            return LEARNERS[learner][int(classifier)]
+        return learner
+
+    def _key(self, nuisance: str, learner, rep: int) -> str:
+        spec = f"{self.data_hash}|{nuisance}|{_learner_key(learner)}|{self.folds}|{self.seed}|{rep}"
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def predictions(self, nuisances: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Out-of-fold predictions, (reps, n) per nuisance ("l", "m", "g0",
+        "g1"); cached ones are reused, the missing folds fitted in parallel."""
+        spec = {
+            "l": (self.learner, "y", None),
+            "m": (self.treatment_learner, "d", None),
+            "g0": (self.learner, "y", 0.0),
+            "g1": (self.learner, "y", 1.0),
+        }
+        out = {name: np.empty((self.reps, self.n)) for name in nuisances}
+        todo: List[Tuple[str, int]] = []
+        for name in nuisances:
+            for rep in range(self.reps):
+                key = self._key(name, spec[name][0], rep)
+                found = self.cache.get(key) if self.cache is not None else None
+                if found is None:
+                    todo.append((name, rep))
+                else:
+                    out[name][rep] = found
+        tasks = [(*spec[name], self.folds, self.seed, rep, fold) for name, rep in todo
+                 for fold in range(self.folds)]  # fmt: skip
+        if self.jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(
+                self.jobs, initializer=_init_worker, initargs=(self.x, self.y, self.d)
+            ) as pool:
+                fitted = list(pool.map(_fit_fold, tasks))
+        else:
+            _init_worker(self.x, self.y, self.d)
+            fitted = [_fit_fold(task) for task in tasks]
+            _WORKER.clear()
+        for i, (name, rep) in enumerate(todo):
+            ids = _fold_ids(self.n, self.folds, self.seed, rep)
+            for fold in range(self.folds):
+                out[name][rep, ids == fold] = fitted[i * self.folds + fold]
+            if self.cache is not None:
+                self.cache.put(self._key(name, spec[name][0], rep), out[name][rep].copy())
+        return out
+
+    def plr(self) -> DMLResult:
+        """Partially linear model, partialling-out score."""
+        pred = self.predictions(["l", "m"])
+        u = self.y - pred["l"]  # (reps, n)
+        v = self.d - pred["m"]
+        thetas = (u * v).sum(axis=1) / (v * v).sum(axis=1)
+        psi = (u - thetas[:, None] * v) * v
+        ses = np.sqrt((psi**2).mean(axis=1) / (v * v).mean(axis=1) ** 2 / self.n)
+        theta, se = _median_rule(thetas, ses)
+        return DMLResult(theta, se, "PLR", "partialling out", thetas, ses, self.n)
+
+    def irm(self, score: str = "ATE", clip: float = 0.01) -> DMLResult:
+        """Interactive model for a binary treatment: the doubly robust ATE or
+        ATT ("ATTE") score, propensity clipped to [clip, 1 - clip]."""
+        if score not in IRM_SCORES:
+            raise ValueError(f"score must be one of {IRM_SCORES}, got {score!r}")
+        if not self.binary:
+            raise ValueError("the interactive model needs a binary 0/1 treatment")
+        pred = self.predictions(["m", "g0"] if score == "ATTE" else ["m", "g0", "g1"])
+        m = np.clip(pred["m"], clip, 1 - clip)
+        d, y, g0 = self.d, self.y, pred["g0"]
+        if score == "ATE":
+            g1 = pred["g1"]
+            psi_b = g1 - g0 + d * (y - g1) / m - (1 - d) * (y - g0) / (1 - m)
+            thetas = psi_b.mean(axis=1)
+            ses = psi_b.std(axis=1) / np.sqrt(self.n)
+        else:
+            p = d.mean()
+            psi_b = d * (y - g0) - m * (1 - d) * (y - g0) / (1 - m)
+            thetas = psi_b.mean(axis=1) / p
+            psi = (psi_b - d * thetas[:, None]) / p
+            ses = np.sqrt((psi**2).mean(axis=1) / self.n)
+        theta, se = _median_rule(thetas, ses)
+        return DMLResult(theta, se, "IRM", score, thetas, ses, self.n)
+
+
+def simulate(rng: np.random.Generator, n: int, p: int = 10, theta: float = 0.5) -> pd.DataFrame:
+    """Nonlinear confounding through x0, x1, x2 of a binary treatment with a
+    constant effect `theta`; the remaining covariates are noise."""
+    x = rng.normal(size=(n, p))
+    m = 1 / (1 + np.exp(-(np.sin(2 * x[:, 0]) + 0.5 * x[:, 1] * x[:, 2])))
+    d = rng.binomial(1, m)
+    g = np.cos(x[:, 0]) ** 2 + 0.5 * np.abs(x[:, 1]) + 0.3 * x[:, 2]
+    y = theta * d + g + rng.normal(size=n)
+    frame = pd.DataFrame(x, columns=[f"x{j}" for j in range(p)])
+    return frame.assign(d=d, y=y)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time cross-fitted DML with cached nuisances.")
+    ap.add_argument("--n", type=int, default=50_000)
+    ap.add_argument("--learner", default="boosting", choices=list(LEARNERS))
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--jobs", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    args, _ = ap.parse_known_args()
+
+    df = simulate(np.random.default_rng(args.seed), args.n)
+    covariates = [c for c in df.columns if c.startswith("x")]
+    dml = DML(df, "y", "d", covariates, learner=args.learner, folds=args.folds,
+              reps=args.reps, seed=args.seed, jobs=args.jobs, cache=OOFCache())  # fmt: skip
+    print(f"{args.n:,} units, {args.learner}, {args.folds} folds x {args.reps} splits, true 0.5")
+    for label, run in [
+        ("PLR", dml.plr),
+        ("IRM ATE", lambda: dml.irm("ATE")),
+        ("IRM ATTE", lambda: dml.irm("ATTE")),
+        ("IRM ATE, clip 0.05", lambda: dml.irm("ATE", clip=0.05)),
+    ]:
+        t0 = time.perf_counter()
+        res = run()
+        lo, hi = res.conf_int()
+        print(
+            f"{label:<20} {res.estimate:.4f} [{lo:.4f}, {hi:.4f}]  "
+            f"{time.perf_counter() - t0:6.2f} s  (cache hits {dml.cache.hits}, "
+            f"misses {dml.cache.misses})"
+        )
@@ -1,6 +1,13 @@
 import numpy as np, pandas as pd
 from sklearn.linear_model import LogisticRegression
-from sklearn.neighbors import NearestNeighbors
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.psm_matching.ps_match import match
+from econometrics.psm_matching.cov_match import covariate_match
+from econometrics.psm_matching.balance import balance
+from econometrics.psm_matching.ipw import Weighting
 
 np.random.seed(5)
 n = 1500
@@ -19,10 +26,33 @@ logit = LogisticRegression(solver="lbfgs").fit(df[["x1","x2"]], df["t"])
 p_hat = logit.predict_proba(df[["x1","x2"]])[:,1]
 df["ps"] = p_hat
 
-# Match treated to control by ps
-treated = df[df.t==1][["ps","y"]].reset_index()
-control = df[df.t==0][["ps","y"]].reset_index()
-nbrs = NearestNeighbors(n_neighbors=1).fit(control[["ps"]])
-dist, idx = nbrs.kneighbors(treated[["ps"]])
-att = (treated["y"].values - control.loc[idx.flatten(),"y"].values).mean()
-print("ATT (nearest-neighbor on ps):", att)
+# Match treated to control by ps (sorted-score matcher, ps_match.py)
+res = match(df, "t", "y", "ps")
+print("ATT (nearest-neighbor on ps):", res.estimate, "SE (Abadie-Imbens):", res.std_error)
+specs = {"ATT, 1:1": res}
+
+caliper = 0.2 * df["ps"].std()
+for label, kwargs in [
+    ("ATT, 3:1, caliper", dict(k=3, caliper=caliper)),
+    ("ATE, 1:1", dict(estimand="ATE")),
+    ("ATT, greedy without replacement", dict(replace=False, caliper=caliper)),
+]:
+    res = specs[label] = match(df, "t", "y", "ps", **kwargs)
+    print(f"{label}: {res.estimate:.4f} (SE {res.std_error:.4f}, "
+          f"{res.n_matched} matched, {res.n_unmatched} dropped)")
+
+# Mahalanobis matching on the covariates themselves, bias-corrected (cov_match.py)
+res = specs["ATT, Mahalanobis"] = covariate_match(df, "t", "y", ["x1", "x2"])
+print(f"ATT (Mahalanobis on x1, x2, bias-corrected): {res.estimate:.4f} (SE {res.std_error:.4f})")
+
+# Balance before and after every adjustment above, plus ATT odds weighting (balance.py)
+specs["ATT, ps odds weights"] = np.where(df["t"] == 1, 1.0, df["ps"] / (1 - df["ps"]))
+report = balance(df, "t", ["x1", "x2"], specs)
+table = report[["smd", "var_ratio", "ks"]].unstack("covariate")
+print(table.reindex(report.index.unique("spec")).round(3).to_string())
+
+# IPW, stabilized IPW and cross-fitted AIPW reusing the fitted score (ipw.py)
+weighting = Weighting(df, "t", "y", ["x1", "x2"], score="ps")
+table = weighting.summary()
+table["boot_se"] = weighting.bootstrap(reps=200).std().reindex(table.index)
+print(table.round(4).to_string())
@@ -0,0 +1,271 @@
+"""
+Fuzzy RD and the McCrary density test from binned data.
+
+One O(n) pass puts the running variable into equal-width bins whose edges
+line up with the cutoff, so no bin straddles it. After that, every estimate
+is a weighted local linear regression on bin midpoints, O(bins):
+
+- the McCrary (2008) manipulation test fits the normalized histogram on
+  each side and tests for a jump in the log density at the cutoff;
+- fuzzy RD is the Wald ratio of the outcome's jump to the treatment's jump
+  (first stage), with a delta-method standard error built from per-bin
+  sums, sums of squares and cross-products. With treatment=None it is the
+  sharp design.
+
+Per-bin sums are computed on first use and cached by column (and column
+pair), so fitting many outcomes against one treatment bins the treatment
+once, and refitting at other bandwidths or kernels touches no rows at all.
+Using midpoints for the running variable is the binning approximation; it
+is exact when the running variable is itself discrete on the bins.
+
+    rd = BinnedRD(df, running="score", cutoff=0.0)
+    rd.density_test().pvalue
+    rd.fit("earnings", h=0.5, treatment="enrolled").conf_int()
+
+    python econometrics/rd_design/rd_binned.py --n 10000000 --outcomes 20
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from econometrics.rd_design.rd_engine import _kernel
+from portfolio.inference import NormalInterval
+
+
+@dataclass
+class DensityTest:
+    """McCrary test of a discontinuity in the running variable's density."""
+
+    theta: float  # log f(cutoff+) - log f(cutoff-)
+    std_error: float
+    f_left: float
+    f_right: float
+    bandwidth: float
+    bin_width: float
+
+    @property
+    def z(self) -> float:
+        return self.theta / self.std_error
+
+    @property
+    def pvalue(self) -> float:
+        return float(2 * stats.norm.sf(abs(self.z)))
+
+
+@dataclass
+class BinnedRDResult(NormalInterval):
+    """Wald ratio of the outcome's jump to the treatment's jump at the cutoff."""
+
+    estimate: float
+    std_error: float
+    reduced_form: float  # jump in the outcome
+    first_stage: float  # jump in the treatment (1 for a sharp design)
+    first_stage_se: float
+    bandwidth: float
+    kernel: str
+    n_left: int  # observations with positive kernel weight
+    n_right: int
+
+
+class BinnedRD:
+    """Histogram of the running variable plus cached per-bin sums of other columns.
+
+    `width` defaults to McCrary's 2 sd(x) / sqrt(n). Rows with a missing
+    running variable are dropped; other columns used must be complete.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        running: str,
+        cutoff: float = 0.0,
+        width: Optional[float] = None,
+    ):
+        self.data = data[data[running].notna()]
+        x = self.data[running].to_numpy(dtype=float)
+        self.cutoff = float(cutoff)
+        self.n = len(x)
+        self.width = float(width) if width is not None else 2 * x.std() / np.sqrt(self.n)
+        k = np.floor((x - cutoff) / self.width).astype(np.int64)
+        first = int(k.min())
+        self._codes = k - first
+        self.counts = np.bincount(self._codes).astype(float)
+        self.mid = self.cutoff + (first + np.arange(len(self.counts)) + 0.5) * self.width
+        self._sums: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def sums(self, *columns: str) -> np.ndarray:
+        """Per-bin sum of the product of `columns` (cached)."""
+        key = tuple(sorted(columns))
+        if key not in self._sums:
+            values = np.ones(self.n)
+            for col in key:
+                col_values = self.data[col].to_numpy(dtype=float)
+                if np.isnan(col_values).any():
+                    raise ValueError(f"column {col!r} has missing values; drop those rows first")
+                values = values * col_values
+            self._sums[key] = np.bincount(self._codes, weights=values, minlength=len(self.counts))
+        return self._sums[key]
+
+    def _sides(self, h: float, kernel: str, occupied: bool = True):
+        """Per side: bins inside the window, kernel weights and regressors [1, x - c].
+
+        occupied=True drops empty bins (they carry no observations); the
+        histogram fit of the density test keeps them as zero heights."""
+        u = np.abs(self.mid - self.cutoff) / h
+        inside = u <= 1 if kernel == "uniform" else u < 1
+        weight = np.polyval(_kernel(kernel)[::-1], u)
+        right = self.mid >= self.cutoff
+        for side in (~right, right):
+            keep = side & inside
+            if occupied:
+                keep &= self.counts > 0
+            if keep.sum() < 2:
+                raise ValueError(f"bandwidth {h} leaves fewer than 2 bins on a side")
+            x = np.column_stack([np.ones(keep.sum()), self.mid[keep] - self.cutoff])
+            yield keep, weight[keep], x
+
+    def density_test(self, h: Optional[float] = None) -> DensityTest:
+        """Local linear (triangular) fits of the normalized histogram on each
+        side; `h` defaults to McCrary's rule of thumb."""
+        height = self.counts / (self.n * self.width)
+        if h is None:
+            h = self._density_bandwidth(height)
+        f = []
+        for keep, w, x in self._sides(h, "triangular", occupied=False):
+            xw = x * w[:, None]
+            f.append(np.linalg.solve(xw.T @ x, xw.T @ height[keep])[0])
+        f_left, f_right = f
+        se = np.sqrt(24 / 5 / (self.n * h) * (1 / f_right + 1 / f_left))
+        return DensityTest(
+            theta=float(np.log(f_right) - np.log(f_left)),
+            std_error=float(se),
+            f_left=float(f_left),
+            f_right=float(f_right),
+            bandwidth=float(h),
+            bin_width=self.width,
+        )
+
+    def _density_bandwidth(self, height: np.ndarray) -> float:
+        """McCrary's rule: a global quartic on each side gives the residual
+        variance and the second derivative; the two sides' bandwidths are averaged."""
+        right = self.mid >= self.cutoff
+        hs = []
+        for side in (~right, right):
+            z = self.mid[side] - self.cutoff
+            coef, ssr = np.polyfit(z, height[side], 4, full=True)[:2]
+            mse = ssr[0] / (side.sum() - 5)
+            second = np.polyval(np.polyder(coef, 2), z)
+            span = np.abs(z).max()
+            hs.append(3.348 * (mse * span / (second**2).sum()) ** 0.2)
+        return float(np.mean(hs))
+
+    def fit(
+        self,
+        outcome: str,
+        h: float,
+        treatment: Optional[str] = None,
+        kernel: str = "triangular",
+    ) -> BinnedRDResult:
+        """Fuzzy RD of `outcome` with `treatment` take-up (sharp if None) at
+        bandwidth `h`; heteroskedasticity-robust delta-method standard error."""
+        n_b = self.counts
+        sy, syy = self.sums(outcome), self.sums(outcome, outcome)
+        if treatment is None:  # take-up is 1 above the cutoff and 0 below
+            above = self.mid >= self.cutoff
+            sd = sdd = np.where(above, n_b, 0.0)
+            syd = np.where(above, sy, 0.0)
+        else:
+            sd, sdd = self.sums(treatment), self.sums(treatment, treatment)
+            syd = self.sums(outcome, treatment)
+
+        sides = []
+        for keep, w, x in self._sides(h, kernel):
+            bread = np.linalg.inv((x * (w * n_b[keep])[:, None]).T @ x)
+            lever = (x * w[:, None]) @ bread[0]  # intercept = sum_b lever_b * (bin sum)
+            sides.append((keep, x, w, bread, lever))
+
+        def jump(s: np.ndarray) -> float:
+            (k0, *_, l0), (k1, *_, l1) = sides
+            return float(l1 @ s[k1] - l0 @ s[k0])
+
+        def jump_se(s: np.ndarray, ss: np.ndarray) -> float:
+            """SE of the jump in a variable with per-bin sums s and sums of squares ss."""
+            var = 0.0
+            for keep, x, w, bread, lever in sides:
+                beta = bread @ (x * w[:, None]).T @ s[keep]
+                fit = x @ beta
+                ssr = ss[keep] - 2 * fit * s[keep] + n_b[keep] * fit**2  # sum of e^2 in bin
+                var += float(lever**2 @ ssr)
+            return np.sqrt(var)
+
+        reduced = jump(sy)
+        first = jump(sd) if treatment is not None else 1.0
+        tau = reduced / first
+        # u = y - tau d has no jump at the true tau; its variance gives tau's
+        su = sy - tau * sd
+        suu = syy - 2 * tau * syd + tau**2 * sdd
+        (k0, *_), (k1, *_) = sides
+        return BinnedRDResult(
+            estimate=tau,
+            std_error=float(jump_se(su, suu) / abs(first)),
+            reduced_form=reduced,
+            first_stage=first,
+            first_stage_se=float(jump_se(sd, sdd)) if treatment is not None else 0.0,
+            bandwidth=float(h),
+            kernel=kernel,
+            n_left=int(n_b[k0].sum()),
+            n_right=int(n_b[k1].sum()),
+        )
+
+
+def simulate_fuzzy(rng: np.random.Generator, n: int, outcomes: int = 1) -> pd.DataFrame:
+    """Running variable on [-2, 2]; take-up jumps from 0.2 to 0.8 at 0, and
+    outcome j has treatment effect 1 + j."""
+    x = rng.uniform(-2, 2, n)
+    take_up = rng.random(n) < np.where(x >= 0, 0.8, 0.2)
+    cols = {"x": x, "d": take_up.astype(float)}
+    for j in range(outcomes):
+        cols[f"y{j}"] = 2 + 0.8 * x + (1.0 + j) * take_up + rng.normal(scale=0.5, size=n)
+    return pd.DataFrame(cols)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time binned fuzzy RD and the density test.")
+    ap.add_argument("--n", type=int, default=2_000_000)
+    ap.add_argument("--outcomes", type=int, default=5)
+    ap.add_argument("--h", type=float, default=0.5)
+    ap.add_argument("--seed", type=int, default=0)
+    args, _ = ap.parse_known_args()
+
+    df = simulate_fuzzy(np.random.default_rng(args.seed), args.n, args.outcomes)
+    t0 = time.perf_counter()
+    rd = BinnedRD(df, "x")
+    test = rd.density_test()
+    t1 = time.perf_counter()
+    print(
+        f"{args.n:,} rows in {len(rd.counts):,} bins of width {rd.width:.5f}: "
+        f"binned and density-tested in {t1 - t0:.2f} s"
+    )
+    print(f"McCrary: theta = {test.theta:.4f} (se {test.std_error:.4f}), p = {test.pvalue:.3f}")
+    for j in range(args.outcomes):
+        t0 = time.perf_counter()
+        res = rd.fit(f"y{j}", h=args.h, treatment="d")
+        lo, hi = res.conf_int()
+        print(
+            f"y{j}: {res.estimate:.4f} [{lo:.4f}, {hi:.4f}] (true {1.0 + j}), first stage "
+            f"{res.first_stage:.3f}, {time.perf_counter() - t0:.2f} s"
+        )
+    t0 = time.perf_counter()
+    for h in np.linspace(0.1, 2.0, 100):
+        rd.fit("y0", h=h, treatment="d")
+    print(f"100 refits at other bandwidths from cached bins: {time.perf_counter() - t0:.3f} s")
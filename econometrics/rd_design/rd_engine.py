@@ -0,0 +1,312 @@
+"""
+Sharp RD by local polynomial regression at any bandwidth, from prefix sums.
+
+The running variable is sorted once on each side of the cutoff, by distance
+d from it, and the cumulative sums of d^j, d^j y and d^j sigma2 are kept.
+Every kernel here is a polynomial in u = d/h (uniform 1, triangular 1 - u,
+Epanechnikov 1 - u^2), so the kernel-weighted moments X'WX, X'Wy and the
+variance meat X'W Sigma W X of a local polynomial fit are linear
+combinations of those prefix sums at the row where d passes h: one binary
+search per bandwidth and side, whatever the sample size. sigma2 is the
+nearest-neighbour residual variance of rdrobust's default (vce="nn", 3
+matches), which does not depend on h, so the standard error comes from the
+same prefix sums.
+
+On top of that: the Imbens-Kalyanaraman MSE-optimal bandwidth, its
+coverage-error-optimal rescaling (Calonico, Cattaneo and Farrell), and the
+estimate over a whole grid of bandwidths in one vectorized pass.
+
+    rd = RDEngine.from_frame(df, running="x", outcome="y", cutoff=0.0)
+    h = rd.bandwidth("mse")
+    rd.fit(h).conf_int()
+    rd.sensitivity(np.linspace(0.1, 2, 500))
+
+    python econometrics/rd_design/rd_engine.py --n 5000000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.generators import rd_sim
+from portfolio.inference import NormalInterval
+
+# kernel weights as polynomial coefficients in u = d / h on [0, 1]
+KERNELS: Dict[str, Tuple[float, ...]] = {
+    "triangular": (1.0, -1.0),
+    "uniform": (1.0,),
+    "epanechnikov": (1.0, 0.0, -1.0),
+}
+BANDWIDTHS = ("mse", "cer")
+MAX_ORDER = 2  # local linear, or local quadratic for bias-robust intervals
+MATCHES = 3  # neighbours in the nearest-neighbour variance
+_KDEG = max(len(k) for k in KERNELS.values()) - 1
+_NX = _KDEG + 2 * MAX_ORDER + 1  # powers of d kept for X'WX
+_NY = _KDEG + MAX_ORDER + 1  # for X'Wy
+_NS = 2 * _KDEG + 2 * MAX_ORDER + 1  # for X'W Sigma W X
+
+
+def _kernel(kernel: str) -> np.ndarray:
+    if kernel not in KERNELS:
+        raise ValueError(f"kernel must be one of {tuple(KERNELS)}, got {kernel!r}")
+    return np.array(KERNELS[kernel])
+
+
+def kernel_constant(kernel: str) -> float:
+    """C_K of the MSE-optimal local linear bandwidth at a boundary,
+    (int K*^2 / (int u^2 K*)^2)^(1/5) with K* the equivalent kernel; 3.4375
+    for the triangular kernel, as in Imbens and Kalyanaraman."""
+    k = _kernel(kernel)
+    k2 = np.convolve(k, k)
+    nu = [sum(a / (j + r + 1) for r, a in enumerate(k)) for j in range(4)]
+    pi = [sum(a / (j + r + 1) for r, a in enumerate(k2)) for j in range(3)]
+    det = nu[0] * nu[2] - nu[1] ** 2
+    bias = (nu[2] ** 2 - nu[1] * nu[3]) / det
+    var = (nu[2] ** 2 * pi[0] - 2 * nu[1] * nu[2] * pi[1] + nu[1] ** 2 * pi[2]) / det**2
+    return float((var / bias**2) ** 0.2)
+
+
+def _nn_variance(d: np.ndarray, y: np.ndarray, matches: int = MATCHES) -> np.ndarray:
+    """J/(J+1) (y_i - mean of y over its J nearest neighbours in d)^2.
+
+    For sorted d the J nearest neighbours of row i are a window of J rows
+    around it (i excluded); of the J + 1 such windows the one whose farthest
+    point is closest wins.
+    """
+    n, pad = len(d), matches
+    dp = np.r_[np.full(pad, -np.inf), d, np.full(pad, np.inf)]
+    yp = np.r_[np.zeros(pad), y, np.zeros(pad)]
+    i = np.arange(pad, n + pad)
+    best, total = np.full(n, np.inf), np.zeros(n)
+    for left in range(matches + 1):
+        reach = np.maximum(d - dp[i - left], dp[i + matches - left] - d)
+        better = reach < best
+        window = sum(yp[i + o] for o in range(-left, matches - left + 1) if o)
+        best = np.where(better, reach, best)
+        total = np.where(better, window, total)
+    return matches / (matches + 1) * (y - total / matches) ** 2
+
+
+@dataclass
+class RDEstimate(NormalInterval):
+    """Jump at the cutoff from one local polynomial fit."""
+
+    estimate: float
+    std_error: float
+    bandwidth: float
+    kernel: str
+    order: int
+    n_left: int  # observations with positive kernel weight
+    n_right: int
+    left: np.ndarray  # polynomial coefficients in the distance |x - cutoff|
+    right: np.ndarray
+
+
+class RDEngine:
+    """Sorted running variable and prefix sums for local polynomial RD fits.
+
+    Observations at or above `cutoff` are treated. The standard error is
+    rdrobust's nearest-neighbour one (conventional, not bias-corrected);
+    order=2 at the local linear bandwidth gives the robust bias-corrected
+    interval of Calonico, Cattaneo and Titiunik with pilot bandwidth b = h.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cutoff: float = 0.0):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        self.cutoff = float(cutoff)
+        self.n = len(x)
+        self.scale = float(np.abs(x - cutoff).max()) or 1.0  # keeps powers of d <= 1
+        self._sides = []
+        for mask, sign in ((x < cutoff, -1.0), (x >= cutoff, 1.0)):
+            d = sign * (x[mask] - cutoff) / self.scale
+            order = np.argsort(d, kind="stable")
+            d, ys = d[order], y[mask][order]
+            if len(d) <= MATCHES:
+                raise ValueError("need more than 3 observations on each side of the cutoff")
+            self._sides.append((d, ys, self._prefix(d, ys)))
+
+    @classmethod
+    def from_frame(
+        cls, data: pd.DataFrame, running: str, outcome: str, cutoff: float = 0.0
+    ) -> "RDEngine":
+        frame = data[[running, outcome]].dropna()
+        return cls(frame[running].to_numpy(), frame[outcome].to_numpy(), cutoff)
+
+    @staticmethod
+    def _prefix(d: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Rows 0..n of cumulative [d^j | d^j y | y^2 | d^j sigma2] sums."""
+        sigma2 = _nn_variance(d, y)
+        out = np.zeros((len(d) + 1, _NX + _NY + 1 + _NS), order="F")
+        body, power = out[1:], np.ones_like(d)
+        for j in range(_NS):
+            if j < _NX:
+                body[:, j] = power
+            if j < _NY:
+                np.multiply(power, y, out=body[:, _NX + j])
+            np.multiply(power, sigma2, out=body[:, _NX + _NY + 1 + j])
+            power *= d
+        body[:, _NX + _NY] = y * y
+        np.cumsum(body, axis=0, out=body)
+        return out
+
+    def _side(
+        self, side: int, hs: np.ndarray, kernel: np.ndarray, order: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Local polynomial coefficients (in scaled d), intercept variances and
+        counts on one side for scaled bandwidths `hs`."""
+        d, _, prefix = self._sides[side]
+        counts = np.searchsorted(d, hs, side="right")
+        rows = prefix[counts]  # (H, columns)
+        kern2 = np.convolve(kernel, kernel)
+
+        def weighted(base: int, j: int, coefs: np.ndarray) -> np.ndarray:
+            # sum over d <= h of K(d/h) d^j * series = sum_r a_r h^-r S_{j+r}
+            return sum(a * rows[:, base + j + r] / hs**r for r, a in enumerate(coefs) if a)
+
+        p = order + 1
+        xwx, meat = np.empty((len(hs), p, p)), np.empty((len(hs), p, p))
+        for a in range(p):
+            for b in range(a, p):
+                xwx[:, a, b] = xwx[:, b, a] = weighted(0, a + b, kernel)
+                meat[:, a, b] = meat[:, b, a] = weighted(_NX + _NY + 1, a + b, kern2)
+        xwy = np.column_stack([weighted(_NX, a, kernel) for a in range(p)])
+        ok = counts > p  # enough points inside the window for a fit
+        xwx[~ok] = np.eye(p)
+        bread = np.linalg.inv(xwx)
+        beta = np.einsum("hab,hb->ha", bread, xwy)
+        var = np.einsum("ha,hab,hb->h", bread[:, 0], meat, bread[:, 0])
+        beta[~ok], var[~ok] = np.nan, np.nan
+        return beta, var, counts
+
+    def _fit(self, hs: np.ndarray, kernel: str, order: int) -> Dict[str, np.ndarray]:
+        if order not in range(MAX_ORDER + 1):
+            raise ValueError(f"order must be 0..{MAX_ORDER}, got {order}")
+        k = _kernel(kernel)
+        hs = np.atleast_1d(np.asarray(hs, dtype=float)) / self.scale
+        if kernel != "uniform":  # a weight-zero boundary point does not count
+            hs = np.nextafter(hs, 0)
+        (b0, v0, n0), (b1, v1, n1) = (self._side(s, hs, k, order) for s in (0, 1))
+        unscale = self.scale ** -np.arange(order + 1)
+        return {
+            "estimate": b1[:, 0] - b0[:, 0],
+            "std_error": np.sqrt(v0 + v1),
+            "n_left": n0,
+            "n_right": n1,
+            "left": b0 * unscale,
+            "right": b1 * unscale,
+        }
+
+    def fit(self, h: float, kernel: str = "triangular", order: int = 1) -> RDEstimate:
+        """Local polynomial jump at bandwidth `h` (units of the running variable)."""
+        res = self._fit(np.array([h]), kernel, order)
+        return RDEstimate(
+            estimate=float(res["estimate"][0]),
+            std_error=float(res["std_error"][0]),
+            bandwidth=float(h),
+            kernel=kernel,
+            order=order,
+            n_left=int(res["n_left"][0]),
+            n_right=int(res["n_right"][0]),
+            left=res["left"][0],
+            right=res["right"][0],
+        )
+
+    def sensitivity(
+        self,
+        bandwidths: Sequence[float],
+        kernel: str = "triangular",
+        order: int = 1,
+        level: float = 0.95,
+    ) -> pd.DataFrame:
+        """The estimate and its interval at every bandwidth, in one pass."""
+        hs = np.asarray(bandwidths, dtype=float)
+        res = self._fit(hs, kernel, order)
+        del res["left"], res["right"]
+        z = stats.norm.ppf(0.5 + level / 2)
+        out = pd.DataFrame({"bandwidth": hs, **res})
+        out.insert(3, "ci_lower", out["estimate"] - z * out["std_error"])
+        out.insert(4, "ci_upper", out["estimate"] + z * out["std_error"])
+        return out
+
+    def bandwidth(self, kind: str = "mse", kernel: str = "triangular") -> float:
+        """Imbens-Kalyanaraman MSE-optimal bandwidth for the local linear
+        estimate, or ("cer") its coverage-error-optimal rescaling
+        h_mse * n^(-1/20) for inference."""
+        if kind not in BANDWIDTHS:
+            raise ValueError(f"kind must be one of {BANDWIDTHS}, got {kind!r}")
+        h = self._ik(kernel)
+        return h * self.n ** (-1 / 20) if kind == "cer" else h
+
+    def _ik(self, kernel: str) -> float:
+        n = self.n
+        (dl, _, pl), (dr, _, pr) = self._sides
+        left, right = pl[-1], pr[-1]  # full-sample sums on each side
+
+        def total(j: int, base: int = 0, treated: bool = False) -> float:
+            """Sum of z^j (times the series at `base`) for z the signed distance."""
+            return right[base + j] + (0.0 if treated else (-1) ** j * left[base + j])
+
+        # 1. pilot: density and conditional variances from uniform windows
+        mean = total(1) / n
+        h1 = 1.84 * np.sqrt((total(2) - n * mean**2) / (n - 1)) * n**-0.2
+        sigma2, n1 = [], []
+        for d, prefix in ((dl, pl), (dr, pr)):
+            m = int(np.searchsorted(d, h1, side="right"))
+            sy, syy = prefix[m, _NX], prefix[m, _NX + _NY]
+            n1.append(m)
+            sigma2.append((syy - sy**2 / m) / (m - 1))
+        f = sum(n1) / (2 * n * h1)
+        # 2. third derivative from a global cubic with a jump, [1, T, z, z^2, z^3],
+        # then pilot bandwidths for the second derivative on each side
+        cols = [(0, False), (0, True), (1, False), (2, False), (3, False)]
+        gram = np.array([[total(pa + pb, 0, ta or tb) for pb, tb in cols] for pa, ta in cols])
+        rhs = np.array([total(pa, _NX, ta) for pa, ta in cols])
+        m3 = 6 * np.linalg.solve(gram, rhs)[4]
+        uniform = _kernel("uniform")
+        curv, reg = [], []
+        for side, (d, s2) in enumerate(zip((dl, dr), sigma2)):
+            h2 = 3.56 * (s2 / (f * m3**2)) ** (1 / 7) * len(d) ** (-1 / 7)
+            beta, _, n2 = self._side(side, np.array([h2]), uniform, 2)
+            curv.append(2 * beta[0, 2])
+            reg.append(2160 * s2 / (n2[0] * h2**4))
+        # 3. regularized plug-in
+        denom = f * ((curv[1] - curv[0]) ** 2 + reg[0] + reg[1])
+        h = kernel_constant(kernel) * (sum(sigma2) / denom) ** 0.2 * n**-0.2
+        return float(h * self.scale)
+
+
+def main(n: int = 1_000_000, grid: int = 500, seed: int = 0) -> None:
+    df = rd_sim(np.random.default_rng(seed), n)
+    t0 = time.perf_counter()
+    rd = RDEngine.from_frame(df, "x", "y")
+    t1 = time.perf_counter()
+    h_mse, h_cer = rd.bandwidth("mse"), rd.bandwidth("cer")
+    t2 = time.perf_counter()
+    curve = rd.sensitivity(np.linspace(0.05, 2.0, grid))
+    t3 = time.perf_counter()
+    print(f"{n:,} observations: sort and prefix sums {t1 - t0:.2f} s")
+    print(f"bandwidths in {1e3 * (t2 - t1):.1f} ms: MSE-optimal {h_mse:.4f}, CER-optimal {h_cer:.4f}")
+    for name, h, order in (("local linear", h_mse, 1), ("robust (quadratic)", h_cer, 2)):
+        est = rd.fit(h, order=order)
+        lo, hi = est.conf_int()
+        print(f"{name:>18} at h={h:.4f}: {est.estimate:.4f} [{lo:.4f}, {hi:.4f}]")
+    print(f"sensitivity curve over {grid} bandwidths in {1e3 * (t3 - t2):.1f} ms")
+    print(curve.iloc[:: max(1, grid // 10)].round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time prefix-sum RD fits and bandwidth selection.")
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--grid", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    args, _ = ap.parse_known_args()
+    main(args.n, args.grid, args.seed)
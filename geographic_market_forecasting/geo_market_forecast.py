@@ -9,12 +9,18 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_percentage_error
 import warnings
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.dataset_io import read_dataset
 
 warnings.filterwarnings("ignore")
 os.makedirs("figures", exist_ok=True)
+os.makedirs("data/processed", exist_ok=True)
 
 # ── 1. LOAD DATA ─────────────────────────────────────────
-df = pd.read_csv("data/raw/bls_metro_employment.csv")
+df = read_dataset("data/raw/bls_metro_employment.csv")  # metro as category, year as int16
 print(f"Loaded {len(df)} rows across {df['metro'].nunique()} metros")
 print("\nMetros in dataset:")
 print(df.groupby("metro")["year"].count().to_string())
@@ -192,9 +198,3 @@ holdout_df[["metro","year","emp","predicted"]].to_csv(
 )
 print("Saved: data/processed/holdout_forecast_results.csv")
 print("\nAll done.")
-
-cd /workspaces/alex-strong-econ-analytics-portfolio/geographic_market_forecasting
-python3 geo_market_forecast.py
-git add figures/
-git commit -m "feat: add rendered output figures for geographic forecasting project"
-git push origin main
@@ -5,10 +5,18 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.gridspec import GridSpec
+import sys
 import warnings
+from pathlib import Path
 warnings.filterwarnings('ignore')
 
-np.random.seed(42)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.scale import parse_size, stream_dataset
+from portfolio.schemas import apply_schema
+
+SEED = 42
+ROWS_PER_TREATED = 16  # each treated patient brings a control; 8 quarters each
+SIZE = parse_size(800, "Healthcare program DiD and ROI on a simulated cohort", ROWS_PER_TREATED)
 
 # ── 1. SIMULATE DATA ─────────────────────────────────────────────────────────
 # Context: Oak Street Health-style proactive primary care intervention
@@ -18,67 +26,79 @@ np.random.seed(42)
 #          Pre-period:  Q1-Q4 2021 (4 quarters)
 #          Post-period: Q1-Q4 2022 (4 quarters)
 
-N_TREAT = 800
-N_CTRL  = 800
+N_TREAT = SIZE.n
+N_CTRL  = N_TREAT
 N       = N_TREAT + N_CTRL
 
-# Patient characteristics
-age            = np.random.normal(72, 8, N).clip(55, 90)
-n_chronic      = np.random.poisson(2.8, N).clip(1, 6)
-baseline_risk  = np.random.beta(2, 5, N)
-
-# Treatment assignment (not random — higher risk patients enrolled first)
-treat_prob     = 0.3 + 0.5 * baseline_risk
-treat_prob[:N_TREAT] = treat_prob[:N_TREAT] * 1.4  # over-sample high risk
-treated        = np.zeros(N, dtype=int)
-treated[:N_TREAT] = 1
-
-# Pre-period outcomes (quarterly ED visits, 4 quarters)
-# Both groups have similar pre-trends
-pre_ed_base    = 0.4 + 0.6 * baseline_risk + 0.02 * (age - 65) / 10
-
-pre_ed = np.zeros((N, 4))
-for q in range(4):
-    pre_ed[:, q] = np.random.poisson(pre_ed_base * (1 + 0.05 * q))
-
-# Post-period: treatment reduces ED visits
-# True ATT = -0.18 quarterly ED visits (about -45% relative reduction)
-true_att = -0.18
-post_ed = np.zeros((N, 4))
-for q in range(4):
-    treatment_effect = true_att * treated
-    secular_trend    = 0.02 * q  # slight secular increase in control
-    post_ed[:, q]   = np.random.poisson(
-        np.maximum(0.01, pre_ed_base + treatment_effect + secular_trend * (1 - treated))
-    )
-
-# Hospitalization outcomes (binary per quarter)
-pre_hosp  = np.random.binomial(1, np.minimum(0.95, baseline_risk * 0.6)[:, np.newaxis] * np.ones((N, 4)), (N, 4))
-post_hosp_prob = np.minimum(0.95, baseline_risk * 0.6)[:, np.newaxis] - 0.08 * treated[:, np.newaxis]
-post_hosp_prob = np.maximum(0.01, post_hosp_prob)
-post_hosp = np.random.binomial(1, post_hosp_prob, (N, 4))
-
-# Build panel dataset
-records = []
-for i in range(N):
-    for q in range(8):
-        period = "pre" if q < 4 else "post"
-        qtr    = q if q < 4 else q - 4
-        records.append({
-            "patient_id":   i,
-            "treated":      treated[i],
-            "age":          round(age[i], 1),
-            "n_chronic":    n_chronic[i],
-            "baseline_risk":round(baseline_risk[i], 3),
-            "quarter":      q,
-            "period":       period,
-            "post":         1 if q >= 4 else 0,
-            "qtr_within":   qtr,
-            "ed_visits":    pre_ed[i, qtr] if q < 4 else post_ed[i, qtr],
-            "hospitalized": pre_hosp[i, qtr] if q < 4 else post_hosp[i, qtr],
-        })
-
-df = pd.DataFrame(records)
+def simulate(rng, n_treat, start=0):
+    """Panel of n_treat treated + n_treat control patients, 8 quarters each.
+
+    `start` counts treated patients in earlier blocks; ids stay unique.
+    """
+    n = 2 * n_treat
+
+    # Patient characteristics
+    age            = rng.normal(72, 8, n).clip(55, 90)
+    n_chronic      = rng.poisson(2.8, n).clip(1, 6)
+    baseline_risk  = rng.beta(2, 5, n)
+
+    # Treatment assignment (not random — higher risk patients enrolled first)
+    treat_prob     = 0.3 + 0.5 * baseline_risk
+    treat_prob[:n_treat] = treat_prob[:n_treat] * 1.4  # over-sample high risk
+    treated        = np.zeros(n, dtype=int)
+    treated[:n_treat] = 1
+
+    # Pre-period outcomes (quarterly ED visits, 4 quarters)
+    # Both groups have similar pre-trends
+    pre_ed_base    = 0.4 + 0.6 * baseline_risk + 0.02 * (age - 65) / 10
+
+    pre_ed = np.zeros((n, 4))
+    for q in range(4):
+        pre_ed[:, q] = rng.poisson(pre_ed_base * (1 + 0.05 * q))
+
+    # Post-period: treatment reduces ED visits
+    # True ATT = -0.18 quarterly ED visits (about -45% relative reduction)
+    true_att = -0.18
+    post_ed = np.zeros((n, 4))
+    for q in range(4):
+        treatment_effect = true_att * treated
+        secular_trend    = 0.02 * q  # slight secular increase in control
+        post_ed[:, q]   = rng.poisson(
+            np.maximum(0.01, pre_ed_base + treatment_effect + secular_trend * (1 - treated))
+        )
+
+    # Hospitalization outcomes (binary per quarter)
+    pre_hosp  = rng.binomial(1, np.minimum(0.95, baseline_risk * 0.6)[:, np.newaxis] * np.ones((n, 4)), (n, 4))
+    post_hosp_prob = np.minimum(0.95, baseline_risk * 0.6)[:, np.newaxis] - 0.08 * treated[:, np.newaxis]
+    post_hosp_prob = np.maximum(0.01, post_hosp_prob)
+    post_hosp = rng.binomial(1, post_hosp_prob, (n, 4))
+
+    # Build panel dataset: one row per patient-quarter, quarters 0-3 pre, 4-7 post
+    quarter = np.tile(np.arange(8), n)
+    post    = (quarter >= 4).astype(int)
+    df = pd.DataFrame({
+        "patient_id":   np.repeat(2 * start + np.arange(n), 8),
+        "treated":      np.repeat(treated, 8),
+        "age":          np.repeat(age.round(1), 8),
+        "n_chronic":    np.repeat(n_chronic, 8),
+        "baseline_risk":np.repeat(baseline_risk.round(3), 8),
+        "quarter":      quarter,
+        "period":       np.where(post == 1, "post", "pre"),
+        "post":         post,
+        "qtr_within":   quarter % 4,
+        "ed_visits":    np.hstack([pre_ed, post_ed]).ravel(),
+        "hospitalized": np.hstack([pre_hosp, post_hosp]).ravel(),
+    })
+    return apply_schema(df, "patient_panel_data")
+
+if SIZE.chunked:
+    # Load-test mode: stream independent blocks to disk and skip the analysis.
+    path = stream_dataset(simulate, SIZE, SEED, "patient_panel_data")
+    print(f"Streamed {N:,} patients to {path}")
+    raise SystemExit(0)
+
+rng = np.random.RandomState(SEED)  # same stream as np.random.seed(42)
+df  = simulate(rng, N_TREAT)
 
 # ── 2. DESCRIPTIVE STATISTICS ────────────────────────────────────────────────
 desc_stats = df[df["post"] == 0].groupby("treated").agg(
@@ -120,7 +140,7 @@ did_adj = beta[3]  # Interaction term = ATT
 n_boot = 500
 boot_atts = []
 for _ in range(n_boot):
-    idx   = np.random.choice(len(df), len(df), replace=True)
+    idx   = rng.choice(len(df), len(df), replace=True)
     X_b   = X[idx]
     y_b   = y[idx]
     b, _, _, _ = lstsq(X_b, y_b, rcond=None)
@@ -269,14 +289,14 @@ fig.suptitle("Healthcare Program Evaluation: Value-Based Care Intervention\n"
              "Difference-in-Differences Analysis | Simulated Patient Cohort Study",
              fontsize=15, fontweight="bold", y=0.98, color="#111827")
 
-plt.savefig("/home/claude/portfolio/healthcare-roi-eval/healthcare_roi_analysis.png",
+plt.savefig("healthcare_roi_analysis.png",
             dpi=150, bbox_inches="tight", facecolor=fig.get_facecolor())
 plt.close()
 print("Chart saved.")
 
 # ── Save data to CSV ─────────────────────────────────────────────────────────
-df.to_csv("/home/claude/portfolio/healthcare-roi-eval/patient_panel_data.csv", index=False)
-desc_stats.to_csv("/home/claude/portfolio/healthcare-roi-eval/descriptive_stats.csv")
+df.to_csv("patient_panel_data.csv", index=False)
+desc_stats.to_csv("descriptive_stats.csv")
 print("Data saved.")
 
 # ── Print summary ─────────────────────────────────────────────────────────────
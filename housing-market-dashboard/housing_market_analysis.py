@@ -275,13 +275,13 @@ for spine in ax7.spines.values():
 fig.suptitle("U.S. Housing Market Econometric Analysis: Fed Policy, Affordability & Regional Dynamics (2018–2024)",
              fontsize=14, fontweight="bold", y=0.995, color=DARK)
 
-plt.savefig("/home/claude/portfolio/housing-market-dashboard/housing_market_dashboard.png",
+plt.savefig("housing_market_dashboard.png",
             dpi=150, bbox_inches="tight", facecolor=fig.get_facecolor())
 plt.close()
 print("Housing dashboard saved.")
 
 # Save data
-df.to_csv("/home/claude/portfolio/housing-market-dashboard/housing_market_data.csv")
+df.to_csv("housing_market_data.csv")
 print("Data saved.")
 
 print(f"""
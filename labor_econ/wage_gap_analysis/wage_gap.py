@@ -3,21 +3,29 @@
 Minimal wage gap example:
 - Generate synthetic wage data
 - Run an OLS regression with statsmodels
-- Save wages_synthetic.csv for Tableau
+- Save wages_synthetic.parquet (and .csv for Tableau)
+
+--n/--scale set the number of workers; above --chunk-rows the data stream to
+wages_synthetic_n<N>.parquet in independent blocks (see portfolio.scale).
 """
 
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
+from portfolio.scale import CHUNK_ROWS, Size, parse_size, stream_dataset
+from portfolio.schemas import apply_schema
 
-def main():
-    print("Running wage_gap.py ...")
+SEED = 123
+N_WORKERS = 2000
 
-    rng = np.random.default_rng(123)
-    n = 2000
 
+def simulate(rng: np.random.Generator, n: int, start: int = 0) -> pd.DataFrame:
+    """Draw `n` workers from the structural wage equation."""
     # Core features
     years_exp = rng.integers(0, 30, size=n)
     edu = rng.choice([12, 14, 16, 18], size=n, p=[0.2, 0.3, 0.4, 0.1])
@@ -37,7 +45,6 @@ def main():
     # Final wage
     wage = base + industry_effect + noise
 
-    # Build DataFrame
     df = pd.DataFrame(
         {
             "wage": wage,
@@ -47,6 +54,21 @@ def main():
             "industry": industry,
         }
     )
+    return apply_schema(df, "wages_synthetic")
+
+
+def main(out_dir=DEFAULT_OUT_DIR, n=N_WORKERS, chunk_rows=CHUNK_ROWS) -> ModuleResult:
+    print("Running wage_gap.py ...")
+
+    size = Size(n, chunk_rows)
+    if size.chunked:
+        if out_dir is None:
+            raise ValueError("chunked mode streams to disk; pass an out_dir")
+        out_path = stream_dataset(simulate, size, SEED, Path(out_dir) / "wages_synthetic")
+        print(f"Streamed {n:,} workers to: {out_path.resolve()}")
+        return ModuleResult(pd.DataFrame(), meta={"n": n, "chunked": True}, path=out_path)
+
+    df = simulate(np.random.default_rng(SEED), n)
 
     # Design matrix with dummy variables (all numeric)
     X_df = pd.get_dummies(
@@ -76,34 +98,31 @@ def main():
     print(model.summary())
 
     # Save data for Tableau
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "wages_synthetic.csv"
-    df.to_csv(out_path, index=False)
-    print(f"\nSaved synthetic wage dataset to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "wages_synthetic")
+    if out_path is not None:
+        print(f"\nSaved synthetic wage dataset to: {out_path.resolve()}")
+    return ModuleResult(
+        df,
+        models={"ols": model},
+        meta={"columns": list(X_df.columns)},
+        path=out_path,
+    )
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import pandas as pd
-    import numpy as np
     import os
 
-    main()
+    size = parse_size(N_WORKERS, "Minimal wage gap example")
+    result = main(n=size.n, chunk_rows=size.chunk_rows)
+    if result.meta.get("chunked"):
+        raise SystemExit(0)  # nothing in memory to plot
 
     os.makedirs("labor_econ/wage_gap_analysis/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/wages_synthetic.csv")
-    wage_col = [c for c in df.columns if "wage" in c.lower() or
-                "earn" in c.lower() or "salary" in c.lower() or
-                "income" in c.lower() or "pay" in c.lower()][0]                if any("wage" in c.lower() or "earn" in c.lower() or
-                      "salary" in c.lower() or "income" in c.lower() or
-                      "pay" in c.lower() for c in df.columns)                else df.select_dtypes(include=[np.number]).columns[0]
-    group_col = [c for c in df.columns if "gender" in c.lower() or
-                 "group" in c.lower() or "female" in c.lower() or
-                 "sex" in c.lower()]
-    group_col = group_col[0] if group_col else None
+    df = result.data
+    wage_col = "wage"
 
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
@@ -115,27 +134,13 @@ if __name__ == "__main__":
                       fontweight="bold")
     axes[0].grid(True, alpha=0.3)
 
-    if group_col:
-        groups = df[group_col].unique()
-        colors = ["#1B4F8A", "#E8593C", "#0F6E56", "#BA7517"]
-        for i, g in enumerate(sorted(groups)):
-            sub = df[df[group_col] == g][wage_col]
-            axes[1].hist(sub, bins=30, alpha=0.6,
-                         color=colors[i % len(colors)],
-                         edgecolor="white", label=f"Group {g}")
-        axes[1].legend(fontsize=9)
-        axes[1].set_title("Wage Distribution by Group\nGap visualization",
-                          fontsize=11, fontweight="bold")
-    else:
-        exp_col = [c for c in df.columns if "exp" in c.lower() or
-                   "tenure" in c.lower() or "year" in c.lower()]
-        exp_col = exp_col[0] if exp_col else df.select_dtypes(
-            include=[np.number]).columns[1]
-        axes[1].scatter(df[exp_col], df[wage_col],
-                        alpha=0.3, color="#1B4F8A", s=10)
-        axes[1].set_xlabel(exp_col, fontsize=10)
-        axes[1].set_title(f"Wage vs {exp_col}", fontsize=11,
-                          fontweight="bold")
+    gap = result.models["ols"].params[result.meta["columns"].index("gender")]
+    for g, label, color in ((0, "Female", "#E8593C"), (1, "Male", "#1B4F8A")):
+        axes[1].hist(df.loc[df["gender"] == g, wage_col], bins=30, alpha=0.6,
+                     color=color, edgecolor="white", label=label)
+    axes[1].legend(fontsize=9)
+    axes[1].set_title(f"Wage Distribution by Gender\nAdjusted gap (OLS) = {gap:.2f}",
+                      fontsize=11, fontweight="bold")
     axes[1].set_xlabel("Wage", fontsize=10)
     axes[1].set_ylabel("Count", fontsize=10)
     axes[1].grid(True, alpha=0.3)
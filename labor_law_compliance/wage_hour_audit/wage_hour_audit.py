@@ -10,136 +10,115 @@ Generate synthetic timesheet data including:
 - Gross pay
 
 Output:
-    data/processed/timesheets_synthetic.csv
+    data/processed/timesheets_synthetic.parquet (and .csv for Tableau)
+
+--n/--scale set the number of employees; above --chunk-rows the data stream
+to timesheets_synthetic_n<N>.parquet in independent blocks (see portfolio.scale).
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
-
-def main():
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
+from portfolio.scale import CHUNK_ROWS, Size, parse_size, stream_dataset
+from portfolio.schemas import apply_schema
+
+SEED = 2025
+N_EMPLOYEES = 150
+N_WEEKS = 26
+DEPTS = ["Operations", "Sales", "HR", "Finance", "Warehouse"]
+ROUNDING_CHOICES = [1, 6, 15]
+
+
+def simulate(rng: np.random.Generator, n: int, start: int = 0) -> pd.DataFrame:
+    """Draw N_WEEKS weekly timesheets for employees start+1 .. start+n."""
+    dept = rng.choice(DEPTS, size=n)
+    base_rate = rng.uniform(15, 45, size=n)
+
+    base_hours = rng.normal(loc=40, scale=5, size=(n, N_WEEKS)).clip(20, 70)
+    rounding_to = rng.choice(ROUNDING_CHOICES, size=(n, N_WEEKS), p=[0.5, 0.3, 0.2])
+    hours_rounded = np.round(base_hours / rounding_to) * rounding_to
+
+    ot_hours = np.maximum(0, hours_rounded - 40)
+    long_week_flag = (hours_rounded > 50).astype(int)
+    gross_pay = hours_rounded * base_rate[:, None]
+
+    ids = np.arange(start + 1, start + n + 1)
+    df = pd.DataFrame(
+        {
+            "employee_id": np.repeat([f"E{str(i).zfill(3)}" for i in ids], N_WEEKS),
+            "week": np.tile(np.arange(1, N_WEEKS + 1), n),
+            "dept": np.repeat(dept, N_WEEKS),
+            "hourly_rate": np.repeat(base_rate.round(2), N_WEEKS),
+            "hours": hours_rounded.ravel().round(2),
+            "ot_hours": ot_hours.ravel().round(2),
+            "rounded_to": rounding_to.ravel(),
+            "long_week_flag": long_week_flag.ravel(),
+            "gross": gross_pay.ravel().round(2),
+        }
+    )
+    return apply_schema(df, "timesheets_synthetic")
+
+
+def main(out_dir=DEFAULT_OUT_DIR, n=N_EMPLOYEES, chunk_rows=CHUNK_ROWS) -> ModuleResult:
     print("Running wage_hour_audit.py ...")
 
-    rng = np.random.default_rng(2025)
-
-    n_employees = 150
-    n_weeks = 26
-    depts = ["Operations", "Sales", "HR", "Finance", "Warehouse"]
-    rounding_choices = [1, 6, 15]
-
-    rows = []
-    emp_ids = [f"E{str(i).zfill(3)}" for i in range(1, n_employees + 1)]
-
-    for emp in emp_ids:
-        dept = rng.choice(depts)
-        base_rate = rng.uniform(15, 45)
-
-        for week in range(1, n_weeks + 1):
-            base_hours = rng.normal(loc=40, scale=5)
-            base_hours = max(20, min(70, base_hours))
-
-            rounding_to = rng.choice(rounding_choices, p=[0.5, 0.3, 0.2])
-            hours_rounded = np.round(base_hours / rounding_to) * rounding_to
-
-            ot_hours = max(0, hours_rounded - 40)
-            long_week_flag = int(hours_rounded > 50)
-
-            gross_pay = hours_rounded * base_rate
-
-            rows.append(
-                {
-                    "employee_id": emp,
-                    "week": week,
-                    "dept": dept,
-                    "hourly_rate": round(base_rate, 2),
-                    "hours": round(hours_rounded, 2),
-                    "ot_hours": round(ot_hours, 2),
-                    "rounded_to": rounding_to,
-                    "long_week_flag": long_week_flag,
-                    "gross": round(gross_pay, 2),
-                }
-            )
-
-    df = pd.DataFrame(rows)
+    size = Size(n, chunk_rows, N_WEEKS)
+    if size.chunked:
+        if out_dir is None:
+            raise ValueError("chunked mode streams to disk; pass an out_dir")
+        out_path = stream_dataset(simulate, size, SEED, Path(out_dir) / "timesheets_synthetic")
+        print(f"Streamed {n:,} employees x {N_WEEKS} weeks to: {out_path.resolve()}")
+        return ModuleResult(pd.DataFrame(), meta={"n_employees": n, "chunked": True}, path=out_path)
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "timesheets_synthetic.csv"
-    df.to_csv(out_path, index=False)
+    df = simulate(np.random.default_rng(SEED), n)
 
-    print(f"Saved timesheet data to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "timesheets_synthetic")
+    if out_path is not None:
+        print(f"Saved timesheet data to: {out_path.resolve()}")
     print(df.head())
+    return ModuleResult(df, meta={"n_employees": n, "n_weeks": N_WEEKS}, path=out_path)
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import pandas as pd
-    import numpy as np
     import os
 
-    main()
+    size = parse_size(N_EMPLOYEES, "Synthetic timesheets for the wage-hour audit", N_WEEKS)
+    result = main(n=size.n, chunk_rows=size.chunk_rows)
+    if result.meta.get("chunked"):
+        raise SystemExit(0)  # nothing in memory to plot
 
     os.makedirs("labor_law_compliance/wage_hour_audit/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/timesheets_synthetic.csv")
-    dept_col = [c for c in df.columns if "dept" in c.lower() or
-                "department" in c.lower() or "division" in c.lower()]
-    dept_col = dept_col[0] if dept_col else None
-    hours_col = [c for c in df.columns if "hour" in c.lower() or
-                 "hrs" in c.lower()]
-    hours_col = hours_col[0] if hours_col else                 df.select_dtypes(include=[np.number]).columns[0]
-    ot_col = [c for c in df.columns if "over" in c.lower() or
-              "ot" in c.lower()]
-    ot_col = ot_col[0] if ot_col else None
+    df = result.data
 
     fig, axes = plt.subplots(1, 2, figsize=(13, 5))
 
-    if dept_col:
-        dept_means = df.groupby(dept_col)[hours_col].mean().sort_values(
-            ascending=True)
-        colors = ["#E8593C" if v > 40 else "#1B4F8A"
-                  for v in dept_means.values]
-        axes[0].barh(dept_means.index, dept_means.values,
-                     color=colors, edgecolor="none", height=0.6)
-        axes[0].axvline(40, color="#333", linestyle="--",
-                        linewidth=1, label="40-hr threshold")
-        axes[0].set_xlabel("Average hours worked", fontsize=10)
-        axes[0].set_title("Average Hours by Department\nRed = above 40-hr threshold",
-                          fontsize=11, fontweight="bold")
-        axes[0].legend(fontsize=9)
-        axes[0].grid(True, axis="x", alpha=0.3)
-    else:
-        axes[0].hist(df[hours_col], bins=30, color="#1B4F8A",
-                     edgecolor="white")
-        axes[0].axvline(40, color="#E8593C", linestyle="--",
-                        linewidth=1.5, label="40-hr threshold")
-        axes[0].set_xlabel("Hours worked", fontsize=10)
-        axes[0].set_ylabel("Count", fontsize=10)
-        axes[0].set_title("Hours Distribution", fontsize=11,
-                          fontweight="bold")
-        axes[0].legend(fontsize=9)
-        axes[0].grid(True, alpha=0.3)
-
-    if ot_col:
-        ot_vals = df[ot_col]
-        axes[1].hist(ot_vals, bins=30, color="#E8593C",
-                     edgecolor="white", alpha=0.8)
-        axes[1].set_xlabel("Overtime hours", fontsize=10)
-        axes[1].set_ylabel("Count", fontsize=10)
-        axes[1].set_title("Overtime Hours Distribution\nCompliance risk exposure",
-                          fontsize=11, fontweight="bold")
-        axes[1].grid(True, alpha=0.3)
-    else:
-        excess = (df[hours_col] - 40).clip(lower=0)
-        axes[1].hist(excess[excess > 0], bins=30,
-                     color="#E8593C", edgecolor="white", alpha=0.8)
-        axes[1].set_xlabel("Hours over 40", fontsize=10)
-        axes[1].set_ylabel("Count", fontsize=10)
-        axes[1].set_title("Excess Hours Distribution\nCompliance risk exposure",
-                          fontsize=11, fontweight="bold")
-        axes[1].grid(True, alpha=0.3)
+    dept_means = df.groupby("dept")["hours"].mean().sort_values(ascending=True)
+    colors = ["#E8593C" if v > 40 else "#1B4F8A"
+              for v in dept_means.values]
+    axes[0].barh(dept_means.index, dept_means.values,
+                 color=colors, edgecolor="none", height=0.6)
+    axes[0].axvline(40, color="#333", linestyle="--",
+                    linewidth=1, label="40-hr threshold")
+    axes[0].set_xlabel("Average hours worked", fontsize=10)
+    axes[0].set_title("Average Hours by Department\nRed = above 40-hr threshold",
+                      fontsize=11, fontweight="bold")
+    axes[0].legend(fontsize=9)
+    axes[0].grid(True, axis="x", alpha=0.3)
+
+    axes[1].hist(df["ot_hours"], bins=30, color="#E8593C",
+                 edgecolor="white", alpha=0.8)
+    axes[1].set_xlabel("Overtime hours", fontsize=10)
+    axes[1].set_ylabel("Count", fontsize=10)
+    axes[1].set_title("Overtime Hours Distribution\nCompliance risk exposure",
+                      fontsize=11, fontweight="bold")
+    axes[1].grid(True, alpha=0.3)
 
     plt.tight_layout()
     path = "labor_law_compliance/wage_hour_audit/figures/overtime_by_dept.png"
@@ -8,15 +8,19 @@ Simulate a basic Solow growth model with:
 - Consumption per worker
 
 Output:
-    data/processed/solow_simulation.csv
+    data/processed/solow_simulation.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
-def main():
+
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running solow.py ...")
 
     T = 100
@@ -26,13 +30,6 @@ def main():
     n = 0.01
     g = 0.02
 
-import os
-os.makedirs("macro_models/figures", exist_ok=True)
-
-plt.savefig("macro_models/figures/solow_convergence.png", dpi=150, bbox_inches="tight")
-plt.close()
-print("Saved: macro_models/figures/solow_convergence.png")
-
     k = np.zeros(T)
     y = np.zeros(T)
     c = np.zeros(T)
@@ -54,37 +51,29 @@ print("Saved: macro_models/figures/solow_convergence.png")
         }
     )
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "solow_simulation.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved Solow simulation to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "solow_simulation")
+    if out_path is not None:
+        print(f"Saved Solow simulation to: {out_path.resolve()}")
     print(df.head())
+    return ModuleResult(
+        df,
+        meta={"alpha": alpha, "s": s, "delta": delta, "n": n, "g": g},
+        path=out_path,
+    )
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import numpy as np
     import os
 
-    main()
+    result = main()
 
     os.makedirs("macro_models/figures", exist_ok=True)
 
-    import pandas as pd
-    df = pd.read_csv("data/processed/solow_simulation.csv")
-    k_col = [c for c in df.columns if "k" in c.lower() or
-             "capital" in c.lower()][0]             if any("k" in c.lower() or "capital" in c.lower()
-                   for c in df.columns)             else df.select_dtypes(include=[np.number]).columns[0]
-    y_col = [c for c in df.columns if c.lower() in ["y","output","gdp"] or
-             "output" in c.lower() or "gdp" in c.lower()]
-    y_col = y_col[0] if y_col else             df.select_dtypes(include=[np.number]).columns[1]
-    c_col = [c for c in df.columns if "c" in c.lower() or
-             "consump" in c.lower()]
-    c_col = c_col[0] if c_col else None
-    t = np.arange(len(df))
+    df = result.data
+    k_col, y_col, c_col = "k", "y", "c"
+    t = df["period"].to_numpy()
 
     fig, axes = plt.subplots(1, 2, figsize=(13, 5))
 
@@ -92,9 +81,8 @@ if __name__ == "__main__":
                  label="Capital per worker (k)")
     axes[0].plot(t, df[y_col], color="#E8593C", linewidth=2,
                  linestyle="--", label="Output per worker (y)")
-    if c_col:
-        axes[0].plot(t, df[c_col], color="#0F6E56", linewidth=2,
-                     linestyle=":", label="Consumption per worker (c)")
+    axes[0].plot(t, df[c_col], color="#0F6E56", linewidth=2,
+                 linestyle=":", label="Consumption per worker (c)")
     axes[0].axhline(df[k_col].iloc[-1], color="#1B4F8A",
                     linestyle=":", linewidth=1, alpha=0.5,
                     label=f"Steady-state k*={df[k_col].iloc[-1]:.1f}")
@@ -106,7 +94,8 @@ if __name__ == "__main__":
     axes[0].grid(True, alpha=0.3)
 
     savings_rates = np.linspace(0.05, 0.6, 40)
-    alpha, delta, n_rate = 0.33, 0.05, 0.02
+    alpha, delta = result.meta["alpha"], result.meta["delta"]
+    n_rate = 0.02
     k_stars = (savings_rates / (delta + n_rate)) ** (1 / (1 - alpha))
     y_stars = k_stars ** alpha
     c_stars = (1 - savings_rates) * y_stars
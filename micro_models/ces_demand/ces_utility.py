@@ -6,13 +6,17 @@ Simulate CES utility over two goods for a set of consumers.
 Not strictly used in the storyboards, but good micro / applied math content.
 
 Output:
-    data/processed/ces_utility_sim.csv
+    data/processed/ces_utility_sim.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
+
 
 def ces_utility(x, y, sigma=0.5):
     # CES with elasticity sigma and rho = (sigma-1)/sigma
@@ -20,7 +24,7 @@ def ces_utility(x, y, sigma=0.5):
     return (0.5 * (x ** rho) + 0.5 * (y ** rho)) ** (1.0 / rho)
 
 
-def main():
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running ces_utility.py ...")
 
     rng = np.random.default_rng(2025)
@@ -47,30 +51,23 @@ def main():
         }
     )
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "ces_utility_sim.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved CES utility simulation to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "ces_utility_sim")
+    if out_path is not None:
+        print(f"Saved CES utility simulation to: {out_path.resolve()}")
     print(df.head())
+    return ModuleResult(df, meta={"alpha": alpha, "sigma": 0.8}, path=out_path)
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import numpy as np
-    import pandas as pd
     import os
 
-    main()
+    result = main()
 
     os.makedirs("micro_models/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/ces_utility_sim.csv")
-    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    x1_col = num_cols[0] if len(num_cols) >= 2 else None
-    x2_col = num_cols[1] if len(num_cols) >= 2 else None
+    df = result.data
 
     fig, axes = plt.subplots(1, 2, figsize=(13, 5))
 
@@ -99,25 +96,12 @@ if __name__ == "__main__":
     axes[0].legend(fontsize=8, title="Utility level")
     axes[0].grid(True, alpha=0.3)
 
-    if x1_col and x2_col:
-        axes[1].scatter(df[x1_col], df[x2_col],
-                        alpha=0.25, color="#1B4F8A", s=10)
-        axes[1].set_xlabel(x1_col, fontsize=10)
-        axes[1].set_ylabel(x2_col, fontsize=10)
-        axes[1].set_title("Simulated Consumer Demand\nOptimal bundles across price scenarios",
-                          fontsize=11, fontweight="bold")
-        axes[1].grid(True, alpha=0.3)
-    else:
-        price_ratio = np.linspace(0.25, 4.0, 60)
-        demand_x1   = (alpha / (alpha + (1-alpha) *
-                       price_ratio ** (sigma-1))) * 10 / price_ratio
-        axes[1].plot(price_ratio, demand_x1, color="#1B4F8A",
-                     linewidth=2)
-        axes[1].set_xlabel("Price ratio (p1/p2)", fontsize=10)
-        axes[1].set_ylabel("Demand for good 1", fontsize=10)
-        axes[1].set_title("CES Demand Curve\nDemand response to relative price changes",
-                          fontsize=11, fontweight="bold")
-        axes[1].grid(True, alpha=0.3)
+    axes[1].scatter(df["x"], df["y"], alpha=0.25, color="#1B4F8A", s=10)
+    axes[1].set_xlabel("Good 1 demanded (x)", fontsize=10)
+    axes[1].set_ylabel("Good 2 demanded (y)", fontsize=10)
+    axes[1].set_title("Simulated Consumer Demand\nOptimal bundles across price scenarios",
+                      fontsize=11, fontweight="bold")
+    axes[1].grid(True, alpha=0.3)
 
     plt.tight_layout()
     path = "micro_models/figures/ces_indifference.png"
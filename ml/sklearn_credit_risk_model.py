@@ -5,19 +5,23 @@ sklearn_credit_risk_model.py
 Simulate a small credit risk dataset and fit scikit-learn classification models.
 
 Output:
-    data/processed/credit_risk_synthetic.csv
+    data/processed/credit_risk_synthetic.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
-from pathlib import Path
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import roc_auc_score, classification_report
 from sklearn.model_selection import train_test_split
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
 
-def main():
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running sklearn_credit_risk_model.py ...")
 
     rng = np.random.default_rng(2025)
@@ -46,7 +50,8 @@ def main():
         }
     )
 
-    X = df[["income", "utilization", "age"]].to_numpy()
+    features = ["income", "utilization", "age"]
+    X = df[features].to_numpy()
     y = df["default"].to_numpy()
 
     X_train, X_test, y_train, y_test = train_test_split(
@@ -72,55 +77,39 @@ def main():
     print("\nRandom Forest Classification Report:")
     print(classification_report(y_test, rf.predict(X_test)))
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "credit_risk_synthetic.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved credit risk dataset to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "credit_risk_synthetic")
+    if out_path is not None:
+        print(f"Saved credit risk dataset to: {out_path.resolve()}")
+    return ModuleResult(
+        df,
+        models={"logreg": logreg, "rf": rf},
+        meta={"features": features, "X_test": X_test, "y_test": y_test,
+              "auc_logreg": auc_logreg, "auc_rf": auc_rf},
+        path=out_path,
+    )
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import pandas as pd
-    import numpy as np
     import os
-    from sklearn.linear_model import LogisticRegression
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.metrics import roc_curve, auc
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import roc_curve
 
-    main()
+    result = main()
 
     os.makedirs("ml/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/credit_risk_synthetic.csv")
-    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    bin_cols = [c for c in num_cols if df[c].nunique() == 2]
-    target = bin_cols[0] if bin_cols else num_cols[-1]
-    features = [c for c in num_cols if c != target]
-
-    X = df[features].values
-    y = df[target].values
-    X_tr, X_te, y_tr, y_te = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y)
-    scaler = StandardScaler()
-    X_tr_s = scaler.fit_transform(X_tr)
-    X_te_s  = scaler.transform(X_te)
-
-    lr = LogisticRegression(max_iter=500).fit(X_tr_s, y_tr)
-    rf = RandomForestClassifier(n_estimators=100,
-                                random_state=42).fit(X_tr, y_tr)
-
-    fpr_lr, tpr_lr, _ = roc_curve(y_te, lr.predict_proba(X_te_s)[:,1])
+    lr, rf = result.models["logreg"], result.models["rf"]
+    X_te, y_te = result.meta["X_test"], result.meta["y_test"]
+    features = result.meta["features"]
+
+    fpr_lr, tpr_lr, _ = roc_curve(y_te, lr.predict_proba(X_te)[:,1])
     fpr_rf, tpr_rf, _ = roc_curve(y_te, rf.predict_proba(X_te)[:,1])
-    auc_lr = auc(fpr_lr, tpr_lr)
-    auc_rf = auc(fpr_rf, tpr_rf)
+    auc_lr = result.meta["auc_logreg"]
+    auc_rf = result.meta["auc_rf"]
 
     importances = rf.feature_importances_
-    feat_labels = [f"Feature {i+1}" for i in range(len(features))]                   if len(features) > 8 else features
+    feat_labels = features
     idx = np.argsort(importances)
 
     fig, axes = plt.subplots(1, 2, figsize=(13, 5))
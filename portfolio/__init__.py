@@ -0,0 +1,7 @@
+"""
+Shared helpers for the portfolio scripts (output registration, dataset I/O,
+result objects).
+
+Scripts run as `python path/to/script.py`, so they put the repository root
+on sys.path before importing from this package.
+"""
@@ -0,0 +1,263 @@
+"""
+Columnar storage for the datasets under data/processed/.
+
+`write_dataset` stores a DataFrame as Parquet (default) or Feather through
+pyarrow, keeping dtypes (categoricals, small ints, float32) intact, and by
+default also exports the CSV that Tableau workbooks read. `read_dataset` loads
+the best copy available (Parquet, then Feather, then CSV) and supports column
+projection and pyarrow-style filters; on Parquet the filters prune whole row
+groups before any data is decoded.
+
+`write_chunks` streams an iterable of blocks into the same layouts for
+datasets too large to build in memory. All three cast registered datasets to
+their compact dtypes (portfolio.schemas) on the way in and out.
+
+pyarrow is optional: without it all three fall back to CSV.
+
+    write_dataset(df, "data/processed/wages_synthetic")        # .parquet + .csv
+    read_dataset("data/processed/wages_synthetic", columns=["wage", "gender"],
+                 filters=[("industry", "in", ["tech", "health"])])
+"""
+from __future__ import annotations
+
+import operator
+import os
+import warnings
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from portfolio.outputs import register_output
+from portfolio.schemas import apply_schema
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAVE_ARROW = True
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    HAVE_ARROW = False
+
+FORMATS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+DEFAULT_FORMAT = os.getenv("DATASET_FORMAT", "parquet")
+ROW_GROUP_SIZE = 128 * 1024  # rows; small enough for filters to skip most of a large file
+
+PathLike = Union[str, "os.PathLike[str]"]
+Filter = Tuple[str, str, Any]
+
+_OPS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _stem(path: PathLike) -> Path:
+    path = Path(path)
+    return path.with_suffix("") if path.suffix in FORMATS.values() else path
+
+
+def _format_of(path: PathLike, fmt: Optional[str]) -> str:
+    if fmt is None:
+        suffix = Path(path).suffix
+        fmt = next((f for f, s in FORMATS.items() if s == suffix), DEFAULT_FORMAT)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown dataset format {fmt!r}; expected one of {sorted(FORMATS)}")
+    if fmt != "csv" and not HAVE_ARROW:
+        warnings.warn(f"pyarrow is not installed; writing CSV instead of {fmt}", stacklevel=3)
+        fmt = "csv"
+    return fmt
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    path: PathLike,
+    fmt: Optional[str] = None,
+    csv: bool = True,
+    register: bool = True,
+    row_group_size: int = ROW_GROUP_SIZE,
+    schema: bool = True,
+) -> Path:
+    """Write `df` to `path` (suffix optional) and return the file written.
+
+    The format comes from `fmt`, else the suffix, else $DATASET_FORMAT
+    (parquet). csv=True also exports `<stem>.csv`; register=True records
+    both files with portfolio.outputs.register_output; schema=True casts to
+    the dataset's registered dtypes first.
+    """
+    fmt = _format_of(path, fmt)
+    stem = _stem(path)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    if schema:
+        df = apply_schema(df, stem)
+    target = stem.with_suffix(FORMATS[fmt])
+    if fmt == "parquet":
+        df.to_parquet(target, index=False, row_group_size=row_group_size)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(target)
+    written = [target]
+    if fmt == "csv" or csv:
+        df.to_csv(stem.with_suffix(".csv"), index=False)
+        written.append(stem.with_suffix(".csv"))
+    if register:
+        for p in dict.fromkeys(written):
+            register_output(p)
+    return target
+
+
+def _stream_schema(schema: Any, fmt: str) -> Any:
+    """Arrow schema that every chunk's categoricals fit: int32 dictionary
+    indices for Parquet (the first chunk may need only int8), plain values
+    for Feather."""
+    import pyarrow as pa
+
+    fields = []
+    for f in schema:
+        if pa.types.is_dictionary(f.type):
+            value_type = f.type.value_type
+            f = f.with_type(
+                pa.dictionary(pa.int32(), value_type) if fmt == "parquet" else value_type
+            )
+        fields.append(f)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def write_chunks(
+    chunks: Iterable[pd.DataFrame],
+    path: PathLike,
+    fmt: Optional[str] = None,
+    csv: bool = True,
+    register: bool = True,
+    row_group_size: int = ROW_GROUP_SIZE,
+    schema: bool = True,
+) -> Path:
+    """Stream DataFrames with identical columns and dtypes into one dataset.
+
+    Same formats and options as `write_dataset`, but each chunk is appended
+    and released as it arrives, so the full table is never held in memory.
+    Categoricals may differ in categories from chunk to chunk. Feather
+    stores them as plain values, since an Arrow IPC file allows one
+    dictionary per column; read_dataset restores registered categories.
+    """
+    fmt = _format_of(path, fmt)
+    stem = _stem(path)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    target = stem.with_suffix(FORMATS[fmt])
+    csv_path = stem.with_suffix(".csv") if fmt == "csv" or csv else None
+    writer: Any = None
+    arrow_schema: Any = None
+    i = -1
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk = chunk.reset_index(drop=True)
+            if schema:
+                chunk = apply_schema(chunk, stem)
+            if fmt != "csv":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    arrow_schema = _stream_schema(
+                        pa.Schema.from_pandas(chunk, preserve_index=False), fmt
+                    )
+                    writer = (
+                        pq.ParquetWriter(target, arrow_schema)
+                        if fmt == "parquet"
+                        else pa.ipc.new_file(target, arrow_schema)  # Feather v2 is Arrow IPC
+                    )
+                table = pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False)
+                if fmt == "parquet":
+                    writer.write_table(table, row_group_size=row_group_size)
+                else:
+                    writer.write_table(table)
+            if csv_path is not None:
+                chunk.to_csv(csv_path, index=False, header=i == 0, mode="w" if i == 0 else "a")
+    finally:
+        if writer is not None:
+            writer.close()
+    if i < 0:
+        raise ValueError(f"no chunks to write to {target}")
+    written = [target] + ([csv_path] if csv_path is not None else [])
+    if register:
+        for p in dict.fromkeys(written):
+            register_output(p)
+    return target
+
+
+def dataset_path(path: PathLike) -> Path:
+    """The copy `read_dataset` would load: an explicit suffix, else the best format on disk."""
+    path = Path(path)
+    if path.suffix in FORMATS.values():
+        return path
+    order = ("parquet", "feather", "csv") if HAVE_ARROW else ("csv",)
+    for fmt in order:
+        candidate = path.with_suffix(FORMATS[fmt])
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"no dataset at {path} (.parquet/.feather/.csv)")
+
+
+def _mask(df: pd.DataFrame, filters: Iterable[Filter]) -> pd.Series:
+    keep = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        if op == "in":
+            keep &= df[col].isin(value)
+        elif op == "not in":
+            keep &= ~df[col].isin(value)
+        elif op in _OPS:
+            keep &= _OPS[op](df[col], value)
+        else:
+            raise ValueError(f"unsupported filter operator {op!r}")
+    return keep
+
+
+def apply_filters(df: pd.DataFrame, filters: Optional[Sequence]) -> pd.DataFrame:
+    """Row filter in pyarrow's DNF: a list of (col, op, value) tuples ANDed
+    together, or a list of such lists ORed together."""
+    if not filters:
+        return df
+    groups: List[Sequence[Filter]] = (
+        [filters] if isinstance(filters[0], tuple) else list(filters)  # type: ignore[list-item]
+    )
+    keep = pd.Series(False, index=df.index)
+    for group in groups:
+        keep |= _mask(df, group)
+    return df[keep].reset_index(drop=True)
+
+
+def read_dataset(
+    path: PathLike,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Sequence] = None,
+    schema: bool = True,
+) -> pd.DataFrame:
+    """Load a dataset written by `write_dataset` (or any CSV).
+
+    `columns` limits what is decoded; `filters` uses pyarrow's DNF syntax,
+    e.g. [("year", ">=", 2020), ("metro", "in", ["Phoenix"])]. schema=True
+    casts to the dataset's registered dtypes (a no-op for Parquet it wrote).
+    """
+    df = _read(dataset_path(path), columns, filters)
+    return apply_schema(df, path) if schema else df
+
+
+def _read(
+    source: Path, columns: Optional[Sequence[str]], filters: Optional[Sequence]
+) -> pd.DataFrame:
+    if source.suffix == ".parquet":
+        return pd.read_parquet(source, columns=list(columns) if columns else None, filters=filters)
+    needed = None
+    if columns is not None:
+        # filter columns must be decoded even when they are not returned
+        flat = filters if not filters or isinstance(filters[0], tuple) else sum(filters, [])
+        needed = list(dict.fromkeys([*columns, *(c for c, _, _ in flat or ())]))
+    if source.suffix == ".feather":
+        df = pd.read_feather(source, columns=needed)
+    else:
+        df = pd.read_csv(source, usecols=needed)
+    df = apply_filters(df, filters)
+    return df[list(columns)] if columns is not None else df
@@ -0,0 +1,216 @@
+"""
+Vectorized generators for the shared teaching datasets.
+
+One function per dataset takes a numpy Generator and a size and returns a
+DataFrame; nothing loops per row. Each dataset draws from its own stream,
+`SeedSequence(seed, spawn_key=(i,))` with i its position in `DATASETS`, so
+any subset can be built in any order, in parallel, with the same result.
+Append new datasets at the end so existing streams stay put.
+
+    python -m portfolio.generators                       # all, into data/processed
+    python -m portfolio.generators panel_sim rd_sim --scale 1000 --jobs 4
+    python -m portfolio.generators --zip econ_datasets_bundle.zip
+
+Files go through portfolio.dataset_io (Parquet plus the CSV export, compact
+dtypes from portfolio.schemas). --zip streams one CSV per dataset straight
+into the archive as each one is generated; nothing is staged on disk.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):  # run as a script by run_all rather than with -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from portfolio.dataset_io import write_dataset  # noqa: E402
+from portfolio.outputs import register_output  # noqa: E402
+from portfolio.scale import DEFAULT_SCALE  # noqa: E402
+from portfolio.schemas import apply_schema  # noqa: E402
+
+SEED = 2025
+
+
+def matched_psm(rng: np.random.Generator, n: int = 1500) -> pd.DataFrame:
+    """Selection on observables: treatment depends on x1, x2; true effect 1.5."""
+    x1 = rng.normal(size=n)
+    x2 = rng.normal(size=n)
+    ps = 1 / (1 + np.exp(-(0.5 * x1 + 0.8 * x2)))
+    t = rng.binomial(1, ps)
+    tau = 1.5
+    eps = rng.normal(scale=0.5, size=n)
+    y = 3 + 1.0 * x1 + 0.5 * x2 + tau * t + eps
+    return pd.DataFrame({"y": y, "t": t, "x1": x1, "x2": x2, "ps": ps})
+
+
+def panel_sim(rng: np.random.Generator, n: int = 120, periods: int = 8) -> pd.DataFrame:
+    """Balanced panel of `n` units with unit effects; slope on x is 1.5."""
+    alpha = rng.normal(0, 1, n)
+    x = rng.normal(size=(n, periods))
+    u = rng.normal(size=(n, periods))
+    y = 1.0 + 1.5 * x + alpha[:, None] + u
+    return pd.DataFrame(
+        {
+            "unit": np.repeat(np.arange(n), periods),
+            "time": np.tile(np.arange(periods), n),
+            "x": x.ravel(),
+            "y": y.ravel(),
+        }
+    )
+
+
+def did_sim(rng: np.random.Generator, n: int = 2000) -> pd.DataFrame:
+    """Repeated cross-section for a 2x2 DiD; true effect 2.0."""
+    treat = rng.binomial(1, 0.5, n)
+    post = rng.binomial(1, 0.5, n)
+    eps = rng.normal(size=n)
+    tau = 2.0
+    y = 5 + 1.0 * treat + 1.0 * post + tau * (treat * post) + eps
+    return pd.DataFrame({"y": y, "treat": treat, "post": post})
+
+
+def rd_sim(rng: np.random.Generator, n: int = 3000) -> pd.DataFrame:
+    """Sharp RD at x = 0 with a linear running variable; jump 1.5."""
+    x = rng.uniform(-2, 2, n)
+    tau = 1.5
+    y0 = 2 + 0.8 * x + rng.normal(scale=0.5, size=n)
+    y = np.where(x >= 0, y0 + tau, y0)
+    return pd.DataFrame({"x": x, "y": y, "t": (x >= 0).astype(int)})
+
+
+def var_cointegration(rng: np.random.Generator, n: int = 200) -> pd.DataFrame:
+    """Two I(1) series sharing one stochastic trend, `n` periods."""
+    e1, e2 = rng.normal(size=n), rng.normal(size=n)
+    y1 = np.cumsum(e1) + 0.5 * rng.normal(size=n)
+    y2 = y1 + 0.5 * e2
+    return pd.DataFrame({"y1": y1, "y2": y2})
+
+
+def garch_like_returns(rng: np.random.Generator, n: int = 1000) -> pd.DataFrame:
+    """Returns with randomly varying volatility, `n` periods."""
+    vol = np.abs(rng.normal(size=n)) * 0.8 + 0.2
+    r = rng.normal(scale=vol)
+    return pd.DataFrame({"returns": r, "approx_vol": vol})
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str  # also the file stem
+    make: Callable[..., pd.DataFrame]
+    n: int  # default size: rows, panel units or periods
+
+
+DATASETS: Dict[str, Dataset] = {
+    d.name: d
+    for d in (
+        Dataset("matched_psm_source", matched_psm, 1500),
+        Dataset("panel_sim", panel_sim, 120),
+        Dataset("did_sim", did_sim, 2000),
+        Dataset("rd_sim", rd_sim, 3000),
+        Dataset("var_cointegration", var_cointegration, 200),
+        Dataset("garch_like_returns", garch_like_returns, 1000),
+    )
+}
+
+
+def rng_for(name: str, seed: int = SEED) -> np.random.Generator:
+    """The dataset's own stream: independent of which others are built."""
+    key = list(DATASETS).index(name)
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(key,)))
+
+
+def generate(name: str, scale: float = 1.0, seed: int = SEED) -> pd.DataFrame:
+    """Build one dataset at `scale` times its default size, with compact dtypes."""
+    if name not in DATASETS:
+        raise KeyError(f"unknown dataset {name!r}; expected one of {sorted(DATASETS)}")
+    spec = DATASETS[name]
+    n = max(1, round(spec.n * scale))
+    return apply_schema(spec.make(rng_for(name, seed), n), name)
+
+
+def _write_zip_entry(archive: zipfile.ZipFile, name: str, df: pd.DataFrame) -> None:
+    with archive.open(f"{name}.csv", "w", force_zip64=True) as raw:
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as text:
+            df.to_csv(text, index=False)
+
+
+def build(
+    names: Sequence[str],
+    out_dir: Optional[Path] = None,
+    zip_path: Optional[Path] = None,
+    scale: float = 1.0,
+    seed: int = SEED,
+    jobs: int = 1,
+) -> List[Path]:
+    """Generate `names` across `jobs` processes; write each to `out_dir` and/or
+    into the `zip_path` archive as it arrives, in the order given."""
+    pool: Optional[Executor] = ProcessPoolExecutor(jobs) if jobs > 1 and len(names) > 1 else None
+    written: List[Path] = []
+    archive = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) if zip_path else None
+    try:
+        pending = [pool.submit(generate, name, scale, seed) for name in names] if pool else None
+        for i, name in enumerate(names):
+            df = pending[i].result() if pending else generate(name, scale, seed)
+            if out_dir is not None:
+                written.append(write_dataset(df, out_dir / name))
+            if archive is not None:
+                _write_zip_entry(archive, name, df)
+            print(f"  {name}: {len(df):,} rows")
+            del df
+    finally:
+        if archive is not None:
+            archive.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    if zip_path:
+        register_output(zip_path, gather=False)
+        written.append(Path(zip_path))
+    return written
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Build the shared synthetic datasets.")
+    ap.add_argument("names", nargs="*", help=f"datasets to build (default: {', '.join(DATASETS)})")
+    ap.add_argument(
+        "--outdir",
+        type=Path,
+        help="directory for .parquet/.csv files (default $OUTPUT_DIR or data/processed; "
+        "skipped when only --zip is given)",
+    )
+    ap.add_argument("--zip", type=Path, help="also stream the CSVs into this zip archive")
+    ap.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="multiplier on every size")
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=0, help="processes (default one per dataset, up to #CPUs)"
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    names = args.names or list(DATASETS)
+    unknown = sorted(set(names) - set(DATASETS))
+    if unknown:
+        print(f"unknown dataset(s): {', '.join(unknown)}; choose from {', '.join(DATASETS)}")
+        return 2
+    out_dir = args.outdir
+    if out_dir is None and args.zip is None:
+        out_dir = Path(os.getenv("OUTPUT_DIR", "data/processed"))
+    jobs = args.jobs or min(len(names), os.cpu_count() or 1)
+    written = build(names, out_dir, args.zip, args.scale, args.seed, jobs)
+    print("Wrote:", *(f"  {p}" for p in written), sep="\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
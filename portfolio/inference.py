@@ -0,0 +1,20 @@
+"""
+Shared pieces of the estimators' result objects.
+"""
+from __future__ import annotations
+
+from typing import Tuple
+
+from scipy import stats
+
+
+class NormalInterval:
+    """Mixin for results with `estimate` and `std_error`: a normal-approximation
+    confidence interval."""
+
+    estimate: float
+    std_error: float
+
+    def conf_int(self, level: float = 0.95) -> Tuple[float, float]:
+        z = stats.norm.ppf(0.5 + level / 2)
+        return self.estimate - z * self.std_error, self.estimate + z * self.std_error
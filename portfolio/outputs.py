@@ -0,0 +1,103 @@
+"""
+Output registration for scripts run by scripts/run_all.py.
+
+Every file a script writes is registered with `register_output`, which appends
+one JSON line to the script's manifest under $OUTPUT_MANIFEST_DIR (run_all sets
+it to artifacts/outputs/). The orchestrator gathers outputs from these manifests
+instead of walking the repository for CSVs. Outside run_all, with the variable
+unset, registration is a no-op.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+_ENV_DIR = os.getenv("OUTPUT_MANIFEST_DIR")
+MANIFEST_DIR: Optional[Path] = Path(_ENV_DIR) if _ENV_DIR else None
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def script_id() -> str:
+    """Manifest key of the running script (set by run_all, else argv[0])."""
+    explicit = os.getenv("RUN_ALL_SCRIPT")
+    if explicit:
+        return explicit
+    argv0 = Path(sys.argv[0]).resolve() if sys.argv and sys.argv[0] else None
+    if argv0 is None or not argv0.suffix:
+        return "interactive"
+    try:
+        argv0 = argv0.relative_to(REPO_ROOT)
+    except ValueError:
+        pass
+    return manifest_key(argv0)
+
+
+def manifest_key(script: PathLike) -> str:
+    return Path(script).with_suffix("").as_posix().strip("/").replace("/", "__")
+
+
+def _portable(path: Path) -> str:
+    path = path.resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def register_output(
+    path: PathLike,
+    gather: bool = True,
+    key: Optional[str] = None,
+    manifest_dir: Optional[PathLike] = None,
+) -> Path:
+    """Record that the running script wrote `path`; returns it unchanged.
+
+    gather=False keeps the file out of OUTPUT_DIR (e.g. staging files).
+    `key`/`manifest_dir` let the orchestrator register on a script's behalf.
+    Nothing is written without a manifest directory.
+    """
+    path = Path(path)
+    if manifest_dir is None and MANIFEST_DIR is None:
+        return path
+    manifest_dir = Path(MANIFEST_DIR if manifest_dir is None else manifest_dir)
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    entry = {"path": _portable(path), "gather": gather}
+    with (manifest_dir / f"{key or script_id()}.jsonl").open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return path
+
+
+def read_manifest(key: str, manifest_dir: Optional[PathLike] = None) -> List[Dict]:
+    manifest_dir = MANIFEST_DIR if manifest_dir is None else manifest_dir
+    if manifest_dir is None:
+        return []
+    path = Path(manifest_dir) / f"{key}.jsonl"
+    if not path.exists():
+        return []
+    entries: Dict[str, Dict] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            entry = json.loads(line)
+            entries[entry["path"]] = entry  # last registration wins
+    return list(entries.values())
+
+
+def read_all_manifests(manifest_dir: Optional[PathLike] = None) -> List[Dict]:
+    manifest_dir = MANIFEST_DIR if manifest_dir is None else manifest_dir
+    entries: List[Dict] = []
+    if manifest_dir is None:
+        return entries
+    for path in sorted(Path(manifest_dir).glob("*.jsonl")):
+        entries.extend(read_manifest(path.stem, manifest_dir))
+    return entries
+
+
+def clear_manifest(key: str, manifest_dir: Optional[PathLike] = None) -> None:
+    manifest_dir = MANIFEST_DIR if manifest_dir is None else manifest_dir
+    if manifest_dir is not None:
+        (Path(manifest_dir) / f"{key}.jsonl").unlink(missing_ok=True)
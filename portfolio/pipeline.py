@@ -0,0 +1,243 @@
+"""
+Pipeline definition of every project module in the portfolio.
+
+Each `Step` names a module's entry point, the working directory it expects
+(most scripts write repo-relative paths, the stand-alone project folders write
+next to themselves), and the files it reads and writes. `scripts/run_all.py
+--portfolio` runs these steps alongside scripts/*.py, so the whole portfolio is
+regenerated, parallelized, cached and timed as one job.
+
+Paths are repo-relative; "$OUTPUT_DIR" expands to the output directory. Every
+output has exactly one writer among the steps and scripts/*.py, so the final
+file never depends on run order. Steps whose `requires` modules are not
+importable are skipped rather than failed.
+
+Not listed: geographic_market_forecasting/fetch_bls_data.py and check_api.py
+(need network access and a BLS API key; their output is committed under
+data/raw/) and tools/make_notebooks_addons.py (see `make nb-addons`).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    entry: str  # repo-relative script path
+    cwd: str = "."  # repo-relative working directory
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()  # optional modules the step cannot run without
+    args: Tuple[str, ...] = ()  # extra command-line arguments
+
+    @property
+    def path(self) -> Path:
+        return Path(self.entry)
+
+
+STEPS: Tuple[Step, ...] = (
+    # Shared simulated datasets; var_cointegration and garch_like_returns are
+    # written by their own time-series modules below.
+    Step(
+        "generators",
+        "portfolio/generators.py",
+        outputs=tuple(
+            f"data/processed/{name}{suffix}"
+            for name in ("matched_psm_source", "panel_sim", "did_sim", "rd_sim")
+            for suffix in (".parquet", ".csv")
+        ),
+        args=("matched_psm_source", "panel_sim", "did_sim", "rd_sim"),
+    ),
+    Step(
+        "bayes_posterior_policy_effect",
+        "bayesian/bayes_posterior_policy_effect.py",
+        outputs=(
+            "data/processed/bayes_policy_effect.parquet",
+            "data/processed/bayes_policy_effect.csv",
+            "bayesian/figures/bayes_posterior.png",
+        ),
+    ),
+    Step(
+        "qcew_ces_mock",
+        "bls_programs/qcew_ces_mock/qcew_ces_mock.py",
+        outputs=(
+            "data/processed/employment_qcew_mock.parquet",
+            "data/processed/employment_qcew_mock.csv",
+            "bls_programs/qcew_ces_mock/figures/employment_by_sector.png",
+        ),
+    ),
+    Step(
+        "diff_in_diff_policy_evaluation",
+        "causal_inference/diff_in_diff_policy_evaluation.py",
+        outputs=(
+            "data/processed/did_policy_sim.parquet",
+            "data/processed/did_policy_sim.csv",
+            "causal_inference/figures/did_figure_1.png",
+            "causal_inference/figures/did_figure_2.png",
+        ),
+    ),
+    Step(
+        "credit_risk_model",
+        "credit-risk-scorecard/credit_risk_model.py",
+        cwd="credit-risk-scorecard",
+        outputs=(
+            "credit-risk-scorecard/credit_applicants.csv",
+            "credit-risk-scorecard/scorecard_band_performance.csv",
+            "credit-risk-scorecard/credit_risk_scorecard.png",
+        ),
+    ),
+    Step(
+        "pytorch_income_classifier",
+        "deep_learning/pytorch_income_classifier.py",
+        outputs=(
+            "data/processed/income_classifier_data.parquet",
+            "data/processed/income_classifier_data.csv",
+            "deep_learning/figures/training_loss.png",
+        ),
+        requires=("torch",),
+    ),
+    Step("did_basic", "econometrics/diff_in_diff/did_basic.py"),
+    Step(
+        "robust_se_diagnostics",
+        "econometrics/heteroskedasticity_robust_inference/robust_se_diagnostics.py",
+    ),
+    Step(
+        "iv_2sls",
+        "econometrics/iv_2sls/iv_2sls.py",
+        outputs=("econometrics/figures/iv_2sls_results.png",),
+    ),
+    Step("ols_sklearn", "econometrics/linear_regression/ols_sklearn.py"),
+    Step("binary_models", "econometrics/lpm_logit_probit/binary_models.py"),
+    Step("panel_fe_re", "econometrics/panel_fixed_random/panel_fe_re.py"),
+    Step("psm_demo", "econometrics/psm_matching/psm_demo.py"),
+    Step(
+        "rd_local_linear",
+        "econometrics/rd_design/rd_local_linear.py",
+        outputs=(
+            "econometrics/figures/rd_discontinuity.png",
+            "econometrics/figures/rd_bandwidth_sensitivity.png",
+        ),
+    ),
+    Step(
+        "geo_market_forecast",
+        "geographic_market_forecasting/geo_market_forecast.py",
+        cwd="geographic_market_forecasting",
+        inputs=("geographic_market_forecasting/data/raw/bls_metro_employment.csv",),
+        outputs=(
+            "geographic_market_forecasting/data/processed/holdout_forecast_results.csv",
+            "geographic_market_forecasting/figures/holdout_forecast_by_metro.png",
+            "geographic_market_forecasting/figures/mape_by_metro.png",
+            "geographic_market_forecasting/figures/feature_coefficients.png",
+        ),
+    ),
+    Step(
+        "healthcare_did_analysis",
+        "healthcare-roi-eval/healthcare_did_analysis.py",
+        cwd="healthcare-roi-eval",
+        outputs=(
+            "healthcare-roi-eval/patient_panel_data.csv",
+            "healthcare-roi-eval/descriptive_stats.csv",
+            "healthcare-roi-eval/healthcare_roi_analysis.png",
+        ),
+    ),
+    Step(
+        "housing_market_analysis",
+        "housing-market-dashboard/housing_market_analysis.py",
+        cwd="housing-market-dashboard",
+        outputs=(
+            "housing-market-dashboard/housing_market_data.csv",
+            "housing-market-dashboard/housing_market_dashboard.png",
+        ),
+    ),
+    Step(
+        "wage_gap",
+        "labor_econ/wage_gap_analysis/wage_gap.py",
+        outputs=(
+            "data/processed/wages_synthetic.parquet",
+            "data/processed/wages_synthetic.csv",
+            "labor_econ/wage_gap_analysis/figures/wage_distribution.png",
+        ),
+    ),
+    Step(
+        "wage_hour_audit",
+        "labor_law_compliance/wage_hour_audit/wage_hour_audit.py",
+        outputs=(
+            "data/processed/timesheets_synthetic.parquet",
+            "data/processed/timesheets_synthetic.csv",
+            "labor_law_compliance/wage_hour_audit/figures/overtime_by_dept.png",
+        ),
+    ),
+    Step(
+        "solow",
+        "macro_models/solow_growth/solow.py",
+        outputs=(
+            "data/processed/solow_simulation.parquet",
+            "data/processed/solow_simulation.csv",
+            "macro_models/figures/solow_convergence.png",
+        ),
+    ),
+    Step(
+        "ces_utility",
+        "micro_models/ces_demand/ces_utility.py",
+        outputs=(
+            "data/processed/ces_utility_sim.parquet",
+            "data/processed/ces_utility_sim.csv",
+            "micro_models/figures/ces_indifference.png",
+        ),
+    ),
+    Step(
+        "sklearn_credit_risk_model",
+        "ml/sklearn_credit_risk_model.py",
+        outputs=(
+            "data/processed/credit_risk_synthetic.parquet",
+            "data/processed/credit_risk_synthetic.csv",
+            "ml/figures/roc_curves.png",
+        ),
+    ),
+    Step(
+        "regularized_employment_regression",
+        "regression/regularized_employment_regression.py",
+        outputs=(
+            "data/processed/regularized_employment_regression.parquet",
+            "data/processed/regularized_employment_regression.csv",
+            "regression/figures/ridge_coef_path.png",
+        ),
+    ),
+    Step(
+        "arima_simulated",
+        "time_series/arima_gdp/arima_simulated.py",
+        outputs=(
+            "data/processed/gdp_growth_synthetic.parquet",
+            "data/processed/gdp_growth_synthetic.csv",
+            "time_series/figures/arima_forecast.png",
+        ),
+    ),
+    Step(
+        "garch_demo",
+        "time_series/garch_volatility/garch_demo.py",
+        outputs=(
+            "data/processed/garch_like_returns.parquet",
+            "data/processed/garch_like_returns.csv",
+            "time_series/figures/garch_volatility.png",
+        ),
+    ),
+    Step(
+        "var_irf_coint",
+        "time_series/var_irf_cointegration/var_irf_coint.py",
+        outputs=(
+            "data/processed/var_cointegration.parquet",
+            "data/processed/var_cointegration.csv",
+            "time_series/figures/var_irf.png",
+        ),
+    ),
+)
+
+_BY_ENTRY: Dict[str, Step] = {s.path.as_posix(): s for s in STEPS}
+
+
+def step_for(path: Path) -> Optional[Step]:
+    """The registered step whose entry point is `path`, if any."""
+    return _BY_ENTRY.get(Path(path).as_posix())
@@ -0,0 +1,36 @@
+"""
+Typed hand-off between a project module's simulation and its figures.
+
+`main()` returns a `ModuleResult` holding the simulated DataFrame, the fitted
+models and the parameters the figure code needs, so the `__main__` block plots
+straight from memory instead of re-reading the CSV and guessing column names.
+Writing the dataset is an optional sink: `main(out_dir=None)` skips the disk.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from portfolio.dataset_io import PathLike, write_dataset
+
+DEFAULT_OUT_DIR = Path("data/processed")
+
+
+@dataclass
+class ModuleResult:
+    """Output of one simulation run."""
+
+    data: pd.DataFrame
+    models: Dict[str, Any] = field(default_factory=dict)  # fitted estimators/results by name
+    meta: Dict[str, Any] = field(default_factory=dict)  # parameters, metrics, test splits
+    path: Optional[Path] = None  # file the sink wrote, if any
+
+
+def sink(df: pd.DataFrame, out_dir: Optional[PathLike], name: str) -> Optional[Path]:
+    """Write `df` as `<out_dir>/<name>` through write_dataset; None skips it."""
+    if out_dir is None:
+        return None
+    return write_dataset(df, Path(out_dir) / name)
@@ -0,0 +1,132 @@
+"""
+Sample size and chunked generation for the simulators.
+
+Every simulator accepts `--n` (its own unit: applicants, workers, patients,
+employees) or `--scale` (a multiplier on its default size); $DATA_SCALE
+applies a scale to a whole `run_all` pass. Up to `--chunk-rows` output rows
+the data are drawn in memory as before. Beyond that the module switches to
+chunked mode: block i (a whole number of units, about `--chunk-rows` rows) is
+drawn from its own generator spawned from `SeedSequence(seed)`, so blocks are
+independent and reproducible for a given (seed, chunk rows), and each block
+is appended to disk and dropped, so peak memory stays at one block however
+large `--n` is.
+
+    size = parse_size(2000, "Minimal wage gap example")
+    if size.chunked:
+        stream_dataset(simulate, size, 123, "data/processed/wages_synthetic")
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from portfolio.dataset_io import PathLike, write_chunks
+
+CHUNK_ROWS = int(os.getenv("DATA_CHUNK_ROWS", 250_000))  # output rows per block
+DEFAULT_SCALE = float(os.getenv("DATA_SCALE", 1.0))
+
+
+@dataclass(frozen=True)
+class Size:
+    n: int  # units to simulate
+    chunk_rows: int = CHUNK_ROWS
+    rows_per_unit: int = 1  # e.g. 26 weekly timesheet rows per employee
+
+    @property
+    def block_units(self) -> int:
+        return max(1, self.chunk_rows // self.rows_per_unit)
+
+    @property
+    def chunked(self) -> bool:
+        return self.n > self.block_units
+
+
+def add_size_args(parser: argparse.ArgumentParser, default_n: int) -> argparse.ArgumentParser:
+    """Add the shared --n/--scale/--chunk-rows options to `parser`."""
+    group = parser.add_argument_group("sample size")
+    sizes = group.add_mutually_exclusive_group()
+    sizes.add_argument("--n", type=int, help=f"units to simulate (default {default_n:,})")
+    sizes.add_argument(
+        "--scale",
+        type=float,
+        default=DEFAULT_SCALE,
+        help="multiplier on the default size (default $DATA_SCALE or 1)",
+    )
+    group.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=CHUNK_ROWS,
+        help="rows per block; larger runs stream to disk (default $DATA_CHUNK_ROWS or %(default)s)",
+    )
+    return parser
+
+
+def size_from_args(args: argparse.Namespace, default_n: int, rows_per_unit: int = 1) -> Size:
+    n = args.n if args.n is not None else round(default_n * args.scale)
+    if n < 1 or args.chunk_rows < 1:
+        raise ValueError(f"--n and --chunk-rows must be positive (got {n}, {args.chunk_rows})")
+    return Size(n, args.chunk_rows, rows_per_unit)
+
+
+def parse_size(
+    default_n: int,
+    description: Optional[str] = None,
+    rows_per_unit: int = 1,
+    argv: Optional[Sequence[str]] = None,
+) -> Size:
+    """Parse the size options from the command line, ignoring any others
+    (run_all passes --outdir to every script)."""
+    parser = add_size_args(argparse.ArgumentParser(description=description), default_n)
+    args, _ = parser.parse_known_args(argv)
+    return size_from_args(args, default_n, rows_per_unit)
+
+
+def block_sizes(n: int, block: int) -> List[int]:
+    """Split `n` units into full blocks of `block` units and a remainder."""
+    full, rest = divmod(n, block)
+    return [block] * full + ([rest] if rest else [])
+
+
+def block_rngs(seed: int, n_blocks: int) -> List[np.random.Generator]:
+    """One independent generator per block, spawned from SeedSequence(seed)."""
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_blocks)]
+
+
+def iter_blocks(
+    simulate: Callable[[np.random.Generator, int, int], pd.DataFrame], size: Size, seed: int
+) -> Iterator[pd.DataFrame]:
+    """Yield `simulate(rng, units, start)` for each block of `size`.
+
+    `start` is the index of the block's first unit, for building global ids.
+    """
+    sizes = block_sizes(size.n, size.block_units)
+    start = 0
+    for rng, units in zip(block_rngs(seed, len(sizes)), sizes):
+        yield simulate(rng, units, start)
+        start += units
+
+
+def scaled_path(path: PathLike, n: int) -> Path:
+    """`<stem>_n<n>`: chunked runs never overwrite the default-size dataset."""
+    path = Path(path)
+    return path.with_name(f"{path.name}_n{n}")
+
+
+def stream_dataset(
+    simulate: Callable[[np.random.Generator, int, int], pd.DataFrame],
+    size: Size,
+    seed: int,
+    path: PathLike,
+    csv: bool = False,
+) -> Path:
+    """Write all blocks of `size` to `scaled_path(path, size.n)` and return the file.
+
+    No CSV by default: at this size it is for load tests, not Tableau.
+    """
+    return write_chunks(iter_blocks(simulate, size, seed), scaled_path(path, size.n), csv=csv)
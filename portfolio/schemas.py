@@ -0,0 +1,213 @@
+"""
+Compact dtypes for every dataset the portfolio writes or reads.
+
+Simulators build frames with numpy defaults (int64, float64, object strings).
+`SCHEMAS` declares, per dataset (keyed by file stem), the narrow type each
+column actually needs: categoricals for labels and ids, int8/int16/int32 for
+small counts and codes, float32 for measurements already rounded well inside
+float32's ~7 significant digits (so the CSV exports read the same). Columns
+that feed an estimator stay float64.
+
+`dataset_io` applies the schema on every write and read, and the simulators
+apply it when they generate data, so group-bys and merges run on category
+codes. Fixed category lists are sorted, which keeps the level order of
+group-bys and dummy columns exactly what it was on plain strings.
+
+    python -m portfolio.schemas        # memory saved per dataset on disk
+"""
+from __future__ import annotations
+
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_integer_dtype, is_numeric_dtype
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def categories(*values: str) -> CategoricalDtype:
+    return CategoricalDtype(sorted(values))
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    dtypes: Mapping[str, Any] = field(default_factory=dict)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cast the declared columns present in `df`; others are left alone.
+
+        Raises ValueError rather than let an integer column wrap around or
+        a label outside a fixed category list turn into NaN.
+        """
+        casts = {
+            col: dtype
+            for col, dtype in self.dtypes.items()
+            if col in df.columns and df[col].dtype != dtype
+        }
+        for col, dtype in casts.items():
+            if is_integer_dtype(dtype) and len(df) and is_numeric_dtype(df[col]):
+                info = np.iinfo(dtype)
+                lo, hi = df[col].min(), df[col].max()
+                if lo < info.min or hi > info.max:
+                    raise ValueError(
+                        f"{self.name}.{col} spans [{lo}, {hi}], outside {dtype}; widen the schema"
+                    )
+            elif isinstance(dtype, CategoricalDtype) and dtype.categories is not None:
+                unknown = set(df[col].dropna().unique()) - set(dtype.categories)
+                if unknown:
+                    raise ValueError(f"{self.name}.{col} has undeclared labels {sorted(unknown)}")
+        return df.astype(casts) if casts else df
+
+
+SCHEMAS: Dict[str, Schema] = {
+    s.name: s
+    for s in (
+        Schema(
+            "wages_synthetic",
+            {
+                "years_exp": "int8",
+                "edu": "int8",
+                "gender": "int8",  # 0/1 regressor, not a label
+                "industry": categories("tech", "health", "retail", "public"),
+            },
+        ),
+        Schema(
+            "timesheets_synthetic",
+            {
+                "employee_id": "category",
+                "week": "int8",
+                "dept": categories("Operations", "Sales", "HR", "Finance", "Warehouse"),
+                "hourly_rate": "float32",
+                "hours": "float32",
+                "ot_hours": "float32",
+                "rounded_to": "int8",
+                "long_week_flag": "int8",
+                "gross": "float32",
+            },
+        ),
+        Schema(
+            "credit_applicants",
+            {
+                "age": "int8",
+                "fico": "int16",
+                "num_open_accts": "int8",
+                "num_derog": "int8",
+                "months_employed": "int16",
+                "num_inq_6mo": "int8",
+                "home_owner": "int8",
+                "loan_purpose": categories(
+                    "debt_consolidation", "home_improvement", "auto", "medical", "other"
+                ),
+                "credit_score": "int16",
+                "default": "int8",
+            },
+        ),
+        Schema(
+            "patient_panel_data",
+            {
+                "patient_id": "int32",
+                "treated": "int8",
+                "n_chronic": "int8",
+                "quarter": "int8",
+                "period": categories("pre", "post"),
+                "post": "int8",
+                "qtr_within": "int8",
+                "ed_visits": "float32",  # counts; float so the CSV keeps "1.0"
+                "hospitalized": "int8",
+            },
+        ),
+        Schema(
+            "did_policy_sim",
+            {"unit": "category", "t": "int8", "treat": "int8", "post": "int8"},
+        ),
+        Schema("did_sim", {"treat": "int8", "post": "int8"}),
+        Schema("panel_sim", {"unit": "int32", "time": "int16"}),
+        Schema("rd_sim", {"t": "int8"}),
+        Schema("matched_psm_source", {"t": "int8"}),
+        Schema(
+            "bls_metro_employment",
+            {"metro": "category", "year": "int16"},  # employment feeds the forecast model
+        ),
+        Schema(
+            "employment_qcew_mock",
+            {
+                "quarter": "category",
+                "industry": "category",
+                "employment": "int32",
+                "avg_hourly_wage": "float32",
+            },
+        ),
+        Schema("bayes_policy_effect", {"group": categories("control", "treat")}),
+        Schema("credit_risk_synthetic", {"age": "int8", "default": "int8"}),
+        Schema(
+            "income_classifier_data",
+            {"age": "int8", "edu_years": "int8", "experience": "int8", "high_income": "int8"},
+        ),
+        Schema(
+            "regularized_employment_regression",
+            {"age": "int8", "tenure": "int8", "edu_years": "int8", "region": "category"},
+        ),
+        Schema("solow_simulation", {"period": "int16"}),
+    )
+}
+
+_SCALED = re.compile(r"_n\d+$")  # portfolio.scale names chunked runs <stem>_n<N>
+
+
+def schema_for(path: Union[str, Path]) -> Optional[Schema]:
+    """The schema registered for a dataset path or name, if any."""
+    stem = Path(path).name.split(".")[0]
+    return SCHEMAS.get(_SCALED.sub("", stem))
+
+
+def apply_schema(df: pd.DataFrame, dataset: Union[str, Path]) -> pd.DataFrame:
+    """`df` cast to the schema of `dataset` (a name or path); unchanged if none."""
+    schema = schema_for(dataset)
+    return schema.apply(df) if schema is not None else df
+
+
+def memory_saved(before: pd.DataFrame, after: pd.DataFrame) -> Dict[str, float]:
+    """Deep in-memory size of a frame before and after its schema."""
+    b = before.memory_usage(deep=True).sum()
+    a = after.memory_usage(deep=True).sum()
+    return {"before_mb": b / 2**20, "after_mb": a / 2**20, "ratio": b / a if a else float("nan")}
+
+
+def report(paths: Sequence[Path]) -> List[Dict[str, Any]]:
+    """Memory of each CSV as pandas loads it by default vs. with its schema."""
+    rows = []
+    for path in paths:
+        schema = schema_for(path)
+        if schema is None:
+            continue
+        raw = pd.read_csv(path)
+        saved = memory_saved(raw, schema.apply(raw))
+        rows.append({"dataset": path.stem, "rows": len(raw), **saved})
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    if argv:
+        paths = [Path(p) for p in argv]
+    else:  # one copy per dataset name
+        found = {p.stem: p for p in sorted(ROOT.rglob("*.csv"), reverse=True)}
+        paths = [p for _, p in sorted(found.items())]
+    rows = report(paths)
+    if not rows:
+        print("no datasets with a registered schema found")
+        return 1
+    table = pd.DataFrame(rows).sort_values("ratio", ascending=False)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    before, after = table["before_mb"].sum(), table["after_mb"].sum()
+    print(f"\ntotal: {before:.2f} MB -> {after:.2f} MB ({before / after:.1f}x smaller)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
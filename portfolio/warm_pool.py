@@ -0,0 +1,127 @@
+"""
+Warm worker support for `scripts/run_all.py --warm`.
+
+A worker imports the heavy scientific stack once (`preload`) and then runs
+each script in a forked child through runpy (`fork_script`). The child starts
+with those modules already in memory, shared copy-on-write with the worker,
+while its module globals, cwd, environment and matplotlib figures disappear
+when it exits.
+"""
+from __future__ import annotations
+
+import ast
+import importlib
+import os
+import runpy
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Set
+
+DEFAULT_PRELOAD = (
+    "numpy,pandas,scipy.stats,matplotlib.pyplot,statsmodels.api,statsmodels.formula.api,"
+    "linearmodels,sklearn.linear_model,sklearn.ensemble,sklearn.model_selection,"
+    "sklearn.metrics,torch"
+)
+PRELOAD = tuple(m for m in os.getenv("RUN_ALL_PRELOAD", DEFAULT_PRELOAD).split(",") if m)
+
+_IMPORT_COST: Dict[str, float] = {}  # preload step -> seconds it took in this worker
+_LOADED_BY: Dict[str, str] = {}  # module of the step's own package -> preload step
+
+
+def preload(modules: Optional[tuple] = None) -> Dict[str, float]:
+    """Import `modules` (default PRELOAD) into this process, timing each one;
+    missing ones are skipped."""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+    except ImportError:
+        pass
+    for name in PRELOAD if modules is None else modules:
+        before = set(sys.modules)
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:  # optional dependency not installed or broken
+            continue
+        _IMPORT_COST[name] = time.perf_counter() - t0
+        package = name.split(".")[0]
+        for mod in set(sys.modules) - before:
+            if mod.split(".")[0] == package:  # stdlib helpers (csv, json...) are not attributed
+                _LOADED_BY[mod] = name
+    return dict(_IMPORT_COST)
+
+
+def imported_modules(path: Path) -> Set[str]:
+    """Absolute module names a script imports anywhere, plus their parent packages."""
+    try:
+        tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    except (OSError, SyntaxError):
+        return set()
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+            names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return {".".join(n.split(".")[: i + 1]) for n in names for i in range(n.count(".") + 1)}
+
+
+def import_saved(path: Path) -> float:
+    """Estimated cold-import seconds the script skips: the cost of every
+    preload step that loaded a module of a package the script imports by name.
+    Packages pulled in only indirectly are not counted, so this is a floor."""
+    steps = {_LOADED_BY[m] for m in imported_modules(path) if m in _LOADED_BY}
+    return sum(_IMPORT_COST[s] for s in steps)
+
+
+def _reset_matplotlib() -> None:
+    if "matplotlib.pyplot" in sys.modules:
+        import matplotlib
+        import matplotlib.pyplot as plt
+
+        plt.close("all")
+        matplotlib.rcdefaults()
+
+
+def _exit_code(code: object) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def fork_script(argv: List[str], env: Mapping[str, str], cwd: str, log_fd: int) -> int:
+    """Run `argv[0]` as __main__ in a forked child writing to `log_fd`; returns its pid."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 1
+    try:
+        os.dup2(log_fd, 1)
+        os.dup2(log_fd, 2)
+        os.environ.clear()
+        os.environ.update(env)
+        os.chdir(cwd)
+        _reset_matplotlib()
+        sys.argv = list(argv)
+        sys.path.insert(0, str(Path(argv[0]).parent))
+        runpy.run_path(argv[0], run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        code = _exit_code(e.code)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
@@ -6,16 +6,20 @@ Simulate an employment-related outcome (e.g., log wages) as a function of
 age, tenure, education, and region. Fit OLS and Ridge regression models.
 
 Output:
-    data/processed/regularized_employment_regression.csv
+    data/processed/regularized_employment_regression.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
-from pathlib import Path
 from sklearn.linear_model import LinearRegression, Ridge
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
 
-def main():
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running regularized_employment_regression.py ...")
 
     rng = np.random.default_rng(2025)
@@ -67,36 +71,26 @@ def main():
     print("Ridge R^2:", ridge.score(X, y))
 
     # Save data
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "regularized_employment_regression.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved regression dataset to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "regularized_employment_regression")
+    if out_path is not None:
+        print(f"Saved regression dataset to: {out_path.resolve()}")
+    return ModuleResult(df, models={"ols": ols, "ridge": ridge}, meta={"X": X, "y": y},
+                        path=out_path)
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import pandas as pd
-    import numpy as np
     import os
-    from sklearn.linear_model import Ridge, LinearRegression
     from sklearn.preprocessing import StandardScaler
 
-    main()
+    result = main()
 
     os.makedirs("regression/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/regularized_employment_regression.csv")
-    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    target = num_cols[0]
-    features = num_cols[1:] if len(num_cols) > 1 else num_cols
-
-    X = df[features].values
-    y = df[target].values
-    scaler = StandardScaler()
-    X_s = scaler.fit_transform(X)
+    X, y = result.meta["X"], result.meta["y"]
+    features = list(X.columns)
+    X_s = StandardScaler().fit_transform(X.to_numpy(dtype=float))
 
     alphas = np.logspace(-3, 4, 60)
     coefs  = []
@@ -105,8 +99,7 @@ if __name__ == "__main__":
         coefs.append(r.coef_)
     coefs = np.array(coefs)
 
-    ols   = LinearRegression().fit(X_s, y)
-    ridge = Ridge(alpha=1.0).fit(X_s, y)
+    ols, ridge = result.models["ols"], result.models["ridge"]
 
     fig, axes = plt.subplots(1, 2, figsize=(13, 5))
 
@@ -6,9 +6,14 @@ Writes demo CSV to OUTPUT_DIR (default: data/processed).
 WHY: Standardizes outputs for CI collection.
 """
 from __future__ import annotations
-import csv, os
+import csv, os, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.outputs import register_output
+
+OUTPUTS = ["$OUTPUT_DIR/demo_metrics.csv"]
+
 def main() -> int:
     out_dir = Path(os.getenv("OUTPUT_DIR", "data/processed"))
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -21,6 +26,7 @@ def main() -> int:
     with path.open("w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=rows[0].keys())
         w.writeheader(); w.writerows(rows)
+    register_output(path)
     print(f"Wrote {path} ({len(rows)} rows)")
     return 0
 
@@ -5,18 +5,24 @@
 Second example to show multi-script orchestration.
 """
 from __future__ import annotations
-import csv, os, random
+import csv, os, random, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio.outputs import register_output
+
+OUTPUTS = ["$OUTPUT_DIR/panel_demo.csv"]
+
 def main() -> int:
     out_dir = Path(os.getenv("OUTPUT_DIR", "data/processed"))
     out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / "panel_sim.csv"
+    path = out_dir / "panel_demo.csv"
     rng = random.Random(42)
     rows = [{"unit": i, "t": t, "y": rng.random()} for i in range(1, 6) for t in range(1, 4)]
     with path.open("w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=rows[0].keys())
         w.writeheader(); w.writerows(rows)
+    register_output(path)
     print(f"Wrote {path} ({len(rows)} rows)")
     return 0
 
@@ -4,92 +4,622 @@
 """
 Runs all generator scripts under scripts/*.py (excluding itself),
 captures logs, enforces timeouts, and gathers CSVs to data/processed/.
+
+Scripts may declare the files they read and write as module-level literals:
+
+    INPUTS = ["$OUTPUT_DIR/panel_sim.csv"]
+    OUTPUTS = ["$OUTPUT_DIR/panel_summary.csv"]
+
+Paths are repo-relative; "$OUTPUT_DIR" expands to the output directory.
+Producers of a file always run before its consumers, and two scripts writing
+the same file run in discovery order. With --jobs N, independent scripts run
+concurrently.
+
+A script whose source, repo-local imported modules, environment knobs
+(OUTPUT_DIR, *SEED*, DATA*) and declared inputs hash the same as on its last
+successful run, and whose outputs are still intact, is skipped; an output a later
+script rewrote is that script's to verify. The hashes live in artifacts/build_manifest.json;
+use --force to rerun everything or --only to rerun selected scripts.
+
+Scripts register the files they write with portfolio.outputs.register_output;
+the manifests under artifacts/outputs/ drive gathering into OUTPUT_DIR, which
+copies (or skips, when the content is identical) each file; two registered files
+with the same name are reported and left out.
+
+Wall time, user/system CPU, peak RSS and declared output bytes of every script
+are written to artifacts/run_report.json and printed slowest first.
+
+With --warm, scripts run in forked children of long-lived workers that have
+already imported numpy, pandas, statsmodels, sklearn, matplotlib, etc. (see
+portfolio/warm_pool.py); the report then shows the import time each script
+saved.
+
+Wall times of successful runs are kept in artifacts/timings.json. Ready scripts
+are dispatched longest-critical-path first (LPT within dependency
+constraints), the makespan is predicted before starting, and scripts with
+history get a timeout of SCRIPT_TIMEOUT_FACTOR x their expected time (at least
+SCRIPT_TIMEOUT_MIN_SEC) instead of the flat SCRIPT_TIMEOUT_SEC.
+
+With --portfolio, every project module listed in portfolio/pipeline.py runs
+too, in its declared working directory and with its declared inputs and
+outputs; their outputs are registered on their behalf. Steps whose optional
+dependencies (e.g. torch) are missing are reported as SKIP.
 """
 from __future__ import annotations
-import os, shlex, sys, time, shutil, subprocess
+import argparse, ast, hashlib, heapq, importlib.util, json, multiprocessing, os, shlex, signal, sys, time
+import shutil, subprocess, threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from graphlib import TopologicalSorter
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from portfolio import pipeline, warm_pool
+from portfolio.outputs import (clear_manifest, manifest_key, read_all_manifests, read_manifest,
+                               register_output)
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS_DIR = Path("scripts")
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "data/processed"))
 LOG_DIR = Path("artifacts/logs")
-TIMEOUT_SEC = int(os.getenv("SCRIPT_TIMEOUT_SEC", "180"))  # per script
+TIMEOUT_SEC = int(os.getenv("SCRIPT_TIMEOUT_SEC", "180"))  # per script without history
+TIMEOUT_FACTOR = float(os.getenv("SCRIPT_TIMEOUT_FACTOR", "5"))
+TIMEOUT_MIN_SEC = float(os.getenv("SCRIPT_TIMEOUT_MIN_SEC", "30"))
+JOBS = int(os.getenv("RUN_ALL_JOBS", "1"))
+WARM = os.getenv("RUN_ALL_WARM", "0") == "1"
+PORTFOLIO = os.getenv("RUN_ALL_PORTFOLIO", "0") == "1"
+MANIFEST = Path("artifacts/build_manifest.json")
+REPORT = Path("artifacts/run_report.json")
+HISTORY = Path("artifacts/timings.json")
+OUTPUT_MANIFEST_DIR = Path("artifacts/outputs")
+GATHER_SUFFIXES = {".csv", ".parquet", ".feather"}  # see portfolio/dataset_io.py
 
 EXCLUDE = {"run_all.py", "__init__.py"}
 
 def discover_scripts() -> List[Path]:
     return sorted(p for p in SCRIPTS_DIR.glob("*.py") if p.name not in EXCLUDE)
 
-def run_script(path: Path) -> int:
+def discover_steps() -> List[Path]:
+    """Entry points of the project modules in portfolio/pipeline.py, in listed order."""
+    return [s.path for s in pipeline.STEPS]
+
+def _expand(path: str) -> str:
+    return Path(path.replace("$OUTPUT_DIR", OUTPUT_DIR.as_posix())).as_posix()
+
+def declared_io(path: Path) -> Tuple[List[str], List[str]]:
+    """Pipeline declarations, else INPUTS/OUTPUTS literals read without executing the script."""
+    step = pipeline.step_for(path)
+    if step is not None:
+        return [_expand(i) for i in step.inputs], [_expand(o) for o in step.outputs]
+    io: Dict[str, List[str]] = {"INPUTS": [], "OUTPUTS": []}
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except SyntaxError:
+        return [], []
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id in io:
+                try:
+                    value = ast.literal_eval(node.value)
+                except ValueError:
+                    continue
+                io[target.id] = [_expand(str(v)) for v in value]
+    return io["INPUTS"], io["OUTPUTS"]
+
+def build_graph(scripts: List[Path]) -> Dict[Path, Set[Path]]:
+    """Map each script to the scripts that must finish before it starts."""
+    io = {p: declared_io(p) for p in scripts}
+    producers: Dict[str, List[Path]] = {}
+    for p in scripts:
+        for out in io[p][1]:
+            producers.setdefault(out, []).append(p)
+    deps: Dict[Path, Set[Path]] = {p: set() for p in scripts}
+    for p in scripts:
+        inputs, outputs = io[p]
+        for inp in inputs:
+            deps[p].update(q for q in producers.get(inp, []) if q != p)
+        for out in outputs:
+            # write-after-write: keep the sequential "last writer wins" order
+            writers = producers[out]
+            deps[p].update(writers[: writers.index(p)])
+    return deps
+
+def outputs_of(path: Path) -> List[str]:
+    """Declared outputs plus whatever the script registered on its last run."""
+    _, declared = declared_io(path)
+    registered = [e["path"] for e in read_manifest(manifest_key(path), OUTPUT_MANIFEST_DIR)]
+    return list(dict.fromkeys(declared + registered))
+
+def workdir(path: Path) -> Optional[Path]:
+    """Working directory a pipeline step expects (None: the repo root)."""
+    step = pipeline.step_for(path)
+    return None if step is None or step.cwd == "." else Path(step.cwd)
+
+def step_args(path: Path) -> List[str]:
+    """Extra command-line arguments of a pipeline step."""
+    step = pipeline.step_for(path)
+    return list(step.args) if step else []
+
+def missing_requirements(path: Path) -> List[str]:
+    step = pipeline.step_for(path)
+    return [m for m in (step.requires if step else ()) if importlib.util.find_spec(m) is None]
+
+def file_hash(path: Path) -> Optional[str]:
+    if not path.is_file():
+        return None
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def local_modules(script: Path) -> List[Path]:
+    """Repo-local source files `script` imports, directly or through one another.
+
+    Import names resolve against the script's own directory and the repo root,
+    the two places its sys.path finds them."""
+    roots = [script.resolve().parent, REPO_ROOT]
+    found: Set[Path] = set()
+    todo = [script.resolve()]
+    while todo:
+        for name in warm_pool.imported_modules(todo.pop()):
+            rel = Path(*name.split("."))
+            for root in roots:
+                for candidate in (root / f"{rel}.py", root / rel / "__init__.py"):
+                    if candidate.is_file() and candidate not in found:
+                        found.add(candidate)
+                        todo.append(candidate)
+    found.discard(script.resolve())
+    return sorted(found)
+
+def env_knobs() -> Dict[str, str]:
+    """Environment variables that change what a script writes."""
+    knobs = {k: v for k, v in os.environ.items() if "SEED" in k or k.startswith("DATA")}
+    knobs["OUTPUT_DIR"] = OUTPUT_DIR.as_posix()
+    return dict(sorted(knobs.items()))
+
+class BuildCache:
+    """Content-hash manifest of the last successful run of every script."""
+
+    def __init__(self, path: Path = MANIFEST, force: bool = False):
+        self.path = path
+        self.force = force
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.entries = {}
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def key(self, script: Path) -> str:
+        inputs, _ = declared_io(script)
+        h = hashlib.sha256(script.read_bytes())
+        for module in local_modules(script):
+            h.update(f"{module.name}={file_hash(module)}".encode())  # not the path: repo may move
+        h.update(json.dumps([step_args(script), env_knobs()]).encode())
+        for inp in sorted(inputs):
+            h.update(f"{inp}={file_hash(Path(inp))}".encode())
+        return h.hexdigest()
+
+    def owned_outputs(self, script: Path) -> Dict[str, Optional[str]]:
+        """Recorded outputs of `script` that no later recorded run has rewritten."""
+        last_writer: Dict[str, str] = {}
+        for name, entry in sorted(self.entries.items(), key=lambda kv: kv[1].get("seq", 0)):
+            for out in entry["outputs"]:
+                last_writer[out] = name
+        outputs = self.entries[script.as_posix()]["outputs"]
+        return {o: h for o, h in outputs.items() if last_writer[o] == script.as_posix()}
+
+    def is_fresh(self, script: Path) -> bool:
+        entry = self.entries.get(script.as_posix())
+        fresh = (
+            not self.force
+            and entry is not None
+            and bool(entry["outputs"])  # nothing declared means nothing to verify
+            and entry["key"] == self.key(script)
+            and all(file_hash(Path(o)) == h for o, h in self.owned_outputs(script).items())
+        )
+        (self.hits if fresh else self.misses).append(script.name)
+        return fresh
+
+    def record(self, script: Path, code: int) -> None:
+        if code != 0:
+            self.entries.pop(script.as_posix(), None)
+            return
+        self.entries[script.as_posix()] = {
+            "key": self.key(script),
+            "outputs": {o: file_hash(Path(o)) for o in outputs_of(script)},
+            "seq": max((e.get("seq", 0) for e in self.entries.values()), default=0) + 1,
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+
+    def summary(self) -> str:
+        return f"Cache: {len(self.hits)} hit(s), {len(self.misses)} miss(es)" + (
+            f" [skipped: {', '.join(sorted(self.hits))}]" if self.hits else "")
+
+@dataclass
+class ScriptResult:
+    """Exit code and resource usage of one script (summed over attempts)."""
+    name: str
+    code: int = 0
+    status: str = "OK"
+    wall_s: float = 0.0
+    user_s: float = 0.0
+    sys_s: float = 0.0
+    max_rss_mb: float = 0.0
+    output_bytes: int = 0
+    import_saved_s: float = 0.0
+
+class RunHistory:
+    """Exponentially weighted wall time of each script's successful runs."""
+
+    ALPHA = 0.5  # weight of the newest run
+    DEFAULT_S = 1.0  # estimate when no script has history yet
+
+    def __init__(self, path: Path = HISTORY):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.entries = {}
+
+    def predict(self, script: Path) -> Optional[float]:
+        entry = self.entries.get(script.as_posix())
+        return None if entry is None else entry["wall_s"]
+
+    def estimate(self, script: Path) -> float:
+        """Prediction, or the median of known scripts for a new one."""
+        known = self.predict(script)
+        if known is not None:
+            return known
+        walls = sorted(e["wall_s"] for e in self.entries.values())
+        return walls[len(walls) // 2] if walls else self.DEFAULT_S
+
+    def timeout(self, script: Path) -> float:
+        entry = self.entries.get(script.as_posix())
+        if entry is None:
+            return TIMEOUT_SEC
+        return max(TIMEOUT_MIN_SEC, TIMEOUT_FACTOR * max(entry["wall_s"], entry["max_s"]))
+
+    def update(self, script: Path, result: "ScriptResult") -> None:
+        """Fold in a successful run; a timeout raises max_s to the limit it hit,
+        so the next limit is TIMEOUT_FACTOR times larger."""
+        entry = self.entries.get(script.as_posix())
+        if result.code == 124:
+            if entry is None:
+                entry = {"wall_s": result.wall_s, "max_s": result.wall_s, "runs": 0}
+            entry["max_s"] = max(entry["max_s"], result.wall_s)
+            self.entries[script.as_posix()] = entry
+            return
+        if result.code != 0 or result.status in ("CACHED", "SKIP"):
+            return
+        if entry is None:
+            entry = {"wall_s": result.wall_s, "max_s": result.wall_s, "runs": 0}
+        entry["wall_s"] = self.ALPHA * result.wall_s + (1 - self.ALPHA) * entry["wall_s"]
+        entry["max_s"] = max(entry["max_s"], result.wall_s)
+        entry["runs"] += 1
+        self.entries[script.as_posix()] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+
+def critical_paths(scripts: List[Path], deps: Dict[Path, Set[Path]],
+                   est: Dict[Path, float]) -> Dict[Path, float]:
+    """Expected time from each script's start to the end of its longest chain of consumers."""
+    consumers: Dict[Path, List[Path]] = {p: [] for p in scripts}
+    for p, ds in deps.items():
+        for d in ds:
+            consumers[d].append(p)
+    levels: Dict[Path, float] = {}
+    for p in reversed(list(TopologicalSorter(deps).static_order())):
+        levels[p] = est[p] + max((levels[c] for c in consumers[p]), default=0.0)
+    return levels
+
+def predict_makespan(scripts: List[Path], deps: Dict[Path, Set[Path]], est: Dict[Path, float],
+                     priority: Dict[Path, float], jobs: int) -> float:
+    """Simulate the list scheduler below on the estimated durations."""
+    remaining = {p: set(d) for p, d in deps.items()}
+    ready = [p for p in scripts if not remaining[p]]
+    running: List[Tuple[float, int, Path]] = []
+    order = {p: i for i, p in enumerate(scripts)}
+    now = 0.0
+    while ready or running:
+        ready.sort(key=lambda p: (-priority[p], order[p]))
+        while ready and len(running) < jobs:
+            p = ready.pop(0)
+            heapq.heappush(running, (now + est[p], order[p], p))
+        now, _, done = heapq.heappop(running)
+        for p, d in remaining.items():
+            if done in d:
+                d.discard(done)
+                if not d:
+                    ready.append(p)
+    return now
+
+def _wait(pid: int, timeout: float):
+    """Reap `pid` with os.wait4 so its own rusage is not mixed with siblings'.
+
+    The child is only reaped once the timer can no longer fire, so the kill
+    never reaches a reused pid, and timed_out is set only if it hit a child
+    that was still running."""
+    timed_out = threading.Event()
+    lock = threading.Lock()
+    finished = False
+
+    def kill() -> None:
+        with lock:
+            exited = os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            if finished or exited is not None:
+                return
+            os.kill(pid, signal.SIGKILL)
+            timed_out.set()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)  # exited, not yet reaped
+    finally:
+        with lock:
+            finished = True
+            timer.cancel()
+    _, status, usage = os.wait4(pid, 0)
+    return os.waitstatus_to_exitcode(status), usage, timed_out.is_set()
+
+def run_script(path: Path, warm: bool = False, timeout: Optional[float] = None) -> ScriptResult:
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     log_file = LOG_DIR / f"{path.stem}.log"
+    result = ScriptResult(path.name)
+    timeout = TIMEOUT_SEC if timeout is None else timeout
 
+    cwd = workdir(path)
+    script = str(path.resolve()) if cwd else str(path)
     env = os.environ.copy()
-    env.setdefault("OUTPUT_DIR", str(OUTPUT_DIR))
+    env["OUTPUT_DIR"] = str(OUTPUT_DIR.resolve())  # absolute: steps may run elsewhere
+    env["RUN_ALL_SCRIPT"] = manifest_key(path)
+    env["OUTPUT_MANIFEST_DIR"] = str(OUTPUT_MANIFEST_DIR.resolve())
+    clear_manifest(env["RUN_ALL_SCRIPT"], OUTPUT_MANIFEST_DIR)
 
     cmds = [
-        [sys.executable, str(path), "--outdir", str(OUTPUT_DIR)],  # preferred (if script supports)
-        [sys.executable, str(path)],                                # fallback
+        [sys.executable, script, "--outdir", env["OUTPUT_DIR"], *step_args(path)],  # preferred
+        [sys.executable, script, *step_args(path)],                                 # fallback
     ]
 
+    result.code = 1  # failed both attempts
     for cmd in cmds:
         with log_file.open("w", encoding="utf-8") as log:
-            log.write(f"$ {shlex.join(cmd)}\n\n")
+            log.write(f"$ {'[warm] ' if warm else ''}{f'cd {cwd} && ' if cwd else ''}{shlex.join(cmd)}\n\n")
             log.flush()
-            try:
-                t0 = time.time()
-                proc = subprocess.run(
-                    cmd, env=env, stdout=log, stderr=log, timeout=TIMEOUT_SEC, check=False
-                )
-                dt = time.time() - t0
-                log.write(f"\n---- exit={proc.returncode} elapsed={dt:.2f}s ----\n")
+            t0 = time.time()
+            if warm:
+                argv = [str(path.resolve()), *cmd[2:]]
+                code, usage, timed_out = _wait(
+                    warm_pool.fork_script(argv, env, str(cwd or Path.cwd()), log.fileno()), timeout)
+            else:
+                proc = subprocess.Popen(cmd, env=env, cwd=cwd, stdout=log, stderr=log)
+                code, usage, timed_out = _wait(proc.pid, timeout)
+                proc.returncode = code  # already reaped; keep Popen from waiting again
+            dt = time.time() - t0
+            result.wall_s += dt
+            result.user_s += usage.ru_utime
+            result.sys_s += usage.ru_stime
+            result.max_rss_mb = max(result.max_rss_mb, usage.ru_maxrss / 1024)  # KiB on Linux
+            if timed_out:
+                log.write(f"\n---- TIMEOUT after {timeout:.0f}s ----\n")
                 log.flush()
-                if proc.returncode == 0:
-                    return 0
-            except subprocess.TimeoutExpired as e:
-                log.write(f"\n---- TIMEOUT after {TIMEOUT_SEC}s ----\n{e}\n")
-                log.flush()
-                return 124  # timeout code
-    return 1  # failed both attempts
+                result.code = 124  # timeout code
+                break
+            log.write(f"\n---- exit={code} elapsed={dt:.2f}s user={usage.ru_utime:.2f}s "
+                      f"sys={usage.ru_stime:.2f}s maxrss={usage.ru_maxrss / 1024:.1f}MB ----\n")
+            log.flush()
+            if code == 0:
+                result.code = 0
+                break
+    result.status = "OK" if result.code == 0 else f"FAIL({result.code})"
+    if result.code == 0 and pipeline.step_for(path) is not None:
+        register_declared(path, env["RUN_ALL_SCRIPT"])
+    result.output_bytes = sum(Path(o).stat().st_size for o in outputs_of(path) if Path(o).is_file())
+    return result
+
+def register_declared(path: Path, key: str) -> None:
+    """Register the declared outputs a pipeline step wrote but did not register itself."""
+    registered = {e["path"] for e in read_manifest(key, OUTPUT_MANIFEST_DIR)}
+    for out in declared_io(path)[1]:
+        if out not in registered and Path(out).is_file():
+            register_output(out, key=key, manifest_dir=OUTPUT_MANIFEST_DIR)
+
+def run_script_warm(path: Path, timeout: Optional[float] = None) -> ScriptResult:
+    """run_script inside a preloaded pool worker (see portfolio/warm_pool.py)."""
+    result = run_script(path, warm=True, timeout=timeout)
+    result.import_saved_s = warm_pool.import_saved(path)
+    return result
+
+def make_pool(jobs: int, warm: bool = False):
+    if not warm:
+        return ThreadPoolExecutor(max_workers=jobs)
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork"),
+                               initializer=warm_pool.preload)
+
+def run_graph(scripts: List[Path], deps: Dict[Path, Set[Path]], jobs: int = 1,
+              cache: Optional[BuildCache] = None, warm: bool = False,
+              history: Optional[RunHistory] = None) -> Dict[Path, ScriptResult]:
+    """Run scripts as soon as their producers finish, at most `jobs` at a time.
+
+    Each job is its own interpreter process, so the pool threads only wait on
+    subprocesses; with warm=True the pool is made of preloaded worker processes
+    that fork one child per script. A failed producer does not stop its consumers, matching the
+    sequential runner. Cache freshness is checked only once a script's
+    producers are done, so a rebuilt input invalidates its consumers. With a
+    history, ready scripts start longest-critical-path first and get adaptive
+    timeouts; without one they start in discovery order.
+    """
+    order = {p: i for i, p in enumerate(scripts)}
+    if history is not None:
+        priority = critical_paths(scripts, deps, {p: history.estimate(p) for p in scripts})
+        rank = lambda p: (-priority[p], order[p])  # noqa: E731
+    else:
+        rank = order.__getitem__
+    graph = TopologicalSorter(deps)
+    graph.prepare()  # raises graphlib.CycleError on circular declarations
+    ready: List[Path] = []
+    results: Dict[Path, ScriptResult] = {}
+    run = run_script_warm if warm else run_script
+    with make_pool(max(1, jobs), warm) as pool:
+        running = {}
+        while graph.is_active():
+            ready = sorted(set(ready) | set(graph.get_ready()), key=rank)
+            while ready and len(running) < max(1, jobs):
+                p = ready.pop(0)
+                missing = missing_requirements(p)
+                if missing:
+                    results[p] = ScriptResult(p.name, status="SKIP")
+                    print(f"{p.name}: SKIP (missing {', '.join(missing)})", flush=True)
+                    graph.done(p)
+                    continue
+                if cache is not None and cache.is_fresh(p):
+                    results[p] = ScriptResult(p.name, status="CACHED")
+                    print(f"{p.name}: CACHED", flush=True)
+                    graph.done(p)
+                    continue
+                timeout = history.timeout(p) if history is not None else None
+                running[pool.submit(run, p, timeout=timeout)] = p
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                p = running.pop(fut)
+                results[p] = fut.result()
+                print(f"{p.name}: {results[p].status}", flush=True)
+                if cache is not None:
+                    cache.record(p, results[p].code)
+                if history is not None:
+                    history.update(p, results[p])
+                graph.done(p)
+    return results
+
+def write_report(results: List[ScriptResult], wall_s: float, jobs: int, warm: bool = False) -> Path:
+    """Dump per-script resource usage to REPORT as JSON."""
+    REPORT.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "jobs": jobs,
+        "warm": warm,
+        "wall_s": round(wall_s, 3),
+        "scripts": [asdict(r) for r in results],
+    }
+    REPORT.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return REPORT
+
+def print_report(results: List[ScriptResult]) -> None:
+    """Console table of the same numbers, slowest script first."""
+    header = (f"{'script':<40} {'status':<9} {'wall s':>8} {'user s':>8} {'sys s':>7} "
+              f"{'rss MB':>8} {'out KB':>9} {'saved s':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in sorted(results, key=lambda r: r.wall_s, reverse=True):
+        print(f"{r.name:<40} {r.status:<9} {r.wall_s:>8.2f} {r.user_s:>8.2f} {r.sys_s:>7.2f} "
+              f"{r.max_rss_mb:>8.1f} {r.output_bytes / 1024:>9.1f} {r.import_saved_s:>8.2f}")
+
+def _same_file(src: Path, dest: Path) -> bool:
+    if os.path.samefile(src, dest):
+        return False  # a hard link from an older run: replace it with a copy
+    return src.stat().st_size == dest.stat().st_size and file_hash(src) == file_hash(dest)
+
+def _copy_into(src: Path, dest: Path) -> None:
+    """Copy src to dest, replacing dest atomically. A copy, not a link, so
+    editing either file in place never changes the other."""
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
 
 def gather_csvs() -> int:
-    """Ensure all CSVs live under OUTPUT_DIR; copy any stray CSVs."""
-    moved = 0
-    for csv_path in Path(".").glob("**/*.csv"):
-        # skip desired target, VCS, venvs, cache
-        rel = csv_path.as_posix()
-        if rel.startswith(".git/") or "/.venv/" in rel or "/venv/" in rel or rel.startswith("artifacts/"):
+    """Copy every registered dataset file into OUTPUT_DIR, one file per name.
+
+    Registered files that share a name would overwrite one another in manifest
+    order; such names are reported and none of their files is gathered."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    sources: Dict[str, List[Path]] = {}
+    for entry in read_all_manifests(OUTPUT_MANIFEST_DIR):
+        src = Path(entry["path"])
+        if not entry.get("gather", True) or src.suffix not in GATHER_SUFFIXES or not src.is_file():
+            continue
+        if src.resolve().parent == OUTPUT_DIR.resolve():
+            continue
+        same_name = sources.setdefault(src.name, [])
+        if all(src.resolve() != s.resolve() for s in same_name):
+            same_name.append(src)
+    copied, present = 0, 0
+    for name, srcs in sources.items():
+        if len(srcs) > 1:
+            print(f"WARNING: not gathering {name}: registered by several files "
+                  f"({', '.join(s.as_posix() for s in srcs)})", file=sys.stderr)
             continue
-        if OUTPUT_DIR in csv_path.parents or csv_path.parent == OUTPUT_DIR:
+        dest = OUTPUT_DIR / name
+        if dest.exists() and _same_file(srcs[0], dest):
+            present += 1
             continue
-        # copy into OUTPUT_DIR, preserving basename; avoid overwrite by suffixing
-        dest = OUTPUT_DIR / csv_path.name
-        if dest.exists():
-            stem, suf = dest.stem, dest.suffix
-            i = 1
-            while dest.exists():
-                dest = OUTPUT_DIR / f"{stem}_{i}{suf}"
-                i += 1
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(csv_path, dest)
-        moved += 1
-    print(f"CSV gather complete. Moved/copied: {moved}")
-    return moved
-
-def main() -> int:
-    scripts = discover_scripts()
+        _copy_into(srcs[0], dest)
+        copied += 1
+    print(f"CSV gather complete. Copied: {copied}, already present: {present}")
+    return copied
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS,
+                    help="scripts to run concurrently (0 = one per CPU; default: $RUN_ALL_JOBS or 1)")
+    ap.add_argument("--force", action="store_true", help="ignore the build manifest and rerun everything")
+    ap.add_argument("--only", metavar="NAMES", default="",
+                    help="comma-separated scripts (file name or stem) to rerun regardless of the cache")
+    ap.add_argument("--warm", action="store_true", default=WARM,
+                    help="run scripts in forked children of preloaded workers (default: $RUN_ALL_WARM=1)")
+    ap.add_argument("--portfolio", action="store_true", default=PORTFOLIO,
+                    help="also run every project module in portfolio/pipeline.py (default: $RUN_ALL_PORTFOLIO=1)")
+    return ap.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    scripts = discover_scripts() + (discover_steps() if args.portfolio else [])
     if not scripts:
         print("No scripts found in scripts/*.py")
         return 0
+    jobs = args.jobs or os.cpu_count() or 1
     print(f"Discovered {len(scripts)} script(s): " + ", ".join(p.name for p in scripts))
-    failures = []
-    for p in scripts:
-        code = run_script(p)
-        status = "OK" if code == 0 else f"FAIL({code})"
-        print(f"{p.name}: {status}")
-        if code != 0:
-            failures.append((p.name, code))
+    only = {n.strip() for n in args.only.split(",") if n.strip()}
+    if only:
+        scripts = [p for p in scripts if p.name in only or p.stem in only]
+        unknown = only - {p.name for p in scripts} - {p.stem for p in scripts}
+        if unknown:
+            print(f"Unknown script(s) for --only: {', '.join(sorted(unknown))}")
+            return 2
+    cache = BuildCache(force=args.force or bool(only))
+    history = RunHistory()
+    deps = build_graph(scripts)
+    est = {p: history.estimate(p) for p in scripts}
+    makespan = predict_makespan(scripts, deps, est, critical_paths(scripts, deps, est), jobs)
+    print(f"Predicted makespan on {jobs} worker(s): {makespan:.1f}s "
+          f"(total work {sum(est.values()):.1f}s, {sum(history.predict(p) is None for p in scripts)} "
+          f"script(s) without history; cached scripts finish sooner)")
+    t0 = time.time()
+    results = run_graph(scripts, deps, jobs=jobs, cache=cache, warm=args.warm, history=history)
+    ordered = [results[p] for p in scripts]
+    cache.save()
+    history.save()
+    print_report(ordered)
+    print(f"Resource report: {write_report(ordered, time.time() - t0, jobs, args.warm)}")
+    print(cache.summary())
+    failures = [(r.name, r.code) for r in ordered if r.code != 0]
     gather_csvs()
     if failures:
         print("Some scripts failed:")
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from econometrics.psm_matching import balance as balance_module
+from econometrics.psm_matching.balance import balance
+from econometrics.psm_matching.ps_match import match, simulate
+
+
+@pytest.fixture(scope="module")
+def df():
+    df = simulate(np.random.default_rng(0), 600)
+    df["x3"] = np.round(df["x1"])  # heavily tied
+    return df
+
+
+def reference(df, w, covariate):
+    """One covariate under one weight vector, written out directly."""
+    t, x = df["t"].to_numpy() == 1, df[covariate].to_numpy()
+    m1, m0 = np.average(x[t], weights=w[t]), np.average(x[~t], weights=w[~t])
+    v1 = np.average((x[t] - m1) ** 2, weights=w[t])
+    v0 = np.average((x[~t] - m0) ** 2, weights=w[~t])
+    scale = np.sqrt((x[t].var() + x[~t].var()) / 2)
+    grid = np.unique(x)
+    f1 = np.array([w[t][x[t] <= v].sum() for v in grid]) / w[t].sum()
+    f0 = np.array([w[~t][x[~t] <= v].sum() for v in grid]) / w[~t].sum()
+    return m1, m0, (m1 - m0) / scale, v1 / v0, np.abs(f1 - f0).max()
+
+
+def test_matches_direct_computation(df, monkeypatch):
+    monkeypatch.setattr(balance_module, "CHUNK", 7)  # many chunk boundaries
+    rng = np.random.default_rng(1)
+    specs = {"random": rng.random(len(df)), "nn 2:1": match(df, "t", "y", "ps", k=2)}
+    report = balance(df, "t", ["x1", "x2", "x3"], specs)
+    assert list(report.index.unique(level="spec")) == ["unadjusted", "random", "nn 2:1"]
+    weights = [np.ones(len(df)), specs["random"], specs["nn 2:1"].weights.to_numpy()]
+    for spec, w in zip(["unadjusted", "random", "nn 2:1"], weights):
+        for covariate in ["x1", "x2", "x3"]:
+            row = report.loc[(spec, covariate)]
+            assert row.to_numpy() == pytest.approx(reference(df, w, covariate), rel=1e-10)
+
+
+def test_unweighted_ks_is_the_two_sample_statistic(df):
+    report = balance(df, "t", ["x1", "x3"])
+    for covariate in ["x1", "x3"]:
+        ks = stats.ks_2samp(df.loc[df["t"] == 1, covariate], df.loc[df["t"] == 0, covariate])
+        assert report.loc[("unadjusted", covariate), "ks"] == pytest.approx(ks.statistic)
+
+
+def test_series_weights_align_by_index(df):
+    subset = df.sample(frac=0.5, random_state=0)
+    res = match(subset, "t", "y", "ps")
+    report = balance(df, "t", ["x1"], {"half": res, "half again": res.weights[::-1]})
+    assert report.loc["half"].equals(report.loc["half again"])
+    direct = balance(subset, "t", ["x1"], {"half": res})
+    assert report.loc[("half", "x1"), "ks"] == pytest.approx(direct.loc[("half", "x1"), "ks"])
+    with pytest.raises(ValueError):
+        balance(df, "t", ["x1"], {"short": np.ones(3)})
+    with pytest.raises(ValueError):
+        balance(df, "t", ["x1"], {"unadjusted": np.ones(len(df))})
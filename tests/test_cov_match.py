@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from econometrics.psm_matching.cov_match import covariate_match, simulate_blocked
+from econometrics.psm_matching.ps_match import match
+
+
+@pytest.fixture(scope="module")
+def df():
+    return simulate_blocked(np.random.default_rng(0), 1500, blocks=6)
+
+
+def brute_force(df, covariates, exact, k):
+    """Bias-corrected ATT with Mahalanobis distances computed pair by pair."""
+    x = df[covariates].to_numpy()
+    s_inv = np.linalg.inv(np.cov(x, rowvar=False))
+    t, y, g = df["t"].to_numpy(), df["y"].to_numpy(), df[exact].to_numpy()
+    controls = np.flatnonzero(t == 0)
+    matches = {}
+    for i in np.flatnonzero(t == 1):
+        cand = controls[g[controls] == g[i]]
+        gap = x[cand] - x[i]
+        d2 = np.einsum("ij,jk,ik->i", gap, s_inv, gap)
+        matches[i] = cand[np.argsort(d2)[:k]]
+    uses = np.zeros(len(y))
+    for near in matches.values():
+        uses[near] += 1 / len(near)
+    fit = uses > 0
+    design = np.column_stack([np.ones(len(y)), x])
+    root = np.sqrt(uses[fit])
+    beta = np.linalg.lstsq(design[fit] * root[:, None], y[fit] * root, rcond=None)[0]
+    effects = [y[i] - np.mean(y[near] + (x[i] - x[near]) @ beta[1:]) for i, near in matches.items()]
+    return np.mean(effects)
+
+
+def test_blocked_bias_corrected_att_matches_brute_force(df):
+    res = covariate_match(df, "t", "y", ["x1", "x2"], exact=["region"], k=3)
+    assert res.estimate == pytest.approx(brute_force(df, ["x1", "x2"], "region", 3), rel=1e-10)
+    assert abs(res.estimate - 1.5) < 4 * res.std_error
+    assert res.weights.index.equals(df.index)
+
+
+def test_one_covariate_without_correction_is_score_matching(df):
+    for estimand, k in [("ATT", 1), ("ATE", 2)]:
+        res = covariate_match(df, "t", "y", ["x1"], estimand=estimand, k=k, bias_adjust=False)
+        ref = match(df, "t", "y", "x1", estimand=estimand, k=k)
+        assert res.estimate == pytest.approx(ref.estimate, rel=1e-12)
+        assert res.std_error == pytest.approx(ref.std_error, rel=1e-12)
+        assert res.weights.equals(ref.weights)
+
+
+def test_processes_and_trees_agree(df):
+    kwargs = dict(exact=["region"], estimand="ATE", k=2)
+    ref = covariate_match(df, "t", "y", ["x1", "x2"], **kwargs)
+    for tree, jobs in [("kd", 2), ("ball", 1)]:
+        res = covariate_match(df, "t", "y", ["x1", "x2"], tree=tree, jobs=jobs, **kwargs)
+        assert res.estimate == pytest.approx(ref.estimate, rel=1e-12)
+        assert res.std_error == pytest.approx(ref.std_error, rel=1e-12)
+
+
+def test_caliper_and_blocks_without_controls(df):
+    # every 50th treated unit alone in a region of its own
+    moved = (df["t"] == 1) & (df.index % 50 == 0)
+    lonely = df.assign(region=df["region"] + 100 * moved)
+    res = covariate_match(lonely, "t", "y", ["x1", "x2"], exact=["region"], caliper=0.2)
+    assert (res.pairs["distance"] <= 0.2).all()
+    assert res.n_matched + res.n_unmatched == (df["t"] == 1).sum()
+    assert np.isfinite(res.std_error)
+    with pytest.raises(ValueError):
+        covariate_match(df, "t", "y", ["x1"], tree="vp")
+    with pytest.raises(ValueError, match="no unit matched"):
+        covariate_match(df, "t", "y", ["x1", "x2"], exact=["region"], caliper=0.0)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import dataset_io
+from portfolio.dataset_io import apply_filters, read_dataset, write_dataset
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return pd.DataFrame({
+        "year": np.repeat(np.arange(2015, 2025, dtype=np.int16), n // 10),
+        "metro": pd.Categorical(rng.choice(["NYC", "PHX", "ATL"], size=n)),
+        "emp": rng.normal(size=n).astype(np.float32),
+    })
+
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_roundtrip_preserves_dtypes_and_exports_csv(tmp_path, frame, fmt):
+    pytest.importorskip("pyarrow")
+    path = write_dataset(frame, tmp_path / "emp", fmt=fmt)
+    assert path.suffix == f".{fmt}"
+    assert (tmp_path / "emp.csv").exists()
+    back = read_dataset(tmp_path / "emp")
+    pd.testing.assert_frame_equal(back, frame)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_projection_and_filters(tmp_path, frame, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    write_dataset(frame, tmp_path / "emp", fmt=fmt, csv=False, row_group_size=100)
+    filters = [("year", ">=", 2020), ("metro", "in", ["NYC", "PHX"])]
+    got = read_dataset(tmp_path / f"emp.{fmt}", columns=["emp"], filters=filters)
+    keep = (frame["year"] >= 2020) & frame["metro"].isin(["NYC", "PHX"])
+    assert list(got.columns) == ["emp"]
+    np.testing.assert_allclose(got["emp"], frame.loc[keep, "emp"], rtol=1e-6)
+
+
+def test_or_filters_and_csv_fallback(tmp_path, frame, monkeypatch):
+    either = apply_filters(frame, [[("year", "==", 2015)], [("metro", "==", "ATL")]])
+    assert len(either) == ((frame["year"] == 2015) | (frame["metro"] == "ATL")).sum()
+    monkeypatch.setattr(dataset_io, "HAVE_ARROW", False)
+    with pytest.warns(UserWarning):
+        path = write_dataset(frame, tmp_path / "emp")
+    assert path.suffix == ".csv"
+    assert len(read_dataset(tmp_path / "emp")) == len(frame)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_write_chunks_streams_blocks_into_one_dataset(tmp_path, frame, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    blocks = (frame.iloc[i:i + 300] for i in range(0, len(frame), 300))
+    path = dataset_io.write_chunks(blocks, tmp_path / "emp", fmt=fmt, csv=fmt == "parquet")
+    assert path.suffix == f".{fmt}"
+    assert (tmp_path / "emp.csv").exists() == (fmt != "feather")
+    back = read_dataset(path)
+    if fmt != "parquet":  # feather streams store categoricals as plain values
+        back = back.astype(frame.dtypes.to_dict())
+    pd.testing.assert_frame_equal(back, frame)
+    with pytest.raises(ValueError, match="no chunks"):
+        dataset_io.write_chunks(iter(()), tmp_path / "empty", fmt=fmt)
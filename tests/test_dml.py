@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from econometrics.psm_matching.dml import DML, OOFCache, _fold_ids, simulate
+
+COVARIATES = [f"x{j}" for j in range(4)]
+
+
+@pytest.fixture(scope="module")
+def df():
+    return simulate(np.random.default_rng(0), 800, p=4)
+
+
+def linear(df, **kwargs):
+    kwargs.setdefault("cache", OOFCache())
+    return DML(df, "y", "d", COVARIATES, learner=LinearRegression(),
+               treatment_learner=LogisticRegression(), **kwargs)  # fmt: skip
+
+
+def manual_predictions(df, folds, seed, rep):
+    x, d, y = df[COVARIATES].to_numpy(), df["d"].to_numpy(), df["y"].to_numpy()
+    ids = _fold_ids(len(df), folds, seed, rep)
+    l, m, g0, g1 = (np.empty(len(df)) for _ in range(4))
+    for k in range(folds):
+        train, test = ids != k, ids == k
+        l[test] = LinearRegression().fit(x[train], y[train]).predict(x[test])
+        m[test] = LogisticRegression().fit(x[train], d[train]).predict_proba(x[test])[:, 1]
+        for arm, g in ((0, g0), (1, g1)):
+            rows = train & (d == arm)
+            g[test] = LinearRegression().fit(x[rows], y[rows]).predict(x[test])
+    return d, y, l, m, g0, g1
+
+
+def test_single_split_scores_match_fold_by_fold_fits(df):
+    dml = linear(df, folds=4, seed=3)
+    d, y, l, m, g0, g1 = manual_predictions(df, 4, 3, 0)
+    u, v = y - l, d - m
+    theta = (u @ v) / (v @ v)
+    se = np.sqrt(np.mean(((u - theta * v) * v) ** 2) / np.mean(v * v) ** 2 / len(y))
+    plr = dml.plr()
+    assert plr.estimate == pytest.approx(theta, rel=1e-10)
+    assert plr.std_error == pytest.approx(se, rel=1e-10)
+    m = np.clip(m, 0.01, 0.99)
+    psi = g1 - g0 + d * (y - g1) / m - (1 - d) * (y - g0) / (1 - m)
+    ate = dml.irm("ATE")
+    assert ate.estimate == pytest.approx(psi.mean(), rel=1e-10)
+    assert ate.std_error == pytest.approx(psi.std() / np.sqrt(len(y)), rel=1e-10)
+    att = (d * (y - g0) - m * (1 - d) * (y - g0) / (1 - m)).mean() / d.mean()
+    assert dml.irm("ATTE").estimate == pytest.approx(att, rel=1e-10)
+
+
+def test_median_over_splits_and_processes(df):
+    res = linear(df, reps=3).irm()
+    assert len(set(res.splits)) == 3
+    assert res.estimate == np.median(res.splits)
+    var = np.median(res.split_std_errors**2 + (res.splits - res.estimate) ** 2)
+    assert res.std_error == pytest.approx(np.sqrt(var))
+    parallel = linear(df, reps=3, jobs=2).irm()
+    assert np.array_equal(parallel.splits, res.splits)
+
+
+def test_out_of_fold_predictions_are_cached_by_data_hash(df, tmp_path):
+    cache = OOFCache(tmp_path)
+    dml = linear(df, reps=2, cache=cache)
+    dml.plr()
+    assert (cache.hits, cache.misses) == (0, 4)  # l and m, two splits each
+    dml.irm("ATTE")
+    assert (cache.hits, cache.misses) == (2, 6)  # m reused, g0 fitted
+    first = linear(df, reps=2, cache=OOFCache(tmp_path)).irm("ATTE")  # from disk
+    again = linear(df.copy(), reps=2, cache=cache).irm("ATTE", clip=0.3)
+    assert (cache.hits, cache.misses) == (6, 6)
+    assert first.estimate == dml.irm("ATTE").estimate
+    assert again.estimate != first.estimate  # only the final stage changed
+    linear(df.assign(y=df["y"] + 1), reps=2, cache=cache).plr()
+    assert cache.misses == 10
+
+
+def test_rejects_bad_inputs(df):
+    with pytest.raises(ValueError):
+        linear(df.assign(d=df["d"] + 0.5)).irm()
+    with pytest.raises(ValueError):
+        DML(df, "y", "d", COVARIATES, learner="svm")
+    with pytest.raises(ValueError):
+        linear(df).irm("ATC")
+
+
+def test_cache_is_opt_in_and_lasso_logit_is_sparse(df):
+    assert linear(df, cache=None).cache is None
+    assert linear(df, cache=None).plr().estimate == linear(df).plr().estimate
+    x = df[COVARIATES].to_numpy()
+    noise = np.random.default_rng(1).normal(size=(len(df), 20))
+    logit = clone(DML(df, "y", "d", COVARIATES, learner="lasso").treatment_learner)
+    coef = logit.fit(np.hstack([x, noise]), df["d"]).steps[-1][1].coef_
+    assert (coef == 0).sum() >= 10  # the L1 penalty zeroes most of the noise columns
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from linearmodels import AbsorbingLS, PanelOLS
+
+from econometrics.panel_fixed_random.fe_absorb import absorb, absorbed_df, simulate, singletons
+
+
+def slope(out):
+    return out.data["x"] @ out.data["y"] / (out.data["x"] @ out.data["x"])
+
+
+def test_one_way_matches_panelols_in_a_single_sweep():
+    df = simulate(np.random.default_rng(0), 200, 8)
+    out = absorb(df, ["y", "x"], fe="unit")
+    panel = df.set_index(["unit", "time"])
+    ref = PanelOLS(panel["y"], panel[["x"]], entity_effects=True).fit()
+    assert out.sweeps == 1
+    assert slope(out) == pytest.approx(ref.params["x"], rel=1e-12)
+
+
+@pytest.mark.parametrize("method", ["cg", "ap"])
+def test_multi_way_matches_dummies(method):
+    df = simulate(np.random.default_rng(1), 300, 6)
+    df["shift"] = np.random.default_rng(2).integers(0, 4, len(df))
+    fe = ["unit", "time", "shift"]
+    out = absorb(df, ["y", "x"], fe=fe, method=method)
+    ref = AbsorbingLS(df["y"], df[["x"]], absorb=df[fe].astype("category")).fit()
+    assert out.converged
+    assert slope(out) == pytest.approx(ref.params["x"], rel=1e-9)
+    for col in fe:  # every group mean of the residuals is gone
+        means = out.data.groupby(df[col]).mean().abs().to_numpy()
+        assert means.max() < 1e-8
+
+
+def test_poorly_connected_design_converges():
+    rng = np.random.default_rng(3)
+    n = 50_000
+    worker = rng.integers(0, 5_000, n)
+    firm = np.where(rng.random(n) < 0.05, rng.integers(0, 200, n), worker // 25)
+    df = pd.DataFrame({"worker": worker, "firm": firm, "x": rng.normal(size=n)})
+    df["y"] = df["x"] + (worker % 7) + (firm % 5) + rng.normal(size=n)
+    cg = absorb(df, ["y", "x"], fe=["worker", "firm"])
+    ap = absorb(df, ["y", "x"], fe=["worker", "firm"], method="ap")
+    assert cg.converged and ap.converged
+    np.testing.assert_allclose(cg.data.to_numpy(), ap.data.to_numpy(), atol=1e-6)
+
+
+def test_degrees_of_freedom_and_singletons():
+    unit = np.array([0, 0, 1, 1, 2, 3, 3])
+    time = np.array([0, 1, 0, 1, 5, 6, 6])  # units 2 and 3 form their own components
+    groups = [pd.factorize(unit)[0], pd.factorize(time)[0]]
+    assert absorbed_df(groups) == 4 + 4 - 3
+    dropped = singletons(groups)
+    assert dropped.tolist() == [False, False, False, False, True, False, False]
+    df = pd.DataFrame({"unit": unit, "time": time, "y": np.arange(7.0), "x": np.ones(7)})
+    assert absorb(df, ["y"], ["unit", "time"], drop_singletons=True).dropped_singletons == 1
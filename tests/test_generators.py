@@ -0,0 +1,42 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from portfolio import generators
+
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+
+
+def test_streams_do_not_depend_on_the_subset_built():
+    alone = generators.generate("rd_sim")
+    together = [generators.generate(name) for name in generators.DATASETS]
+    pd.testing.assert_frame_equal(alone, together[list(generators.DATASETS).index("rd_sim")])
+    assert not generators.generate("rd_sim", seed=1).equals(alone)
+
+
+def test_sizes_scale_and_panel_is_balanced():
+    panel = generators.generate("panel_sim", scale=2.5)
+    assert len(panel) == 300 * 8
+    assert panel.groupby("unit").size().eq(8).all()
+    assert panel["time"].max() == 7
+    assert len(generators.generate("did_sim", scale=0.5)) == 1000
+    with pytest.raises(KeyError):
+        generators.generate("no_such_dataset")
+
+
+def test_parallel_build_writes_files_and_streams_zip(tmp_path):
+    pytest.importorskip("pyarrow")
+    names = ["did_sim", "panel_sim", "garch_like_returns"]
+    bundle = tmp_path / "bundle.zip"
+    written = generators.build(names, tmp_path / "out", bundle, jobs=3)
+    assert [p.name for p in written] == [f"{n}.parquet" for n in names] + ["bundle.zip"]
+    with zipfile.ZipFile(bundle) as z:
+        assert z.namelist() == [f"{n}.csv" for n in names]
+        for name in names:
+            from_zip = pd.read_csv(z.open(f"{name}.csv"))
+            pd.testing.assert_frame_equal(from_zip, pd.read_csv(tmp_path / "out" / f"{name}.csv"))
+    assert generators.main(["bogus"]) == 2
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.model_selection import KFold
+
+from econometrics.psm_matching.ipw import Weighting
+from econometrics.psm_matching.ps_match import simulate
+
+
+@pytest.fixture(scope="module")
+def df():
+    df = simulate(np.random.default_rng(0), 3000)
+    df["y"] += 0.5 * df["x1"] ** 2  # outcome model misspecified, score correct
+    return df
+
+
+@pytest.mark.parametrize("estimand", ["ATE", "ATT"])
+def test_stabilized_ipw_is_weighted_least_squares(df, estimand):
+    est = Weighting(df, "t", "y", ["x1", "x2"], score="ps")
+    t, e = df["t"].to_numpy(), np.clip(df["ps"].to_numpy(), 0.01, 0.99)
+    if estimand == "ATE":
+        w = t / e + (1 - t) / (1 - e)
+    else:
+        w = t + (1 - t) * e / (1 - e)
+    ref = sm.WLS(df["y"].to_numpy(), sm.add_constant(t.astype(float)), weights=w).fit(
+        cov_type="HC0"
+    )
+    res = est.fit("stabilized", estimand)
+    assert res.estimate == pytest.approx(ref.params[1], rel=1e-10)
+    assert res.std_error == pytest.approx(ref.bse[1], rel=1e-8)
+
+
+def test_cross_fitted_aipw_matches_fold_by_fold_fits(df):
+    est = Weighting(df, "t", "y", ["x1", "x2"], folds=3, seed=4)
+    x, t, y = df[["x1", "x2"]].to_numpy(), df["t"].to_numpy(), df["y"].to_numpy()
+    e, mu0, mu1 = np.empty(len(y)), np.empty(len(y)), np.empty(len(y))
+    for train, test in KFold(3, shuffle=True, random_state=4).split(x):
+        e[test] = LogisticRegression().fit(x[train], t[train]).predict_proba(x[test])[:, 1]
+        for arm, mu in ((0, mu0), (1, mu1)):
+            rows = train[t[train] == arm]
+            mu[test] = LinearRegression().fit(x[rows], y[rows]).predict(x[test])
+    e = np.clip(e, 0.01, 0.99)
+    psi = mu1 - mu0 + t * (y - mu1) / e - (1 - t) * (y - mu0) / (1 - e)
+    res = est.fit("aipw", "ATE")
+    assert res.estimate == pytest.approx(psi.mean(), rel=1e-10)
+    assert res.std_error == pytest.approx(psi.std() / np.sqrt(len(y)), rel=1e-10)
+    att = est.fit("aipw", "ATT")
+    odds = (1 - t) * e / (1 - e)
+    assert att.estimate == pytest.approx((t * (y - mu0) - odds * (y - mu0)).sum() / t.sum())
+    assert abs(res.estimate - 1.5) < 4 * res.std_error
+
+
+def test_bootstrap_reweights_without_refitting(df):
+    est = Weighting(df, "t", "y", ["x1", "x2"], score="ps")
+    boot = est.bootstrap(reps=40, seed=7)
+    assert boot.shape == (40, 6)
+    assert est.bootstrap(reps=40, jobs=2, seed=7).equals(boot)
+    # replicate 0 is the estimate on the data resampled with its counts
+    seed = np.random.SeedSequence(7).spawn(40)[0]
+    draws = np.random.default_rng(seed).integers(0, len(df), len(df))
+    counts = np.bincount(draws, minlength=len(df))
+    resampled = df.loc[df.index.repeat(counts)]
+    again = Weighting(resampled, "t", "y", ["x1", "x2"], score="ps")
+    for method, estimand in [("ipw", "ATE"), ("stabilized", "ATT")]:
+        expected = again.fit(method, estimand).estimate
+        assert boot[(method, estimand)].iloc[0] == pytest.approx(expected, rel=1e-10)
+    with pytest.raises(ValueError):
+        est.fit("tmle")
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+from linearmodels.iv import IV2SLS, IVGMM, IVLIML
+
+from econometrics.iv_2sls import iv_engine as eng
+from test_iv_2sls import simulate_iv
+
+
+def test_matches_linearmodels_on_the_iv_simulation():
+    df = simulate_iv()
+    ref = IV2SLS.from_formula("y ~ 1 + [x ~ z]", data=df).fit()
+    res = eng.fit_iv(df, "y", endog="x", instruments="z")
+    np.testing.assert_allclose(res.params.values, ref.params.values, rtol=1e-10)
+    np.testing.assert_allclose(res.std_errors.values, ref.std_errors.values, rtol=1e-10)
+
+
+@pytest.mark.parametrize("method,model", [("2sls", IV2SLS), ("gmm", IVGMM), ("liml", IVLIML)])
+@pytest.mark.parametrize("cov_type", ["unadjusted", "robust", "clustered"])
+def test_overidentified_methods_and_covariances(method, model, cov_type):
+    df = eng.simulate(np.random.default_rng(1), 3000, n_firms=40)
+    formula = "y ~ 1 + w + [x1 + x2 ~ z1 + z2 + z3]"
+    clustered = {"clusters": df["firm"]} if cov_type == "clustered" else {}
+    if method == "gmm":
+        mod = model.from_formula(formula, df, weight_type=cov_type, **clustered)
+        ref = mod.fit(cov_type=cov_type, **clustered)
+    else:
+        ref = model.from_formula(formula, df).fit(cov_type=cov_type, **clustered)
+    res = eng.fit_iv(
+        df, "y", ["x1", "x2"], ["z1", "z2", "z3"], exog="w", method=method,
+        cov_type=cov_type, clusters="firm" if clustered else None,
+    )
+    np.testing.assert_allclose(res.params.values, ref.params.values, rtol=1e-9)
+    np.testing.assert_allclose(res.std_errors.values, ref.std_errors.values, rtol=1e-9)
+    if method == "gmm":
+        assert res.j_stat == pytest.approx(ref.j_stat.stat, rel=1e-9)
+    if method == "liml":
+        assert res.kappa == pytest.approx(ref.kappa, rel=1e-12)
+
+
+@pytest.mark.filterwarnings("ignore:invalid value:RuntimeWarning")  # NaN SEs on some dummies
+def test_absorbed_effects_equal_dummies():
+    df = eng.simulate(np.random.default_rng(2), 2000, n_firms=30)
+    df["year"] = np.random.default_rng(3).integers(0, 12, len(df))
+    ref = IVLIML.from_formula(
+        "y ~ 1 + w + C(firm) + C(year) + [x1 + x2 ~ z1 + z2 + z3]", df
+    ).fit(cov_type="clustered", clusters=df[["firm", "year"]])
+    res = eng.fit_iv(
+        df, "y", ["x1", "x2"], ["z1", "z2", "z3"], exog="w", absorb=["firm", "year"],
+        method="liml", cov_type="clustered", clusters=["firm", "year"],
+    )
+    names = ["w", "x1", "x2"]
+    np.testing.assert_allclose(res.params[names], ref.params[names], rtol=1e-8)
+    np.testing.assert_allclose(res.std_errors[names], ref.std_errors[names], rtol=1e-7)
+    assert res.sweeps > 1
+
+
+def test_first_stage_f_and_errors():
+    df = simulate_iv()
+    fs = sm.OLS(df["x"], sm.add_constant(df["z"])).fit()
+    res = eng.fit_iv(df, "y", endog="x", instruments="z", cov_type="unadjusted")
+    assert res.first_stage_f["x"] == pytest.approx(fs.fvalue, rel=1e-10)
+    with pytest.raises(ValueError, match="at least as many instruments"):
+        eng.fit_iv(df, "y", endog=["x", "z"], instruments="z")
+    with pytest.raises(ValueError, match="collinear"):
+        eng.fit_iv(df.assign(z2=2 * df["z"]), "y", endog="x", instruments=["z", "z2"])
@@ -0,0 +1,52 @@
+import importlib.util
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from portfolio.results import ModuleResult
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load(relpath):
+    spec = importlib.util.spec_from_file_location(Path(relpath).stem, ROOT / relpath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("relpath, columns", [
+    ("macro_models/solow_growth/solow.py", ["period", "k", "y", "c"]),
+    ("time_series/garch_volatility/garch_demo.py", ["t", "returns", "approx_vol"]),
+    ("labor_law_compliance/wage_hour_audit/wage_hour_audit.py", ["employee_id", "dept", "hours"]),
+])
+def test_main_returns_result_without_touching_disk(relpath, columns, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = load(relpath).main(out_dir=None)
+    assert isinstance(result, ModuleResult)
+    assert result.path is None
+    assert set(columns) <= set(result.data.columns)
+    assert not any(tmp_path.iterdir())
+
+
+def test_sink_writes_and_models_are_returned(tmp_path, monkeypatch):
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+    result = load("ml/sklearn_credit_risk_model.py").main(out_dir=tmp_path)
+    assert result.path.parent == tmp_path and result.path.exists()
+    assert (tmp_path / "credit_risk_synthetic.csv").exists()
+    proba = result.models["rf"].predict_proba(result.meta["X_test"])
+    assert proba.shape == (len(result.meta["y_test"]), 2)
+
+
+def test_chunked_main_streams_to_disk(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+    module = load("labor_law_compliance/wage_hour_audit/wage_hour_audit.py")
+    result = module.main(out_dir=tmp_path, n=50, chunk_rows=26 * 20)
+    assert result.meta["chunked"] and result.data.empty
+    assert result.path == tmp_path / "timesheets_synthetic_n50.parquet"
+    df = pd.read_parquet(result.path)
+    assert len(df) == 50 * 26 and df["employee_id"].nunique() == 50
+    with pytest.raises(ValueError):
+        module.main(out_dir=None, n=50, chunk_rows=26)
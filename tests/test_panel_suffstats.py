@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from linearmodels.panel import BetweenOLS, PanelOLS, RandomEffects
+
+from econometrics.panel_fixed_random.panel_suffstats import EntityStats
+
+
+@pytest.fixture(scope="module")
+def panel():
+    rng = np.random.default_rng(0)
+    counts = rng.integers(2, 8, 300)  # unbalanced
+    unit = np.repeat(np.arange(300), counts)
+    time = np.concatenate([np.arange(k) for k in counts])
+    alpha = rng.normal(size=300)[unit]
+    x1 = rng.normal(size=len(unit)) + 0.4 * alpha
+    x2 = rng.normal(size=len(unit))
+    y = 1.0 + 2.0 * x1 - x2 + alpha + rng.normal(size=len(unit))
+    return pd.DataFrame({"unit": unit, "time": time, "x1": x1, "x2": x2, "y": y})
+
+
+def test_matches_linearmodels(panel):
+    fit = EntityStats.from_frame(panel, "unit", "y", ["x1", "x2"]).fit()
+    p = panel.set_index(["unit", "time"])
+    exog = sm.add_constant(p[["x1", "x2"]])
+    re = RandomEffects(p["y"], exog).fit()
+    fe = PanelOLS(p["y"], exog, entity_effects=True).fit()
+    be = BetweenOLS(p["y"], exog).fit()
+    for col, ref in (("random", re), ("within", fe), ("between", be)):
+        assert np.allclose(fit.params[col], ref.params, rtol=1e-9)
+    assert np.allclose(fit.std_errors["random"], re.std_errors, rtol=1e-9)
+    assert np.allclose(fit.std_errors["between"], be.std_errors, rtol=1e-9)
+    assert np.allclose(fit.std_errors["within"][1:], fe.std_errors[1:], rtol=1e-9)
+    assert fit.sigma2_u == pytest.approx(re.variance_decomposition["Effects"], rel=1e-9)
+    assert np.allclose(fit.theta, re.theta.squeeze().sort_index())
+
+
+def test_mundlak_matches_explicit_augmented_regression(panel):
+    fit = EntityStats.from_frame(panel, "unit", "y", ["x1", "x2"]).fit()
+    theta = fit.theta.reindex(panel["unit"]).to_numpy()[:, None]
+    means = panel.groupby("unit")[["x1", "x2"]].transform("mean")
+    z = pd.DataFrame(
+        {"const": 1.0, "x1": panel["x1"], "x2": panel["x2"], "m1": means["x1"], "m2": means["x2"]}
+    )
+    yz = pd.concat([z, panel["y"]], axis=1)
+    yz = yz - theta * yz.groupby(panel["unit"]).transform("mean")
+    ref = sm.OLS(yz["y"], yz[z.columns]).fit(cov_type="cluster", cov_kwds={"groups": panel["unit"]})
+    wald = ref.wald_test("m1 = 0, m2 = 0", use_f=False, scalar=True)
+    assert fit.mundlak["stat"] == pytest.approx(float(wald.statistic), rel=1e-9)
+    assert fit.mundlak["df"] == 2
+    # the coefficient on x in the Mundlak regression is the within estimate
+    assert np.allclose(ref.params[["x1", "x2"]], fit.params["within"][1:], rtol=1e-9)
+
+
+def test_update_equals_full_pass(panel):
+    full = EntityStats.from_frame(panel, "unit", "y", ["x1", "x2"])
+    early = panel["time"] < 3
+    parts = EntityStats.from_frame(panel[early], "unit", "y", ["x1", "x2"]).update(panel[~early])
+    order = parts.entities.get_indexer(full.entities)
+    assert np.allclose(parts.cross[order], full.cross)
+    a, b = full.fit(), parts.fit()
+    assert np.allclose(a.params, b.params, rtol=1e-12)
+    assert a.hausman["stat"] == pytest.approx(b.hausman["stat"], rel=1e-9)
+
+
+def test_refuses_to_combine_different_models(panel):
+    a = EntityStats.from_frame(panel, "unit", "y", ["x1"])
+    b = EntityStats.from_frame(panel, "unit", "y", ["x2"])
+    with pytest.raises(ValueError):
+        a + b
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+from sklearn.neighbors import NearestNeighbors
+
+from econometrics.psm_matching.ps_match import _greedy, _optimal, match, nearest, simulate
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(0)
+    values = np.sort(rng.random(300))
+    queries = rng.random(50)
+    idx, dist = nearest(values, queries, k=4)
+    brute = np.sort(np.abs(queries[:, None] - values[None, :]), axis=1)[:, :4]
+    assert np.allclose(dist, brute)
+    assert np.allclose(np.abs(values[idx] - queries[:, None]), dist)
+    idx, dist = nearest(values[:2], queries, k=3)
+    assert (idx[:, 2] == -1).all() and np.isinf(dist[:, 2]).all()
+
+
+def test_greedy_is_closest_pairs_first():
+    rng = np.random.default_rng(1)
+    for caliper in (np.inf, 0.05):
+        for _ in range(50):
+            src, tgt = rng.random(rng.integers(1, 15)), rng.random(rng.integers(1, 15))
+            dist = np.abs(src[:, None] - tgt[None, :])
+            expected = np.full(len(src), -1)
+            while np.isfinite(dist).any() and dist.min() <= caliper:
+                i, j = np.unravel_index(np.argmin(dist), dist.shape)
+                expected[i] = j
+                dist[i, :] = dist[:, j] = np.inf
+            assert np.array_equal(_greedy(src, tgt, caliper), expected)
+
+
+def test_optimal_matches_assignment_solver():
+    rng = np.random.default_rng(2)
+    for trial in range(100):
+        k = int(rng.integers(1, 3))
+        n_src = int(rng.integers(1, 10))
+        n_tgt = int(rng.integers(k * n_src, k * n_src + 12))
+        if trial % 3:
+            src, tgt = rng.beta(3, 2, n_src), rng.beta(2, 3, n_tgt)
+        else:  # many ties
+            src, tgt = rng.integers(0, 5, n_src) * 1.0, rng.integers(0, 5, n_tgt) * 1.0
+        pairs = _optimal(src, tgt, k)
+        assert np.array_equal(np.bincount(pairs[:, 0], minlength=n_src), np.full(n_src, k))
+        assert len(np.unique(pairs[:, 1])) == len(pairs)
+        cost = np.abs(np.repeat(src, k)[:, None] - tgt[None, :])
+        rows, cols = linear_sum_assignment(cost)
+        total = np.abs(src[pairs[:, 0]] - tgt[pairs[:, 1]]).sum()
+        assert total == pytest.approx(cost[rows, cols].sum(), abs=1e-12)
+    with pytest.raises(ValueError):
+        _optimal(np.zeros(3), np.zeros(2), 1)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return simulate(np.random.default_rng(3), 2000)
+
+
+def test_one_to_one_with_replacement_matches_nearest_neighbors(df):
+    treated, control = df[df["t"] == 1], df[df["t"] == 0]
+    nbrs = NearestNeighbors(n_neighbors=1).fit(control[["ps"]])
+    idx = nbrs.kneighbors(treated[["ps"]], return_distance=False)[:, 0]
+    res = match(df, "t", "y", "ps")
+    assert res.estimate == pytest.approx((treated["y"].values - control["y"].values[idx]).mean())
+    assert res.weights[df["t"] == 1].eq(1).all()
+    assert res.weights.sum() == pytest.approx(2 * len(treated))
+
+
+def ai_variance(df, k, estimand, var_matches=2):
+    """Abadie-Imbens (2006) variance with loops over units, no ties."""
+    t, y, s = df["t"].to_numpy(), df["y"].to_numpy(), df["ps"].to_numpy()
+    n = len(y)
+    sources = np.flatnonzero(t == 1) if estimand == "ATT" else np.arange(n)
+    k_used = np.zeros(n)
+    effects = []
+    for i in sources:
+        others = np.flatnonzero(t != t[i])
+        near = others[np.argsort(np.abs(s[others] - s[i]))[:k]]
+        k_used[near] += 1
+        y_hat = y[near].mean()
+        effects.append(y[i] - y_hat if t[i] == 1 else y_hat - y[i])
+    effects = np.array(effects)
+    tau = effects.mean()
+    sigma2 = np.empty(n)
+    for i in range(n):
+        same = np.flatnonzero((t == t[i]) & (np.arange(n) != i))
+        near = same[np.argsort(np.abs(s[same] - s[i]))[:var_matches]]
+        sigma2[i] = var_matches / (var_matches + 1) * (y[i] - y[near].mean()) ** 2
+    if estimand == "ATT":
+        extra = np.where(t == 0, (k_used**2 - k_used) / k**2, 0.0)
+    else:
+        extra = (k_used / k) ** 2 + (2 * k - 1) / k * (k_used / k)
+    return tau, np.sqrt((((effects - tau) ** 2).sum() + extra @ sigma2) / len(sources) ** 2)
+
+
+@pytest.mark.parametrize("estimand, k", [("ATT", 1), ("ATT", 3), ("ATE", 2)])
+def test_abadie_imbens_standard_errors(df, estimand, k):
+    small = df.iloc[:400]
+    res = match(small, "t", "y", "ps", estimand=estimand, k=k)
+    tau, se = ai_variance(small, k, estimand)
+    assert res.estimate == pytest.approx(tau, rel=1e-12)
+    assert res.std_error == pytest.approx(se, rel=1e-10)
+
+
+def test_k_beyond_the_controls_uses_each_once(df):
+    few = df[(df["t"] == 1) | (df.index == df.index[df["t"] == 0][0])]
+    res = match(few, "t", "y", "ps", k=2)
+    assert res.pairs["unit"].is_unique  # one real neighbour each, not the last one twice
+    control = few[few["t"] == 0]
+    assert res.estimate == pytest.approx((few.loc[few["t"] == 1, "y"] - control["y"].iloc[0]).mean())
+    assert res.weights[control.index[0]] == res.n_matched
+
+
+def test_caliper_and_without_replacement(df):
+    res = match(df, "t", "y", "ps", k=2, caliper=0.002)
+    assert (res.pairs["distance"] <= 0.002).all()
+    assert res.n_matched + res.n_unmatched == (df["t"] == 1).sum()
+    for method in ("greedy", "optimal"):
+        res = match(df, "t", "y", "ps", replace=False, method=method, caliper=0.05)
+        assert res.pairs["match"].is_unique
+        assert res.weights.max() == 1
+        assert abs(res.estimate - 1.5) < 4 * res.std_error
+    with pytest.raises(ValueError):
+        match(df, "t", "y", "ps", estimand="ATE", replace=False)
+    with pytest.raises(ValueError, match="no unit matched"):
+        match(df, "t", "y", "ps", caliper=0.0)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from linearmodels.iv import IV2SLS
+
+from econometrics.rd_design.rd_binned import BinnedRD, simulate_fuzzy
+
+WIDTH = 0.05
+
+
+@pytest.fixture(scope="module")
+def discrete():
+    """Fuzzy design whose running variable sits on the bin midpoints, where
+    the binned estimator is exact."""
+    df = simulate_fuzzy(np.random.default_rng(0), 20_000, outcomes=2)
+    df["x"] = (np.floor(df["x"] / WIDTH) + 0.5) * WIDTH
+    return df
+
+
+@pytest.mark.parametrize("kernel", ["triangular", "uniform"])
+def test_fuzzy_matches_weighted_2sls(discrete, kernel):
+    h = 0.8
+    res = BinnedRD(discrete, "x", width=WIDTH).fit("y1", h=h, treatment="d", kernel=kernel)
+    u = np.abs(discrete["x"]) / h
+    w = 1 - u if kernel == "triangular" else u * 0 + 1
+    local = discrete.assign(w=w)[(u < 1) if kernel == "triangular" else (u <= 1)]
+    t = (local["x"] >= 0).astype(float)
+    exog = pd.DataFrame({"const": 1.0, "x": local["x"], "tx": t * local["x"]})
+    ref = IV2SLS(local["y1"], exog, local[["d"]], t.rename("t"), weights=local["w"]).fit(
+        cov_type="robust"
+    )
+    assert res.estimate == pytest.approx(ref.params["d"], rel=1e-9)
+    assert res.std_error == pytest.approx(ref.std_errors["d"], rel=1e-9)
+    assert res.n_left + res.n_right == len(local)
+
+
+def test_sharp_matches_interacted_wls(discrete):
+    h = 0.6
+    res = BinnedRD(discrete, "x", width=WIDTH).fit("y0", h=h)
+    local = discrete[np.abs(discrete["x"]) < h]
+    t = (local["x"] >= 0).astype(float)
+    x = sm.add_constant(np.column_stack([t, local["x"], t * local["x"]]))
+    y = local["y0"].to_numpy()
+    ref = sm.WLS(y, x, weights=1 - np.abs(local["x"]) / h).fit(cov_type="HC0")
+    assert res.first_stage == 1.0
+    assert res.estimate == pytest.approx(ref.params[1], rel=1e-9)
+    assert res.std_error == pytest.approx(ref.bse[1], rel=1e-9)
+
+
+def test_bin_sums_are_cached_across_outcomes(discrete):
+    rd = BinnedRD(discrete, "x", width=WIDTH)
+    rd.fit("y0", h=0.5, treatment="d")
+    d_sums = rd.sums("d")
+    rd.fit("y1", h=0.5, treatment="d")
+    assert rd.sums("d") is d_sums
+    assert set(rd._sums) == {
+        ("y0",), ("y0", "y0"), ("d",), ("d", "d"), ("d", "y0"),
+        ("y1",), ("y1", "y1"), ("d", "y1"),
+    }  # fmt: skip
+    with pytest.raises(ValueError):
+        BinnedRD(discrete.assign(y0=np.nan), "x").fit("y0", h=0.5)
+
+
+def test_density_test_detects_a_jump():
+    rng = np.random.default_rng(3)
+    n = 200_000
+    # twice the density just above the cutoff: log jump ln 2
+    x = np.where(rng.random(n) < 2 / 3, rng.uniform(0, 1, n), rng.uniform(-1, 0, n))
+    test = BinnedRD(pd.DataFrame({"x": x}), "x").density_test()
+    assert abs(test.theta - np.log(2)) < 3 * test.std_error
+    assert test.pvalue < 1e-10
+    smooth = BinnedRD(pd.DataFrame({"x": rng.normal(size=n)}), "x", cutoff=0.2).density_test()
+    assert smooth.pvalue > 0.01
+    assert smooth.f_left == pytest.approx(np.exp(-0.02) / np.sqrt(2 * np.pi), rel=0.05)
+
+
+def test_density_test_counts_empty_bins():
+    x = np.random.default_rng(0).uniform(-1, 1, 2000)  # density 0.5
+    fine = BinnedRD(pd.DataFrame({"x": x}), "x", width=0.0005)
+    assert (fine.counts == 0).mean() > 0.5
+    coarse = BinnedRD(pd.DataFrame({"x": x}), "x", width=0.01)
+    a, b = fine.density_test(h=0.5), coarse.density_test(h=0.5)
+    assert a.f_left == pytest.approx(0.5, rel=0.1) and a.f_right == pytest.approx(0.5, rel=0.1)
+    assert a.theta == pytest.approx(b.theta, abs=0.02)
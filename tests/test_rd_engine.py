@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from econometrics.rd_design.rd_engine import RDEngine, _nn_variance, kernel_constant
+from portfolio.generators import rd_sim
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = rd_sim(np.random.default_rng(0), 3000)
+    df["y"] += 0.3 * df["x"] ** 2  # curvature, so the bandwidth is finite
+    return df
+
+
+def direct(df, h, kernel, order):
+    """Weighted least squares on each side and the nearest-neighbour sandwich."""
+    weight = {
+        "triangular": lambda u: 1 - u,
+        "uniform": lambda u: np.ones_like(u),
+        "epanechnikov": lambda u: 1 - u**2,
+    }[kernel]
+    out = []
+    for side in (df["x"] < 0, df["x"] >= 0):
+        d = np.abs(df.loc[side, "x"].to_numpy())
+        y = df.loc[side, "y"].to_numpy()
+        near = np.argsort(np.abs(d[:, None] - d[None, :]), axis=1)[:, 1:4]
+        s2 = 0.75 * (y - y[near].mean(axis=1)) ** 2
+        keep = d < h if kernel != "uniform" else d <= h
+        x = np.vander(d[keep], order + 1, increasing=True)
+        w = weight(d[keep] / h)
+        fit = sm.WLS(y[keep], x, weights=w).fit()
+        bread = np.linalg.inv(x.T @ (w[:, None] * x))
+        meat = x.T @ ((w**2 * s2[keep])[:, None] * x)
+        out.append((fit.params[0], (bread @ meat @ bread)[0, 0]))
+    (a0, v0), (a1, v1) = out
+    return a1 - a0, np.sqrt(v0 + v1)
+
+
+@pytest.mark.parametrize("kernel", ["triangular", "uniform", "epanechnikov"])
+@pytest.mark.parametrize("order", [1, 2])
+def test_fit_matches_direct_weighted_least_squares(data, kernel, order):
+    rd = RDEngine.from_frame(data, "x", "y")
+    for h in (0.3, 0.8, 1.7):
+        est = rd.fit(h, kernel=kernel, order=order)
+        ref, se = direct(data, h, kernel, order)
+        assert est.estimate == pytest.approx(ref, rel=1e-9)
+        assert est.std_error == pytest.approx(se, rel=1e-8)
+
+
+def test_nn_variance_window_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    d, y = np.sort(rng.random(500)), rng.normal(size=500)
+    near = np.argsort(np.abs(d[:, None] - d[None, :]), axis=1)[:, 1:4]
+    assert np.allclose(_nn_variance(d, y), 0.75 * (y - y[near].mean(axis=1)) ** 2)
+
+
+def test_sensitivity_matches_single_fits(data):
+    rd = RDEngine.from_frame(data, "x", "y")
+    grid = np.linspace(0.1, 2.0, 40)
+    curve = rd.sensitivity(grid)
+    for h, row in zip(grid[::7], curve.iloc[::7].itertuples()):
+        est = rd.fit(h)
+        assert row.estimate == pytest.approx(est.estimate, rel=1e-12)
+        lo, hi = est.conf_int()
+        assert (row.ci_lower, row.ci_upper) == pytest.approx((lo, hi), rel=1e-12)
+    # bandwidths too small for a fit come back as missing rather than raising
+    assert rd.sensitivity([1e-6])["estimate"].isna().all()
+
+
+def test_imbens_kalyanaraman_bandwidth(data):
+    rd = RDEngine.from_frame(data, "x", "y")
+    x, y = data["x"].to_numpy(), data["y"].to_numpy()
+    n, right = len(x), x >= 0
+    h1 = 1.84 * x.std(ddof=1) * n**-0.2
+    win = np.abs(x) <= h1
+    s2 = [y[win & ~right].var(ddof=1), y[win & right].var(ddof=1)]
+    f = win.sum() / (2 * n * h1)
+    cubic = np.column_stack([np.ones(n), right, x, x**2, x**3])
+    m3 = 6 * np.linalg.lstsq(cubic, y, rcond=None)[0][4]
+    curv, reg = [], []
+    for side, v in zip((~right, right), s2):
+        h2 = 3.56 * (v / (f * m3**2)) ** (1 / 7) * side.sum() ** (-1 / 7)
+        keep = side & (np.abs(x) <= h2)
+        curv.append(2 * np.polyfit(x[keep], y[keep], 2)[0])
+        reg.append(2160 * v / (keep.sum() * h2**4))
+    denom = f * ((curv[1] - curv[0]) ** 2 + sum(reg))
+    h = kernel_constant("triangular") * (sum(s2) / denom) ** 0.2 * n**-0.2
+    assert rd.bandwidth("mse") == pytest.approx(h, rel=1e-8)
+    assert rd.bandwidth("cer") == pytest.approx(h * n ** (-1 / 20), rel=1e-8)
+    assert kernel_constant("triangular") == pytest.approx(3.4375, abs=1e-4)
+
+
+def test_cutoff_and_missing_rows(data):
+    shifted = data.assign(x=data["x"] + 5.0)
+    shifted.loc[::50, "y"] = np.nan
+    est = RDEngine.from_frame(shifted, "x", "y", cutoff=5.0).fit(0.8)
+    ref, _ = direct(shifted.dropna().assign(x=lambda f: f["x"] - 5.0), 0.8, "triangular", 1)
+    assert est.estimate == pytest.approx(ref, rel=1e-9)
+    with pytest.raises(ValueError):
+        RDEngine.from_frame(data, "x", "y").bandwidth("cv")
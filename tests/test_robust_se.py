@@ -1,8 +1,14 @@
 
 import numpy as np
+import pandas as pd
+import pytest
 import statsmodels.api as sm
+import statsmodels.formula.api as smf
+from statsmodels.stats import sandwich_covariance as sw
 from statsmodels.stats.diagnostic import het_breuschpagan
 
+from econometrics.heteroskedasticity_robust_inference.ols_results import OLSResults
+
 def test_breusch_pagan_detects_heteroskedasticity():
     rng = np.random.default_rng(11)
     n = 1500
@@ -15,3 +21,58 @@ def test_breusch_pagan_detects_heteroskedasticity():
     ols = sm.OLS(y, X).fit()
     lm, pval, *_ = het_breuschpagan(ols.resid, X)
     assert pval < 0.05
+
+
+def _design(seed=12, n=600):
+    rng = np.random.default_rng(seed)
+    firm, year = rng.integers(0, 40, n), rng.integers(0, 9, n)
+    x1 = rng.normal(size=n) + 0.3 * rng.normal(size=40)[firm]
+    x2 = rng.normal(size=n)
+    eps = rng.normal(scale=np.exp(0.3 * x1)) + rng.normal(size=40)[firm] + rng.normal(size=9)[year]
+    X = sm.add_constant(np.c_[x1, x2])
+    return 1 + 0.5 * x1 - x2 + eps, X, firm, year
+
+
+def test_ols_results_match_statsmodels_for_every_covariance():
+    y, X, firm, year = _design()
+    res = OLSResults(y, X)
+    ols = sm.OLS(y, X).fit()
+    assert np.allclose(res.params, ols.params, rtol=1e-12)
+    assert np.allclose(res.bse("nonrobust"), ols.bse, rtol=1e-10)
+    for kind in ("HC0", "HC1", "HC2", "HC3"):
+        assert np.allclose(res.cov(kind), ols.get_robustcov_results(kind).cov_params(), rtol=1e-10)
+    one_way = ols.get_robustcov_results("cluster", groups=firm)
+    assert np.allclose(res.cov("cluster", groups=firm), one_way.cov_params(), rtol=1e-10)
+    two_way = sw.cov_cluster_2groups(ols, firm, year)[0]
+    assert np.allclose(res.cov("cluster", groups=np.c_[firm, year]), two_way, rtol=1e-10)
+    hac = ols.get_robustcov_results("HAC", maxlags=5)
+    assert np.allclose(res.cov("HAC", maxlags=5), hac.cov_params(), rtol=1e-10)
+    table = res.table("HC3")
+    assert np.allclose(table["pvalue"], ols.get_robustcov_results("HC3").pvalues, rtol=1e-8)
+    assert np.allclose(res.table()["pvalue"], ols.pvalues, rtol=1e-8)
+
+
+def test_ols_results_cache_covariances_without_refitting():
+    y, X, firm, year = _design(seed=13)
+    res = OLSResults(y, X, names=["const", "x1", "x2"])
+    q = res.q
+    first = res.cov("cluster", groups=pd.Series(firm, name="firm"))
+    assert res.cov("cluster", groups=firm.astype(str)) is first  # same partition
+    assert res.cov("HC1") is res.cov("HC1")
+    assert res.q is q
+    se = res.compare(["nonrobust", "HC3", ("cluster", pd.Series(firm, name="firm")), ("HAC", 2)])
+    assert list(se.columns) == ["nonrobust", "HC3", "cluster(firm)", "HAC(2)"]
+    assert se.loc["x1", "cluster(firm)"] == pytest.approx(np.sqrt(first[1, 1]))
+    with pytest.raises(ValueError):
+        res.cov("HC4")
+    with pytest.raises(ValueError):
+        OLSResults(y, np.c_[X, X[:, 1]])
+
+
+def test_ols_results_from_formula():
+    y, X, firm, _ = _design(seed=14)
+    df = pd.DataFrame({"y": y, "x1": X[:, 1], "x2": X[:, 2]})
+    res = OLSResults.from_formula("y ~ x1 * x2", df)
+    ref = smf.ols("y ~ x1 * x2", data=df).fit(cov_type="HC1")
+    assert res.names == list(ref.params.index)
+    assert np.allclose(res.bse("HC1"), ref.bse, rtol=1e-10)
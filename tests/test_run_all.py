@@ -0,0 +1,245 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from scripts import run_all
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(run_all, "SCRIPTS_DIR", Path("scripts"))
+    monkeypatch.setattr(run_all, "OUTPUT_DIR", Path("out"))
+    monkeypatch.setattr(run_all, "LOG_DIR", Path("artifacts/logs"))
+    (tmp_path / "scripts").mkdir()
+    return tmp_path / "scripts"
+
+
+def write_script(folder, name, body, inputs=(), outputs=()):
+    header = f"INPUTS = {list(inputs)!r}\nOUTPUTS = {list(outputs)!r}\n"
+    path = folder / name
+    path.write_text(header + body)
+    return path
+
+
+def test_producers_run_before_consumers(sandbox):
+    write_script(sandbox, "a_consumer.py",
+                 "import pathlib\nassert pathlib.Path('out/x.csv').read_text() == 'x'\n",
+                 inputs=["$OUTPUT_DIR/x.csv"])
+    write_script(sandbox, "b_producer.py",
+                 "import pathlib, time\ntime.sleep(0.2)\npathlib.Path('out/x.csv').write_text('x')\n",
+                 outputs=["$OUTPUT_DIR/x.csv"])
+    scripts = run_all.discover_scripts()
+    deps = run_all.build_graph(scripts)
+    assert deps[scripts[0]] == {scripts[1]}
+    results = run_all.run_graph(scripts, deps, jobs=4)
+    assert {r.code for r in results.values()} == {0}
+
+
+def test_independent_scripts_run_concurrently(sandbox):
+    for name in ("a.py", "b.py", "c.py"):
+        write_script(sandbox, name, "import time\ntime.sleep(0.6)\n")
+    scripts = run_all.discover_scripts()
+    t0 = time.time()
+    results = run_all.run_graph(scripts, run_all.build_graph(scripts), jobs=3)
+    assert {r.code for r in results.values()} == {0}
+    assert time.time() - t0 < 1.5
+    assert (Path("artifacts/logs") / "a.log").exists()
+
+
+def test_failure_exit_code_is_preserved(sandbox):
+    write_script(sandbox, "bad.py", "raise SystemExit(3)\n")
+    assert run_all.main(["--jobs", "2"]) == 1
+
+
+def test_timeout_and_resource_report(sandbox, monkeypatch):
+    monkeypatch.setattr(run_all, "TIMEOUT_SEC", 0.5)
+    write_script(sandbox, "slow.py", "import time\ntime.sleep(30)\n")
+    write_script(sandbox, "busy.py", "x = bytearray(50 * 2**20)\nsum(range(10**6))\n")
+    assert run_all.main([]) == 1
+    report = json.loads(run_all.REPORT.read_text())
+    by_name = {r["name"]: r for r in report["scripts"]}
+    assert by_name["slow.py"]["code"] == 124
+    assert by_name["busy.py"]["code"] == 0
+    assert by_name["busy.py"]["max_rss_mb"] > 50
+    assert by_name["busy.py"]["user_s"] > 0
+
+
+def test_cache_skips_up_to_date_scripts(sandbox):
+    script = write_script(sandbox, "gen.py",
+                          "import pathlib\npathlib.Path('out').mkdir(exist_ok=True)\n"
+                          "pathlib.Path('out/g.csv').write_text('g')\n",
+                          outputs=["$OUTPUT_DIR/g.csv"])
+    scripts = run_all.discover_scripts()
+    cache = run_all.BuildCache()
+    run_all.run_graph(scripts, run_all.build_graph(scripts), cache=cache)
+    cache.save()
+    assert cache.misses == ["gen.py"]
+
+    cache = run_all.BuildCache()
+    run_all.run_graph(scripts, run_all.build_graph(scripts), cache=cache)
+    assert cache.hits == ["gen.py"]
+
+    Path("out/g.csv").write_text("tampered")
+    assert not run_all.BuildCache().is_fresh(script)
+    assert not run_all.BuildCache(force=True).is_fresh(script)
+
+
+def test_cache_follows_imports_and_last_writer(sandbox):
+    (sandbox / "helpers").mkdir()
+    (sandbox / "helpers" / "__init__.py").write_text("")
+    (sandbox / "helpers" / "text.py").write_text("VALUE = 'v1'\n")
+    write_script(sandbox, "a_first.py",
+                 "import pathlib\nfrom helpers.text import VALUE\n"
+                 "pathlib.Path('out').mkdir(exist_ok=True)\npathlib.Path('out/s.csv').write_text(VALUE)\n",
+                 outputs=["$OUTPUT_DIR/s.csv"])
+    write_script(sandbox, "b_second.py",
+                 "import pathlib\npathlib.Path('out/s.csv').write_text('b')\n",
+                 outputs=["$OUTPUT_DIR/s.csv"])
+    scripts = run_all.discover_scripts()
+    cache = run_all.BuildCache()
+    run_all.run_graph(scripts, run_all.build_graph(scripts), cache=cache)
+    cache.save()
+
+    cache = run_all.BuildCache()  # b rewrote a's output; a is still up to date
+    run_all.run_graph(scripts, run_all.build_graph(scripts), cache=cache)
+    assert sorted(cache.hits) == ["a_first.py", "b_second.py"]
+
+    (sandbox / "helpers" / "text.py").write_text("VALUE = 'v2'\n")
+    assert not run_all.BuildCache().is_fresh(scripts[0])
+
+
+def test_gather_links_registered_outputs_only(sandbox, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", str(Path(run_all.__file__).resolve().parents[1]))
+    write_script(sandbox, "reg.py",
+                 "import pathlib\nfrom portfolio.outputs import register_output\n"
+                 "p = pathlib.Path('project/table.csv')\np.parent.mkdir(exist_ok=True)\n"
+                 "p.write_text('a,b\\n1,2\\n')\nregister_output(p)\n")
+    Path("stray.csv").write_text("not registered")
+    assert run_all.main([]) == 0
+    dest = Path("out/table.csv")
+    assert dest.read_text() == "a,b\n1,2\n"
+    assert dest.stat().st_ino != Path("project/table.csv").stat().st_ino  # a copy, not an alias
+    assert not Path("out/stray.csv").exists()
+    assert run_all.gather_csvs() == 0
+    assert sorted(p.name for p in Path("out").iterdir()) == ["table.csv"]
+
+
+def test_gather_skips_name_collisions(sandbox, capsys):
+    for folder in ("a", "b"):
+        Path(folder).mkdir()
+        Path(folder, "same.csv").write_text(folder)
+        run_all.register_output(Path(folder, "same.csv"), key=f"step_{folder}",
+                                manifest_dir=run_all.OUTPUT_MANIFEST_DIR)
+    assert run_all.gather_csvs() == 0
+    assert not Path("out/same.csv").exists()
+    err = capsys.readouterr().err
+    assert "same.csv" in err and "a/same.csv" in err and "b/same.csv" in err
+
+
+def test_warm_workers_isolate_scripts(sandbox, monkeypatch):
+    monkeypatch.setattr(run_all.warm_pool, "PRELOAD", ("json", "smtplib"))
+    write_script(sandbox, "a_dirty.py",
+                 "import os, sys, smtplib\nos.chdir('/')\nos.environ['LEAK'] = '1'\n"
+                 "sys.modules['json'].LEAK = 1\n")
+    write_script(sandbox, "b_clean.py",
+                 "import os, sys, json\nassert os.path.isdir('scripts')\n"
+                 "assert 'LEAK' not in os.environ\nassert not hasattr(json, 'LEAK')\n"
+                 "raise SystemExit(0 if __name__ == '__main__' else 5)\n")
+    write_script(sandbox, "c_slow.py", "import time\ntime.sleep(30)\n")
+    monkeypatch.setattr(run_all, "TIMEOUT_SEC", 1)
+    scripts = run_all.discover_scripts()
+    results = run_all.run_graph(scripts, run_all.build_graph(scripts), jobs=1, warm=True)
+    by_name = {p.name: r for p, r in results.items()}
+    assert by_name["a_dirty.py"].code == 0
+    assert by_name["a_dirty.py"].import_saved_s > 0
+    assert by_name["b_clean.py"].code == 0
+    assert by_name["c_slow.py"].code == 124
+
+
+def test_longest_jobs_first_and_makespan():
+    a, b, c, d = (Path(f"{n}.py") for n in "abcd")
+    scripts = [a, b, c, d]
+    deps = {a: set(), b: set(), c: set(), d: {a}}  # d consumes a
+    est = {a: 1.0, b: 4.0, c: 2.0, d: 5.0}
+    levels = run_all.critical_paths(scripts, deps, est)
+    assert levels == {a: 6.0, b: 4.0, c: 2.0, d: 5.0}
+    # d follows a immediately and c fills the gap after b; discovery order delays d
+    assert run_all.predict_makespan(scripts, deps, est, levels, jobs=2) == 6.0
+    discovery = {p: -i for i, p in enumerate(scripts)}
+    assert run_all.predict_makespan(scripts, deps, est, discovery, jobs=2) == 8.0
+    assert run_all.predict_makespan(scripts, deps, est, levels, jobs=1) == 12.0
+
+
+def test_history_sets_adaptive_timeouts(sandbox, monkeypatch):
+    monkeypatch.setattr(run_all, "TIMEOUT_SEC", 180)
+    monkeypatch.setattr(run_all, "TIMEOUT_FACTOR", 5.0)
+    monkeypatch.setattr(run_all, "TIMEOUT_MIN_SEC", 30.0)
+    history = run_all.RunHistory()
+    fast, slow, new = Path("fast.py"), Path("slow.py"), Path("new.py")
+    history.update(fast, run_all.ScriptResult("fast.py", wall_s=0.5))
+    history.update(slow, run_all.ScriptResult("slow.py", wall_s=60.0))
+    history.update(slow, run_all.ScriptResult("slow.py", code=1, status="FAIL(1)", wall_s=1.0))
+    assert history.timeout(fast) == 30.0
+    assert history.timeout(slow) == 300.0
+    assert history.timeout(new) == 180
+    assert history.estimate(new) == 60.0  # median of known scripts
+    history.save()
+    assert run_all.RunHistory().predict(slow) == 60.0
+
+
+def test_timed_out_script_gets_a_larger_limit(sandbox, monkeypatch):
+    monkeypatch.setattr(run_all, "TIMEOUT_FACTOR", 2.0)
+    monkeypatch.setattr(run_all, "TIMEOUT_MIN_SEC", 0.5)
+    write_script(sandbox, "grown.py", "import time\ntime.sleep(0.8)\n")
+    scripts = run_all.discover_scripts()
+    script = scripts[0]
+    history = run_all.RunHistory()
+    history.update(script, run_all.ScriptResult("grown.py", wall_s=0.1))  # before the data grew
+    assert history.timeout(script) == 0.5
+    deps = run_all.build_graph(scripts)
+    assert run_all.run_graph(scripts, deps, history=history)[script].code == 124
+    assert history.timeout(script) >= 1.0
+    assert run_all.run_graph(scripts, deps, history=history)[script].code == 0
+
+
+def test_pipeline_entries_exist():
+    root = Path(run_all.__file__).resolve().parents[1]
+    for step in run_all.pipeline.STEPS:
+        assert (root / step.entry).is_file(), step.entry
+        assert (root / step.cwd).is_dir(), step.cwd
+    assert len({s.path.stem for s in run_all.pipeline.STEPS}) == len(run_all.pipeline.STEPS)
+
+
+def test_every_output_has_one_writer():
+    root = Path(run_all.__file__).resolve().parents[1]
+    entries = [p for p in sorted((root / "scripts").glob("*.py")) if p.name not in run_all.EXCLUDE]
+    writers = {}
+    for path in entries + [s.path for s in run_all.pipeline.STEPS]:
+        for out in run_all.declared_io(path)[1]:
+            writers.setdefault(out, []).append(path.name)
+    assert {o: w for o, w in writers.items() if len(w) > 1} == {}
+
+
+def test_portfolio_steps_run_in_their_workdir(sandbox, monkeypatch):
+    project = Path("project")
+    project.mkdir()
+    (project / "model.py").write_text("open('table.csv', 'w').write('a\\n1\\n')\n")
+    (project / "needs_gpu.py").write_text("raise SystemExit(1)\n")
+    steps = {
+        "project/model.py": run_all.pipeline.Step(
+            "model", "project/model.py", cwd="project", outputs=("project/table.csv",)),
+        "project/needs_gpu.py": run_all.pipeline.Step(
+            "needs_gpu", "project/needs_gpu.py", requires=("no_such_module_xyz",)),
+    }
+    monkeypatch.setattr(run_all.pipeline, "STEPS", tuple(steps.values()))
+    monkeypatch.setattr(run_all.pipeline, "_BY_ENTRY", steps)
+    assert run_all.main(["--portfolio"]) == 0
+    report = {r["name"]: r for r in json.loads(run_all.REPORT.read_text())["scripts"]}
+    assert report["model.py"]["status"] == "OK"
+    assert report["needs_gpu.py"]["status"] == "SKIP"
+    assert Path("out/table.csv").read_text() == "a\n1\n"  # registered on the step's behalf
+    assert run_all.main(["--portfolio"]) == 0
+    assert json.loads(run_all.REPORT.read_text())["scripts"][0]["status"] == "CACHED"
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from portfolio import scale
+
+
+def draw(rng, n, start):
+    return pd.DataFrame({"id": range(start, start + n), "x": rng.normal(size=n)})
+
+
+def test_size_options():
+    assert scale.parse_size(2000, argv=["--outdir", "out"]).n == 2000
+    assert scale.parse_size(2000, argv=["--scale", "2.5"]).n == 5000
+    size = scale.parse_size(150, rows_per_unit=26, argv=["--n", "100", "--chunk-rows", "520"])
+    assert (size.n, size.block_units, size.chunked) == (100, 20, True)
+    with pytest.raises(SystemExit):
+        scale.parse_size(10, argv=["--n", "5", "--scale", "2"])
+    assert scale.block_sizes(10, 4) == [4, 4, 2]
+
+
+def test_blocks_are_reproducible_and_independent():
+    size = scale.Size(10, chunk_rows=4)
+    blocks = list(scale.iter_blocks(draw, size, seed=1))
+    assert [len(b) for b in blocks] == [4, 4, 2]
+    assert pd.concat(blocks)["id"].tolist() == list(range(10))
+    again = pd.concat(scale.iter_blocks(draw, size, seed=1))
+    pd.testing.assert_frame_equal(pd.concat(blocks), again)
+    assert not blocks[0]["x"].head(2).equals(blocks[1]["x"].head(2))
+
+
+def test_stream_dataset_never_overwrites_default(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+    path = scale.stream_dataset(draw, scale.Size(10, chunk_rows=3), 1, tmp_path / "sim")
+    assert path.name == "sim_n10.parquet"
+    assert not (tmp_path / "sim_n10.csv").exists()
+    assert len(pd.read_parquet(path)) == 10
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import schemas
+from portfolio.dataset_io import read_dataset, write_chunks
+
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("portfolio.outputs.MANIFEST_DIR", tmp_path / "manifests")
+
+
+def timesheets(n=2000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "employee_id": [f"E{i % 100:03d}" for i in range(n)],
+        "dept": rng.choice(["HR", "Sales", "Finance"], size=n),
+        "week": np.arange(n) % 26 + 1,
+        "hours": rng.normal(40, 5, size=n).round(2),
+    })
+
+
+def test_apply_schema_shrinks_frame_and_keeps_values():
+    raw = timesheets()
+    compact = schemas.apply_schema(raw, "data/processed/timesheets_synthetic.csv")
+    assert compact["dept"].dtype == schemas.SCHEMAS["timesheets_synthetic"].dtypes["dept"]
+    assert compact["employee_id"].dtype == "category"
+    assert compact["week"].dtype == np.int8 and compact["hours"].dtype == np.float32
+    assert compact["dept"].astype(str).tolist() == raw["dept"].tolist()
+    assert schemas.memory_saved(raw, compact)["ratio"] > 3
+    assert schemas.schema_for("timesheets_synthetic_n500000.parquet").name == "timesheets_synthetic"
+    assert schemas.apply_schema(raw, "unregistered") is raw
+
+
+def test_apply_schema_refuses_lossy_casts():
+    with pytest.raises(ValueError, match="outside int8"):
+        schemas.apply_schema(pd.DataFrame({"week": [1, 300]}), "timesheets_synthetic")
+    with pytest.raises(ValueError, match="undeclared labels"):
+        schemas.apply_schema(pd.DataFrame({"dept": ["HR", "Legal"]}), "timesheets_synthetic")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_schema_applied_on_write_and_read(tmp_path, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    raw = timesheets()
+    blocks = (raw.iloc[i:i + 700] for i in range(0, len(raw), 700))
+    write_chunks(blocks, tmp_path / "timesheets_synthetic", fmt=fmt, csv=False)
+    back = read_dataset(tmp_path / "timesheets_synthetic")
+    pd.testing.assert_frame_equal(back, schemas.apply_schema(raw, "timesheets_synthetic"))
+    if fmt == "csv":
+        plain = read_dataset(tmp_path / "timesheets_synthetic", schema=False)
+        assert plain["week"].dtype == np.int64
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from linearmodels.iv import IVLIML
+
+from econometrics.iv_2sls.weak_iv import weak_iv_sets
+from test_iv_2sls import simulate_iv
+
+
+def weak_design(n=800, seed=0):
+    rng = np.random.default_rng(seed)
+    z = rng.normal(size=(n, 3))
+    u = rng.normal(size=n)
+    w = rng.normal(size=n)
+    x = z @ [0.15, 0.1, 0.0] + 0.3 * w + 0.6 * u + 0.8 * rng.normal(size=n)
+    y = 1 + 2 * x + 0.5 * w + u * (1 + 0.5 * np.abs(z[:, 0]))
+    df = pd.DataFrame({"y": y, "x": x, "w": w, "g": rng.integers(0, 40, n)})
+    df[["z1", "z2", "z3"]] = z
+    return df
+
+
+@pytest.mark.parametrize("cov_type", ["unadjusted", "robust"])
+def test_ar_matches_refitting_at_each_grid_point(cov_type):
+    df = weak_design()
+    grid = np.array([0.0, 1.0, 2.0, 3.5])
+    res = weak_iv_sets(df, "y", "x", ["z1", "z2", "z3"], exog="w", grid=grid, cov_type=cov_type)
+    exog = sm.add_constant(df[["w", "z1", "z2", "z3"]])
+    restriction = np.hstack([np.zeros((3, 2)), np.eye(3)])
+    for b, stat in zip(grid, res.ar_stat):
+        fit = sm.OLS(df["y"] - b * df["x"], exog).fit(
+            **({"cov_type": "HC0"} if cov_type == "robust" else {})
+        )
+        ref = fit.wald_test(restriction, use_f=cov_type == "unadjusted", scalar=True)
+        assert stat == pytest.approx(float(ref.statistic), rel=1e-9)
+
+
+def test_clr_is_minimised_at_liml_and_sets_are_nested():
+    df = weak_design()
+    res = weak_iv_sets(df, "y", "x", ["z1", "z2", "z3"], exog="w")
+    liml = IVLIML.from_formula("y ~ 1 + w + [x ~ z1 + z2 + z3]", df).fit()
+    assert res.liml == pytest.approx(liml.params["x"], rel=1e-10)
+    best = np.argmin(res.clr_stat)
+    assert abs(res.grid[best] - res.liml) <= np.diff(res.grid).max()
+    assert res.clr_pvalue[best] > 0.95
+    (ar_lo, ar_hi), = res.confidence_set("ar")
+    (clr_lo, clr_hi), = res.confidence_set("clr")
+    assert ar_lo <= clr_lo < 2.0 < clr_hi <= ar_hi  # CLR is the shorter, more powerful set
+
+
+def test_just_identified_clr_equals_ar_and_edges_are_open():
+    df = simulate_iv()
+    res = weak_iv_sets(df, "y", endog="x", instruments="z")
+    np.testing.assert_allclose(res.clr_pvalue, res.ar_pvalue, atol=1e-6)
+    (lo, hi), = res.confidence_set("ar")
+    assert lo < 2.0 < hi
+    wide = weak_iv_sets(df, "y", endog="x", instruments="z", grid=np.linspace(1.99, 2.01, 11))
+    assert wide.confidence_set("ar") == [(-np.inf, np.inf)]
+
+
+def test_clusters_apply_only_to_clustered_ar():
+    df = weak_design()
+    args = (df, "y", "x", ["z1", "z2", "z3"])
+    robust = weak_iv_sets(*args, exog="w", cov_type="robust")
+    ignored = weak_iv_sets(*args, exog="w", cov_type="robust", clusters="g")
+    np.testing.assert_allclose(ignored.ar_stat, robust.ar_stat)
+    clustered = weak_iv_sets(*args, exog="w", cov_type="clustered", clusters="g")
+    listed = weak_iv_sets(*args, exog="w", cov_type="clustered", clusters=["g"])
+    np.testing.assert_allclose(listed.ar_stat, clustered.ar_stat)
+    assert not np.allclose(clustered.ar_stat, robust.ar_stat)
+    with pytest.raises(ValueError, match="one `clusters` column"):
+        weak_iv_sets(*args, cov_type="clustered", clusters=["g", "w"])
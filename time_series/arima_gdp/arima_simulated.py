@@ -5,15 +5,19 @@ arima_simulated.py
 Simulate GDP growth as an AR(1) process and build a GDP index series.
 
 Output:
-    data/processed/gdp_growth_synthetic.csv
+    data/processed/gdp_growth_synthetic.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
-def main():
+
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running arima_simulated.py ...")
 
     rng = np.random.default_rng(2025)
@@ -42,29 +46,24 @@ def main():
         }
     )
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "gdp_growth_synthetic.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved GDP growth data to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "gdp_growth_synthetic")
+    if out_path is not None:
+        print(f"Saved GDP growth data to: {out_path.resolve()}")
     print(df.head())
+    return ModuleResult(df, meta={"phi": phi, "mu": mu, "sigma": sigma}, path=out_path)
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import numpy as np
-    import pandas as pd
     import os
 
-    main()
+    result = main()
 
     os.makedirs("time_series/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/gdp_growth_synthetic.csv")
-    col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-    series = df[col].values
+    col = "g"
+    series = result.data[col].to_numpy()
     n = len(series)
     train = series[:int(n * 0.8)]
     test  = series[int(n * 0.8):]
@@ -75,7 +74,7 @@ if __name__ == "__main__":
     from statsmodels.tsa.arima.model import ARIMA
     model = ARIMA(train, order=(1, 0, 1)).fit()
     forecast = model.forecast(steps=len(test))
-    conf_int = model.get_forecast(steps=len(test)).conf_int()
+    conf_int = np.asarray(model.get_forecast(steps=len(test)).conf_int())
 
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.plot(t_train, train, color="#1B4F8A", linewidth=1.5, label="Training data")
@@ -84,7 +83,7 @@ if __name__ == "__main__":
     ax.plot(t_test, forecast, color="#E8593C", linewidth=2,
             label="ARIMA forecast")
     ax.fill_between(t_test,
-                    conf_int.iloc[:, 0], conf_int.iloc[:, 1],
+                    conf_int[:, 0], conf_int[:, 1],
                     alpha=0.15, color="#E8593C", label="95% confidence interval")
     ax.axvline(len(train) - 0.5, color="#333", linestyle=":", linewidth=1)
     ax.set_xlabel("Period", fontsize=11)
@@ -5,15 +5,19 @@ var_irf_coint.py
 Simulate two cointegrated time series suitable for VAR / IRF demos.
 
 Output:
-    data/processed/var_cointegration.csv
+    data/processed/var_cointegration.parquet (and .csv for Tableau)
 """
 
 import numpy as np
 import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from portfolio.results import DEFAULT_OUT_DIR, ModuleResult, sink
 
-def main():
+
+def main(out_dir=DEFAULT_OUT_DIR) -> ModuleResult:
     print("Running var_irf_coint.py ...")
 
     rng = np.random.default_rng(2025)
@@ -33,30 +37,26 @@ def main():
         }
     )
 
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "var_cointegration.csv"
-    df.to_csv(out_path, index=False)
-
-    print(f"Saved VAR/cointegration data to: {out_path.resolve()}")
+    out_path = sink(df, out_dir, "var_cointegration")
+    if out_path is not None:
+        print(f"Saved VAR/cointegration data to: {out_path.resolve()}")
     print(df.head())
+    return ModuleResult(df, path=out_path)
 
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
-    import numpy as np
-    import pandas as pd
     import os
 
-    main()
+    result = main()
 
     os.makedirs("time_series/figures", exist_ok=True)
 
-    df = pd.read_csv("data/processed/var_cointegration.csv")
-    cols = [c for c in df.columns if c != "period"][:2]
-    s1, s2 = df[cols[0]].values, df[cols[1]].values
-    t = np.arange(len(s1))
+    df = result.data
+    cols = ["y1", "y2"]
+    s1, s2 = df["y1"].to_numpy(), df["y2"].to_numpy()
+    t = df["t"].to_numpy()
 
     fig, axes = plt.subplots(2, 1, figsize=(10, 7), sharex=True)
     axes[0].plot(t, s1, color="#1B4F8A", linewidth=1.5, label=cols[0])